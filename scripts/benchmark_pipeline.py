@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from types import SimpleNamespace
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+# The agents build their LLM clients eagerly; nothing is sent to them during a benchmark run.
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from src.utils.synthetic_wallets import generate_wallet
+from src.modules.analysis.transaction_columns import TransactionColumns, TRANSACTION_PROJECTION, documents_nbytes
+from src.service.stubs import StubChatClient, use_in_memory_mongo
+
+
+DEFAULT_SIZES = "10,1000,10000,100000"
+
+
+def browser_history(wallet_data, steps):
+    """Mimic an AgentHistoryList whose last step holds the fenced JSON answer."""
+    history = [SimpleNamespace(result=[SimpleNamespace(extracted_content=f"Scrolled page {step}")])
+               for step in range(steps - 1)]
+    answer = "```json\n" + json.dumps(wallet_data, indent=2) + "\n```"
+    history.append(SimpleNamespace(result=[SimpleNamespace(extracted_content=answer)]))
+    return SimpleNamespace(history=history)
+
+
+def measure(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, {"median_s": statistics.median(timings),
+                    "min_s": min(timings),
+                    "peak_mib": round(peak / 2**20, 3)}
+
+
+def with_throughput(stats, items):
+    stats["items"] = items
+    stats["items_per_s"] = round(items / stats["median_s"], 1) if stats["median_s"] > 0 else None
+    return stats
+
+
+def trend_features(wallet_data, timeframes, current_time):
+    """Build get_features() output straight from the generated wallet, without a database round trip."""
+    window_start = (current_time - timedelta(days=max(timeframes))).timestamp()
+    transaction_history = []
+    balance_offsets = {}
+    for tx in wallet_data["transaction_history"]:
+        if tx["timestamp"] >= window_start:
+            transaction_history.append(tx)
+        elif tx["type"] in ("send", "receive"):
+            amount = tx["amount"] if tx["type"] == "receive" else -tx["amount"]
+            balance_offsets[tx["token"]] = balance_offsets.get(tx["token"], 0) + amount
+    transaction_history.sort(key=lambda tx: tx["timestamp"])
+    return TransactionColumns.from_cursor(transaction_history), wallet_data["token_balances"], balance_offsets
+
+
+def projected_documents(wallet_data):
+    """The transactions as a Mongo cursor would decode them, with fresh key and value strings per document."""
+    fields = [field for field in TRANSACTION_PROJECTION if field != "_id"]
+    return [{"".join(field): "".join(tx[field]) if isinstance(tx[field], str) else tx[field] for field in fields}
+            for tx in wallet_data["transaction_history"]]
+
+
+def benchmark_size(size, args, agents, output_dir):
+    from src.utils.common import (find_valid_json,
+                                  post_process_result,
+                                  save_trend_analysis_to_file,
+                                  write_json_to_text)
+    from src.utils.report_sink import ReportSink, trend_record
+
+    ingestion_agent, trend_agent, wallet_age_agent = agents
+    wallet_data = generate_wallet(size, num_tokens=args.tokens, seed=args.seed + size)
+    wallet_address = wallet_data["wallet_address"]
+    results = {}
+
+    history = browser_history(wallet_data, args.browser_steps)
+    extracted, results["find_valid_json"] = measure(lambda: find_valid_json(history), args.repeat)
+    _, results["post_process_result"] = measure(lambda: post_process_result(extracted), args.repeat)
+    with_throughput(results["post_process_result"], size)
+
+    features = trend_features(wallet_data, trend_agent.timeframes, trend_agent.current_time)
+    trend_results, results["compute_trends"] = measure(
+        lambda: trend_agent.compute_trends(*features, trend_agent.timeframes, trend_agent.current_time),
+        args.repeat)
+    with_throughput(results["compute_trends"], len(features[0]))
+
+    documents = projected_documents(wallet_data)
+    columns, results["transaction_columns"] = measure(lambda: TransactionColumns.from_cursor(documents), args.repeat)
+    with_throughput(results["transaction_columns"], size)
+    results["transaction_columns"].update(documents_bytes=documents_nbytes(documents),
+                                          columns_bytes=columns.nbytes())
+    del documents
+
+    conclusion, results["interpret_strategy"] = measure(lambda: trend_agent.interpret_strategy(trend_results),
+                                                        args.repeat)
+
+    trend_report = os.path.join(output_dir, "trend_analysis_report.txt")
+    _, results["save_trend_analysis_to_file"] = measure(
+        lambda: save_trend_analysis_to_file(trend_results, conclusion, trend_report), args.repeat)
+
+    record = trend_record(wallet_address, trend_results, conclusion, trend_agent.current_time)
+    sink = ReportSink(os.path.join(output_dir, "reports"), batch_size=args.report_records,
+                      flush_interval=float('inf'), formats=["jsonl", "parquet"])
+
+    def write_reports():
+        for _ in range(args.report_records):
+            sink.add(record)
+        sink.flush()
+
+    _, results["report_sink"] = measure(write_reports, args.repeat)
+    with_throughput(results["report_sink"], args.report_records)
+
+    if args.max_mongo_size is not None and size > args.max_mongo_size:
+        return results
+
+    def save():
+        ingestion_agent.watermarks = {}
+        ingestion_agent.save_mongodb(wallet_data)
+        ingestion_agent.writer.flush()
+
+    # Only the first pass inserts; later passes measure the upsert path over existing documents.
+    _, results["save_mongodb"] = measure(save, args.repeat)
+    with_throughput(results["save_mongodb"], size)
+
+    for source in ("rollups", "transactions"):
+        trend_agent.source = source
+        _, results[f"analyze_trends_{source}"] = measure(lambda: trend_agent.analyze_trends(wallet_address),
+                                                         args.repeat)
+        with_throughput(results[f"analyze_trends_{source}"], size)
+
+    wallet_age, results["wallet_age_analysis"] = measure(lambda: wallet_age_agent.get_response(wallet_address),
+                                                         args.repeat)
+
+    wallet_age_report = os.path.join(output_dir, "wallet_age_report.txt")
+    _, results["write_json_to_text"] = measure(lambda: write_json_to_text(wallet_age, wallet_age_report),
+                                               args.repeat)
+
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(report, baseline):
+    print(f"\nCompared with {baseline.get('revision')}:")
+    for size, stages in report["results"].items():
+        for stage, stats in stages.items():
+            previous = baseline.get("results", {}).get(size, {}).get(stage)
+            if not previous or not previous["median_s"]:
+                continue
+            ratio = stats["median_s"] / previous["median_s"]
+            print(f"{size:>8} {stage:<30} {ratio:>6.2f}x time  "
+                  f"{stats['peak_mib'] - previous['peak_mib']:+9.2f} MiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline throughput and memory benchmark of the analysis pipeline.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='Comma separated transaction counts per synthetic wallet, e.g. 10,1000,1000000')
+    parser.add_argument('--tokens', type=int, default=50, help='Distinct tokens per wallet')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--browser-steps', type=int, default=25, help='Steps in the simulated browser history')
+    parser.add_argument('--mongo', choices=['memory', 'local'], default='memory',
+                        help='memory uses mongomock; local uses the server from database.yaml')
+    parser.add_argument('--report-records', type=int, default=1000,
+                        help='Trend records written through the report sink per size')
+    parser.add_argument('--max-mongo-size', type=int,
+                        help='Skip the database-bound stages above this size '
+                             '(default: 1000 with mongomock, which scans collections linearly; no limit otherwise)')
+    parser.add_argument('--output', help='Write the JSON report to this path')
+    parser.add_argument('--compare', help='Earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    if args.mongo == 'memory':
+        use_in_memory_mongo()
+        if args.max_mongo_size is None:
+            args.max_mongo_size = 1000
+
+    from src.config.app_config import CryptoConfig as cc
+    cc.llm_cache_enabled = False
+    cc.metrics_verbose_logging = False
+
+    from src.modules.ingestion.data_ingestion import DataIngestionAgent
+    from src.modules.agent.trend_agent import HistoricalTrendAnalysisAgent
+    from src.modules.agent.wallet_age_agent import WalletAgeAgent
+
+    ingestion_agent = DataIngestionAgent()
+    trend_agent = HistoricalTrendAnalysisAgent()
+    wallet_age_agent = WalletAgeAgent()
+    wallet_age_agent.client = StubChatClient()
+
+    report = {"revision": git_revision(),
+              "python": platform.python_version(),
+              "mongo": args.mongo,
+              "tokens": args.tokens,
+              "repeat": args.repeat,
+              "max_mongo_size": args.max_mongo_size,
+              "results": {}}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        wallet_age_agent.wallet_age_report_path = os.path.join(output_dir, "wallet_age_report.txt")
+        from src.utils.report_sink import ReportSink
+        wallet_age_agent.report_sink = ReportSink(os.path.join(output_dir, "agent_reports"), batch_size=500,
+                                                  flush_interval=float('inf'), formats=["jsonl"])
+        for size in (int(value) for value in args.sizes.split(',')):
+            report["results"][str(size)] = benchmark_size(size, args,
+                                                          (ingestion_agent, trend_agent, wallet_age_agent),
+                                                          output_dir)
+            for stage, stats in report["results"][str(size)].items():
+                throughput = f"{stats['items_per_s']:>12.1f} tx/s" if stats.get("items_per_s") else " " * 17
+                print(f"{size:>8} {stage:<30} median {stats['median_s'] * 1000:>10.2f} ms {throughput}  "
+                      f"peak {stats['peak_mib']:>9.2f} MiB")
+                if "columns_bytes" in stats:
+                    print(f"{size:>8} {'':<30} {stats['documents_bytes'] / 2**20:.2f} MiB as dicts, "
+                          f"{stats['columns_bytes'] / 2**20:.2f} MiB as columns "
+                          f"({stats['documents_bytes'] / max(stats['columns_bytes'], 1):.1f}x smaller)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from aiohttp import web
+
+from src.service.stubs import rate_limited_app
+from src.utils.rate_control import AdaptiveLimiter, CircuitBreaker, ResilientEndpoint
+
+
+async def run(args):
+    app = rate_limited_app(args.server_concurrency, latency=args.latency)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    endpoint = ResilientEndpoint('stub',
+                                 limiter=AdaptiveLimiter('stub', initial=1, minimum=1, maximum=args.max_concurrency,
+                                                         cooldown=args.latency * 2),
+                                 breaker=CircuitBreaker('stub', failure_threshold=50, reset_timeout=1),
+                                 max_retries=args.max_retries, base_delay=0.05, max_delay=1)
+    failed = 0
+    samples = []
+
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}') as client:
+        async def get(index):
+            response = await client.get(f'/item/{index}')
+            response.raise_for_status()
+
+        async def request(index):
+            nonlocal failed
+            try:
+                await endpoint.call_async(get, index)
+            except Exception:
+                failed += 1
+
+        async def sample():
+            while True:
+                samples.append(endpoint.limiter.limit)
+                await asyncio.sleep(0.1)
+
+        sampler = asyncio.create_task(sample())
+        started_at = time.perf_counter()
+        await asyncio.gather(*(request(index) for index in range(args.requests)))
+        elapsed = time.perf_counter() - started_at
+        sampler.cancel()
+
+    await runner.cleanup()
+    state = app["state"]
+    print(f"{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f}/s), "
+          f"{state['served']} served, {state['throttled']} answered 429, {failed} failed after retries")
+    print(f"server allows {args.server_concurrency} concurrent, final limit {endpoint.limiter.limit:.2f}, "
+          f"limit over time: {' '.join(f'{value:.1f}' for value in samples[::max(len(samples) // 20, 1)])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive the adaptive limiter against a local stub that returns 429s.')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--server-concurrency', type=int, default=6)
+    parser.add_argument('--max-concurrency', type=int, default=32)
+    parser.add_argument('--max-retries', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=0.05)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+
+TARGETS = {
+    "import src.modules": "import src.modules",
+    "import agent_controller": "import src.modules.agent_controller",
+    "import trend_agent": "import src.modules.agent.trend_agent",
+    "import wallet_age_agent": "import src.modules.agent.wallet_age_agent",
+    "import data_ingestion": "import src.modules.ingestion.data_ingestion",
+    "construct AgentController": "from src.modules.agent_controller import AgentController; AgentController()",
+}
+
+SNIPPET = """
+import time
+started_at = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started_at
+import sys
+heavy = sorted(name for name in ('browser_use', 'langchain_openai', 'openai', 'numpy', 'pymongo') if name in sys.modules)
+print(elapsed, ','.join(heavy))
+"""
+
+
+def measure(statement, repeat):
+    timings = []
+    heavy_modules = ''
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', SNIPPET.format(statement=statement)],
+                                capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+        elapsed, _, heavy_modules = output.partition(' ')
+        timings.append(float(elapsed))
+    return {"median_ms": round(statistics.median(timings) * 1000, 1),
+            "min_ms": round(min(timings) * 1000, 1),
+            "heavy_modules": heavy_modules.split(',') if heavy_modules else []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import and startup time of the agents.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = {name: measure(statement, args.repeat) for name, statement in TARGETS.items()}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for name, result in report.items():
+        print(f"{name:<28} median {result['median_ms']:>8.1f} ms  min {result['min_ms']:>8.1f} ms  "
+              f"loaded: {', '.join(result['heavy_modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.app_config import CryptoConfig as cc
+from src.database.db.wallet_db import CryptoDatabase
+from src.modules.analysis.counterparty_graph import CounterpartyGraph, get_counterparty_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the counterparty graph over stored transactions.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('rebuild', help='Scan every stored transaction into a fresh snapshot')
+    subparsers.add_parser('update', help='Read transactions added since the snapshot and save it again')
+
+    top = subparsers.add_parser('top', help='Top counterparties of a wallet')
+    top.add_argument('wallet_address')
+    top.add_argument('-k', type=int, default=10)
+
+    shared = subparsers.add_parser('shared', help='Counterparties two wallets have in common')
+    shared.add_argument('wallet_address')
+    shared.add_argument('other_address')
+
+    cluster = subparsers.add_parser('cluster', help='Connected cluster containing a wallet')
+    cluster.add_argument('wallet_address')
+    cluster.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        graph = CounterpartyGraph(cc.graph_compact_threshold, cc.graph_catch_up_overlap)
+        graph.catch_up(CryptoDatabase().get_transaction_collection(), cc.graph_catch_up_batch_size)
+        graph.save(cc.graph_snapshot_path)
+        return
+
+    graph = get_counterparty_graph()
+    if args.command == 'update':
+        graph.save(cc.graph_snapshot_path)
+        return
+
+    started_at = time.perf_counter()
+    if args.command == 'top':
+        result = graph.top_counterparties(args.wallet_address, args.k)
+    elif args.command == 'shared':
+        result = graph.shared_counterparties(args.wallet_address, args.other_address)
+    else:
+        result = graph.cluster(args.wallet_address, args.limit)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+    print(json.dumps(result, indent=2))
+    print(f'{args.command} answered in {elapsed_ms:.2f} ms', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import socket
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.ingestion.data_ingestion import DataIngestionAgent
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded wallet ingestion through the Mongo job queue.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = subparsers.add_parser('enqueue', help='Stream a wallet file into the job queue')
+    enqueue.add_argument('wallet_file', nargs='?')
+
+    work = subparsers.add_parser('work', help='Claim and ingest jobs until the queue is drained')
+    work.add_argument('--worker-id', default=f'{socket.gethostname()}-{os.getpid()}')
+    work.add_argument('--follow', action='store_true', help='Keep polling for new jobs instead of exiting')
+
+    subparsers.add_parser('requeue', help='Return jobs with expired leases to the queue')
+    subparsers.add_parser('stats', help='Print job counts by status')
+    args = parser.parse_args()
+
+    agent = DataIngestionAgent()
+    if args.command == 'enqueue':
+        print(json.dumps(agent.enqueue_wallets(args.wallet_file)))
+    elif args.command == 'work':
+        asyncio.run(agent.run_queue_worker(args.worker_id, follow=args.follow))
+    elif args.command == 'requeue':
+        print(agent.get_job_queue().requeue_expired())
+    else:
+        print(json.dumps(agent.get_job_queue().stats()))
+
+
+if __name__ == '__main__':
+    main()
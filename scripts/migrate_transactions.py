@@ -0,0 +1,17 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.ingestion.data_ingestion import DataIngestionAgent
+
+
+def main():
+    argparse.ArgumentParser(description='Move transaction_history arrays embedded in wallet documents '
+                                        'into the transactions collection.').parse_args()
+    print(DataIngestionAgent().migrate_embedded_transactions())
+
+
+if __name__ == '__main__':
+    main()
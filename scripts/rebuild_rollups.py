@@ -0,0 +1,24 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.ingestion.data_ingestion import DataIngestionAgent
+from src.modules.ingestion.job_queue import iter_wallet_addresses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute the daily per-token rollups from stored transactions.')
+    parser.add_argument('--wallet-file', help='Only rebuild the wallets listed in this file (default: all)')
+    args = parser.parse_args()
+
+    wallet_addresses = None
+    if args.wallet_file:
+        wallet_addresses = [address for address in iter_wallet_addresses(args.wallet_file) if address]
+
+    print(DataIngestionAgent().rebuild_rollups(wallet_addresses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.ingestion.data_ingestion import DataIngestionAgent
+from src.modules.ingestion.job_queue import iter_wallet_addresses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild wallet records from stored page snapshots, offline.')
+    parser.add_argument('--wallet-file', help='Only re-extract the wallets listed in this file (default: all)')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--stats', action='store_true', help='Print snapshot store usage and exit')
+    args = parser.parse_args()
+
+    agent = DataIngestionAgent()
+    if args.stats:
+        print(json.dumps(agent.snapshot_store.stats() if agent.snapshot_store else {}))
+        return
+
+    wallet_addresses = None
+    if args.wallet_file:
+        wallet_addresses = [address for address in iter_wallet_addresses(args.wallet_file) if address]
+    print(json.dumps(agent.reextract(wallet_addresses, workers=args.workers)))
+
+
+if __name__ == '__main__':
+    main()
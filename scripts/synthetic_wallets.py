@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.synthetic_wallets import generate_wallet
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic wallets shaped like the ingestion output.')
+    parser.add_argument('--transactions', type=int, default=1000)
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--wallets', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help='JSONL output path, - for stdout')
+    args = parser.parse_args()
+
+    output = open(args.output, 'w') if args.output != '-' else None
+    try:
+        for index in range(args.wallets):
+            line = json.dumps(generate_wallet(args.transactions, args.tokens, seed=args.seed + index))
+            if output is not None:
+                output.write(line + '\n')
+            else:
+                print(line)
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 from dotenv import load_dotenv
 
@@ -26,6 +27,19 @@ class CryptoConfig:
 
     agent_cfg = cfg['agent']
     common_cfg = cfg['common']
+    ingestion_cfg = cfg['ingestion']
+    extractor_cfg = cfg['extractor']
+    snapshots_cfg = cfg['snapshots']
+    rate_control_cfg = cfg['rate_control']
+    graph_cfg = cfg['graph']
+    trend_cfg = cfg['trend']
+    prices_cfg = cfg['prices']
+    wallet_age_cfg = cfg['wallet_age']
+    llm_cache_cfg = cfg['llm_cache']
+    pipeline_cfg = cfg['pipeline']
+    service_cfg = cfg['service']
+    reports_cfg = cfg['reports']
+    metrics_cfg = cfg['metrics']
 
     model = agent_cfg['model']
     chatbot_model_name = agent_cfg['chatbot_model_name']
@@ -33,6 +47,80 @@ class CryptoConfig:
     temperature = agent_cfg['temperature']
     top_p = agent_cfg['top_p']
     max_tokens = agent_cfg['max_tokens']
+
+    num_workers = ingestion_cfg['num_workers']
+    rate_limit_burst = ingestion_cfg['rate_limit_burst']
+    progress_interval = ingestion_cfg['progress_interval']
+    journal_path = ingestion_cfg['journal_path']
+    section_retries = ingestion_cfg['section_retries']
+    lease_seconds = ingestion_cfg['lease_seconds']
+    max_attempts = ingestion_cfg['max_attempts']
+    claim_batch_size = ingestion_cfg['claim_batch_size']
+    idle_poll_interval = ingestion_cfg['idle_poll_interval']
+
+    use_fast_path = extractor_cfg['use_fast_path']
+    etherscan_host = extractor_cfg['etherscan_host']
+    extractor_max_connections = extractor_cfg['max_connections']
+    extractor_timeout = extractor_cfg['timeout']
+    extractor_max_pages = extractor_cfg['max_pages']
+    extractor_page_size = extractor_cfg['page_size']
+    extractor_max_token_pages = extractor_cfg['max_token_pages']
+    extractor_user_agent = extractor_cfg['user_agent']
+
+    snapshots_enabled = snapshots_cfg['enabled']
+    snapshots_directory = snapshots_cfg['directory']
+    snapshots_max_bytes = snapshots_cfg['max_bytes']
+    snapshots_compression_level = snapshots_cfg['compression_level']
+
+    rate_control_max_retries = rate_control_cfg['max_retries']
+    rate_control_base_delay = rate_control_cfg['base_delay']
+    rate_control_max_delay = rate_control_cfg['max_delay']
+    rate_control_endpoints = rate_control_cfg['endpoints']
+
+    graph_enabled = graph_cfg['enabled']
+    graph_snapshot_path = graph_cfg['snapshot_path']
+    graph_compact_threshold = graph_cfg['compact_threshold']
+    graph_catch_up_batch_size = graph_cfg['catch_up_batch_size']
+    graph_catch_up_overlap = graph_cfg['catch_up_overlap']
+    graph_catch_up_interval = graph_cfg['catch_up_interval']
+
+    trend_timeframes = trend_cfg['timeframes']
+    trend_source = trend_cfg['source']
+    trend_batch_workers = trend_cfg['batch_workers']
+    trend_batch_chunk_size = trend_cfg['batch_chunk_size']
+
+    prices_directory = prices_cfg['directory']
+    prices_memo_size = prices_cfg['memo_size']
+    prices_fixed = prices_cfg['fixed']
+
+    wallet_age_use_llm = wallet_age_cfg['use_llm']
+    wallet_age_max_in_flight = wallet_age_cfg['max_in_flight']
+
+    llm_cache_enabled = llm_cache_cfg['enabled']
+    llm_cache_path = llm_cache_cfg['path']
+    llm_cache_max_entries = llm_cache_cfg['max_entries']
+    llm_cache_ttl_seconds = llm_cache_cfg['ttl_seconds']
+
+    pipeline_freshness_ttl = pipeline_cfg['freshness_ttl']
+    pipeline_analysis_workers = pipeline_cfg['analysis_workers']
+
+    service_host = service_cfg['host']
+    service_port = service_cfg['port']
+    service_cache_ttl = service_cfg['cache_ttl']
+    service_cache_max_entries = service_cfg['cache_max_entries']
+    service_max_workers = service_cfg['max_workers']
+    service_max_pending = service_cfg['max_pending']
+
+    reports_directory = reports_cfg['directory']
+    reports_formats = reports_cfg['formats']
+    reports_batch_size = reports_cfg['batch_size']
+    reports_flush_interval = reports_cfg['flush_interval']
+    reports_render_text = reports_cfg['render_text']
+
+    metrics_verbose_logging = metrics_cfg['verbose_logging']
+    metrics_max_spans = metrics_cfg['max_spans']
+    metrics_prometheus_path = metrics_cfg['prometheus_path']
+    metrics_trace_path = metrics_cfg['trace_path']
     
     data_path = common_cfg['data_path']
     wallet_age_report_path = common_cfg['wallet_age_report_path']
@@ -43,10 +131,15 @@ class CryptoConfig:
 
     
 
+@lru_cache(maxsize=None)
+def load_database_config():
+    logging.info('Init Crypto Database configuration parameters')
+    return read_yaml_file(DATABASE_CFG_FILE_PATH)
+
+
 class DatabaseConfig:
     def __init__(self):
-        self.config = read_yaml_file(DATABASE_CFG_FILE_PATH)
-        logging.info('Init Crypto Database configuration parameters')
+        self.config = load_database_config()
 
     def init_database(self):
         return self.config['crypto_database']
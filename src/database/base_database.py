@@ -1,5 +1,6 @@
 import pymongo
 import os
+import threading
 
 import pymongo.errors
 
@@ -8,23 +9,46 @@ from src.config.app_config import Config as cfg
 
 
 class BaseDatabase(object):
+    _clients = {}
+    _clients_lock = threading.Lock()
+
     def __init__(self, config):
         self.host_name = config['hostname']
         self.port = config['port']
+        self.max_pool_size = config['max_pool_size']
         self.user = cfg.DATABASE_USER
         self.password = cfg.DATABASE_PASSWORD
-        if (self.user == None or self.password == None) or (self.user == '' or self.password == ''):
-            self.url = f"mongodb://{self.host_name}:{self.port}"
-        else:
-            self.url = f"mongodb://{self.user}:{self.password}@{self.host_name}:{self.port}"
+        self.url = self.build_url(self.host_name, self.port)
 
         self.initialize()
     
 
+    @staticmethod
+    def build_url(host_name, port):
+        user = cfg.DATABASE_USER
+        password = cfg.DATABASE_PASSWORD
+        if (user == None or password == None) or (user == '' or password == ''):
+            return f"mongodb://{host_name}:{port}"
+        return f"mongodb://{user}:{password}@{host_name}:{port}"
+
+
+    @classmethod
+    def register_client(cls, url, client):
+        with cls._clients_lock:
+            cls._clients[url] = client
+
+
     def initialize(self):
-        try:
-            self.client = pymongo.MongoClient(self.url)
-            logging.info("Connected to database")
-        except pymongo.errors.ServerSelectionTimeoutError as e:
-            logging.error(f"Error connecting to database: {e}")
-            raise e
\ No newline at end of file
+        with BaseDatabase._clients_lock:
+            client = BaseDatabase._clients.get(self.url)
+            if client is not None:
+                self.client = client
+                return
+
+            try:
+                self.client = pymongo.MongoClient(self.url, maxPoolSize=self.max_pool_size)
+                BaseDatabase._clients[self.url] = self.client
+                logging.info("Connected to database")
+            except pymongo.errors.ServerSelectionTimeoutError as e:
+                logging.error(f"Error connecting to database: {e}")
+                raise e
@@ -0,0 +1,112 @@
+import time
+import threading
+
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+def applied_operations(keys, details):
+    """Keys of the operations an unordered bulk write applied despite a BulkWriteError, and a result
+    for them whose upserted_ids index into those keys."""
+    failed = {error['index'] for error in details.get('writeErrors', [])}
+    positions = {}
+    applied_keys = []
+    for index, key in enumerate(keys):
+        if index not in failed:
+            positions[index] = len(applied_keys)
+            applied_keys.append(key)
+    upserted = [dict(upsert, index=positions[upsert['index']])
+                for upsert in details.get('upserted', []) if upsert['index'] in positions]
+    return applied_keys, BulkWriteResult(dict(details, upserted=upserted), True)
+
+
+class BulkUpsertWriter:
+    """Buffers write operations and sends them as unordered bulk writes.
+
+    After each write, `on_flush(keys, result)` gets the keys of the operations that were applied, in order,
+    and a result whose upserted_ids index into them. When some operations fail, only the rest are reported,
+    and `on_error(keys)` first gets the keys of the failed ones; a write that fails outright reports them all.
+    """
+
+    def __init__(self, collection, batch_size, flush_interval, on_flush=None, flush_first=None, on_error=None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.flush_first = flush_first
+        self.on_error = on_error
+
+        self.operations = []
+        self.keys = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        # Flushes run one at a time, so a flush_first writer's batch has landed before this one is sent,
+        # even when several threads flush at once.
+        self.flush_lock = threading.Lock()
+
+        self.batches = 0
+        self.written = 0
+
+
+    def add(self, operation, key=None):
+        with self.lock:
+            self.operations.append(operation)
+            self.keys.append(key)
+            due = (len(self.operations) >= self.batch_size
+                   or time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+
+    def flush(self):
+        with self.flush_lock:
+            return self._flush()
+
+
+    def _flush(self):
+        if self.flush_first is not None:
+            self.flush_first.flush()
+
+        with self.lock:
+            operations, keys = self.operations, self.keys
+            self.operations, self.keys = [], []
+            self.last_flush = time.monotonic()
+
+        if not operations:
+            return None
+
+        try:
+            with metrics.timer("mongo_bulk_write", collection=self.collection.name):
+                result = self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            details = e.details
+            metrics.inc("mongo_bulk_write_errors_total", len(details.get('writeErrors', [])),
+                        collection=self.collection.name)
+            logging.error(f"Bulk write to {self.collection.name} failed for "
+                          f"{len(details.get('writeErrors', []))} of {len(operations)} operations: "
+                          f"{details.get('writeErrors', [])[:3]}")
+            if self.on_error:
+                self.on_error([keys[error['index']] for error in details.get('writeErrors', [])])
+            # The write is unordered, so every other operation was applied and its callbacks must still run.
+            keys, result = applied_operations(keys, details)
+        except Exception:
+            if self.on_error:
+                self.on_error(keys)
+            raise
+
+        written = result.upserted_count + result.modified_count
+        self.batches += 1
+        self.written += written
+        metrics.inc("mongo_documents_written_total", written, collection=self.collection.name)
+        metrics.observe("mongo_bulk_batch_size", len(operations), buckets=(1, 10, 50, 100, 500, 1000, 5000),
+                        collection=self.collection.name)
+        logging.info(f"Bulk write batch {self.batches} to {self.collection.name}: "
+                     f"{len(operations)} operations, {written} documents written "
+                     f"({result.upserted_count} upserted, {result.modified_count} modified)")
+
+        if self.on_flush:
+            self.on_flush(keys, result)
+        return result
@@ -1,15 +1,87 @@
+import pymongo
+import pymongo.errors
+
 from src.database.base_database import BaseDatabase
+from src.database.bulk_writer import BulkUpsertWriter
 from src.config.app_config import DatabaseConfig
+from src.utils.logger import logging
 
 class CryptoDatabase(BaseDatabase):
+    _indexed_urls = set()
+
     def __init__(self):
         self.config = DatabaseConfig().init_database()
         super(CryptoDatabase, self).__init__(self.config)
 
         database_name = self.config['database_name']
         collection_name = self.config['collection_name']
+        transaction_collection_name = self.config['transaction_collection_name']
+        trend_collection_name = self.config['trend_collection_name']
+        job_collection_name = self.config['job_collection_name']
+        rollup_collection_name = self.config['rollup_collection_name']
         self.database = self.client[database_name]
         self.base_collection = self.database[collection_name]
+        self.transaction_collection = self.database[transaction_collection_name]
+        self.trend_collection = self.database[trend_collection_name]
+        self.job_collection = self.database[job_collection_name]
+        self.rollup_collection = self.database[rollup_collection_name]
+        self.bulk_batch_size = self.config['bulk_batch_size']
+        self.bulk_flush_interval = self.config['bulk_flush_interval']
+
+        if self.url not in CryptoDatabase._indexed_urls:
+            self.create_indexes()
+            CryptoDatabase._indexed_urls.add(self.url)
+
+    def create_indexes(self):
+        try:
+            self.base_collection.create_index("wallet_address", unique=True)
+        except pymongo.errors.OperationFailure as e:
+            logging.error(f"Error creating wallet_address index: {e}")
+
+        # A transfer between two tracked wallets is stored once per wallet,
+        # so tx_hash is only unique together with the owning wallet.
+        try:
+            self.transaction_collection.create_index([("wallet_address", pymongo.ASCENDING),
+                                                      ("timestamp", pymongo.ASCENDING)])
+            self.transaction_collection.create_index([("tx_hash", pymongo.ASCENDING),
+                                                      ("wallet_address", pymongo.ASCENDING)], unique=True)
+        except pymongo.errors.OperationFailure as e:
+            logging.error(f"Error creating transaction indexes: {e}")
+
+        try:
+            self.rollup_collection.create_index([("wallet_address", pymongo.ASCENDING),
+                                                 ("day", pymongo.ASCENDING),
+                                                 ("token", pymongo.ASCENDING)], unique=True)
+        except pymongo.errors.OperationFailure as e:
+            logging.error(f"Error creating rollup index: {e}")
+
+        try:
+            self.job_collection.create_index([("status", pymongo.ASCENDING),
+                                              ("enqueued_at", pymongo.ASCENDING)])
+            self.job_collection.create_index([("status", pymongo.ASCENDING),
+                                              ("lease_expires_at", pymongo.ASCENDING)])
+        except pymongo.errors.OperationFailure as e:
+            logging.error(f"Error creating job queue indexes: {e}")
 
     def get_collection(self):
         return self.base_collection
+
+    def get_transaction_collection(self):
+        return self.transaction_collection
+
+    def get_trend_collection(self):
+        return self.trend_collection
+
+    def get_job_collection(self):
+        return self.job_collection
+
+    def get_rollup_collection(self):
+        return self.rollup_collection
+
+    def get_bulk_writer(self, collection=None, on_flush=None, flush_first=None, on_error=None):
+        return BulkUpsertWriter(collection if collection is not None else self.base_collection,
+                                batch_size=self.bulk_batch_size,
+                                flush_interval=self.bulk_flush_interval,
+                                on_flush=on_flush,
+                                flush_first=flush_first,
+                                on_error=on_error)
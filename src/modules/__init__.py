@@ -1,5 +1,19 @@
-from src.modules.agent.agent_protocol import AgentProtocol
-from src.modules.agent.trend_agent import HistoricalTrendAnalysisAgent
-from src.modules.agent.wallet_age_agent import WalletAgeAgent
-from src.modules.ingestion.data_ingestion import DataIngestionAgent
+import importlib
 
+_LAZY_ATTRIBUTES = {
+    "AgentProtocol": "src.modules.agent.agent_protocol",
+    "HistoricalTrendAnalysisAgent": "src.modules.agent.trend_agent",
+    "WalletAgeAgent": "src.modules.agent.wallet_age_agent",
+    "DataIngestionAgent": "src.modules.ingestion.data_ingestion",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+    return value
@@ -1,9 +1,28 @@
+import os
+import json
+import math
+from itertools import groupby
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from pymongo import UpdateOne
 
 from src.utils.logger import logging
 from src.config.app_config import CryptoConfig as cc
 from src.database.db.wallet_db import CryptoDatabase
-from src.utils.common import save_trend_analysis_to_file
+from src.utils.report_sink import get_report_sink, trend_record, render_text_report
+from src.utils.metrics import metrics, export_metrics, log_hot_path
+from src.modules.analysis.trend_engine import TrendEngine
+from src.modules.analysis.price_index import get_price_index
+from src.modules.analysis.transaction_columns import (TransactionColumns,
+                                                      TRANSACTION_PROJECTION,
+                                                      load_transaction_columns)
+from src.modules.ingestion.job_queue import iter_wallet_addresses
+from src.modules.analysis.daily_rollup import (RollupTrendEngine,
+                                               ROLLUP_PROJECTION,
+                                               SECONDS_PER_DAY,
+                                               boundary_day_ranges)
 
 
 class HistoricalTrendAnalysisAgent:
@@ -11,34 +30,112 @@ class HistoricalTrendAnalysisAgent:
         self.trend_analysis_report_path = cc.trend_analysis_report_path
         self.cryto_db = CryptoDatabase()
         self.collection = self.cryto_db.get_collection()
+        self.transaction_collection = self.cryto_db.get_transaction_collection()
+        self.rollup_collection = self.cryto_db.get_rollup_collection()
+        self.source = cc.trend_source
         self.current_time = datetime.now()
+        self.timeframes = cc.trend_timeframes
+        self.trend_collection = self.cryto_db.get_trend_collection()
+        self.wallet_file = cc.data_path
+        self.batch_workers = cc.trend_batch_workers or os.cpu_count()
+        self.batch_chunk_size = cc.trend_batch_chunk_size
+        self.price_index = get_price_index()
+        self.render_text = cc.reports_render_text
+        self.report_sink = get_report_sink()
         logging.info('Initialize Historical Trend Analysis')
 
     
-    def get_features(self, wallet_address):
-        wallet_data = self.collection.find_one({"wallet_address": wallet_address})
-        transaction_history = wallet_data.get("transaction_history", [])
-        token_balances = wallet_data.get("token_balances", [])
-        return transaction_history, token_balances
+    def get_token_balances(self, wallet_address):
+        wallet_data = self.collection.find_one({"wallet_address": wallet_address},
+                                               {"_id": 0, "token_balances": 1})
+        # A wallet whose scrape failed or was never stored has no document, and so no balances.
+        return (wallet_data or {}).get("token_balances", [])
 
 
-    def _filter_transactions_by_timeframe(self, days, transaction_history):
-        logging.info("Filter transactions within the specified timeframe.")
-        
-        timeframe_start = self.current_time - timedelta(days=days)
-        return [
-            tx for tx in transaction_history
-            if datetime.fromtimestamp(tx["timestamp"]) >= timeframe_start
+    def get_features(self, wallet_address, timeframes=None, transactions=None, now=None):
+        token_balances = self.get_token_balances(wallet_address)
+
+        # Columns over the full history already hold everything before the window, so no offsets are needed.
+        if transactions is not None:
+            return transactions, token_balances, {}
+
+        window_start = ((now or self.current_time) - timedelta(days=max(timeframes or self.timeframes))).timestamp()
+        transactions = load_transaction_columns(self.transaction_collection, wallet_address, since=window_start)
+        return transactions, token_balances, self.get_balance_offsets(wallet_address, window_start)
+
+
+    def get_rollup_features(self, wallet_address, timeframes=None, now=None):
+        """Engine over daily rollup rows plus the raw transactions of each window's first day.
+
+        Returns None when the wallet has no rollup rows, so callers can fall back to raw transactions.
+        """
+        starts = TrendEngine.window_starts(timeframes or self.timeframes, now or self.current_time)
+        first_day = int(starts.min() // SECONDS_PER_DAY)
+
+        rows = list(self.rollup_collection.find({"wallet_address": wallet_address, "day": {"$gte": first_day}},
+                                                ROLLUP_PROJECTION).sort("day", 1))
+        balance_offsets = {}
+        for row in self.rollup_collection.aggregate([
+            {"$match": {"wallet_address": wallet_address, "day": {"$lt": first_day}}},
+            {"$group": {"_id": "$token", "net_amount": {"$sum": "$net_amount"}}}
+        ]):
+            balance_offsets[row["_id"]] = row["net_amount"]
+        if not rows and not balance_offsets:
+            return None
+
+        boundary = TransactionColumns.from_cursor(self.transaction_collection.find(
+            {"wallet_address": wallet_address, "$or": boundary_day_ranges(starts)},
+            TRANSACTION_PROJECTION
+        ).sort("timestamp", 1))
+        engine = RollupTrendEngine(rows, TrendEngine(boundary))
+        return engine, self.get_token_balances(wallet_address), balance_offsets
+
+
+    def get_balance_offsets(self, wallet_address, before):
+        offsets = self.get_batch_balance_offsets([wallet_address], before)
+        return offsets.get(wallet_address, {})
+
+
+    def get_batch_balance_offsets(self, wallet_addresses, before):
+        pipeline = [
+            {"$match": {"wallet_address": {"$in": wallet_addresses}, "timestamp": {"$lt": before}}},
+            {"$group": {
+                "_id": {"wallet_address": "$wallet_address", "token": "$token"},
+                "net_amount": {"$sum": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$type", "send"]}, "then": {"$multiply": ["$amount", -1]}},
+                        {"case": {"$eq": ["$type", "receive"]}, "then": "$amount"},
+                    ],
+                    "default": 0
+                }}}
+            }}
         ]
+        offsets = {}
+        for row in self.transaction_collection.aggregate(pipeline):
+            offsets.setdefault(row["_id"]["wallet_address"], {})[row["_id"]["token"]] = row["net_amount"]
+        return offsets
+
 
-    def _calculate_portfolio_value_change(self, initial_balances, current_balances):
-        logging.info("Calculate the overall portfolio value change.")
-        initial_value = sum(initial_balances.values())
-        current_value = sum(current_balances.values())
+    @staticmethod
+    def _calculate_portfolio_value_change(initial_balances, current_balances, initial_prices=None, current_prices=None):
+        log_hot_path("Calculate the overall portfolio value change.")
+        if initial_prices is None or current_prices is None:
+            initial_value = sum(initial_balances.values())
+            current_value = sum(current_balances.values())
+            return current_value - initial_value
+
+        # Both sides are valued over the same tokens, those priced at both ends; a token that only has a price
+        # at one end would otherwise count its whole value as a gain or a loss.
+        priced = [token for token in initial_balances.keys() | current_balances.keys()
+                  if not math.isnan(initial_prices.get(token, math.nan))
+                  and not math.isnan(current_prices.get(token, math.nan))]
+        initial_value = sum(initial_balances.get(token, 0) * initial_prices[token] for token in priced)
+        current_value = sum(current_balances.get(token, 0) * current_prices[token] for token in priced)
         return current_value - initial_value
 
-    def _identify_notable_asset_changes(self, initial_balances, current_balances):
-        logging.info("Identify notable asset acquisitions or sales.")
+    @staticmethod
+    def _identify_notable_asset_changes(initial_balances, current_balances):
+        log_hot_path("Identify notable asset acquisitions or sales.")
         
         notable_changes = {}
         for token, initial_balance in initial_balances.items():
@@ -48,21 +145,9 @@ class HistoricalTrendAnalysisAgent:
                 notable_changes[token] = change
         return notable_changes
 
-    def _get_initial_balances(self, days, token_balances, transaction_history):
-        logging.info("Get initial balances at the start of the timeframe.")
-        
-        timeframe_start = self.current_time - timedelta(days=days)
-        initial_balances = {token["symbol"]: token["balance"] for token in token_balances}
-        for tx in transaction_history:
-            if datetime.fromtimestamp(tx["timestamp"]) < timeframe_start:
-                if tx["type"] == "send":
-                    initial_balances[tx["token"]] -= tx["amount"]
-                elif tx["type"] == "receive":
-                    initial_balances[tx["token"]] += tx["amount"]
-        return initial_balances
-
-    def _categorize_overall_change(self, change):
-        logging.info("Categorize the overall change as increase, decrease, or stable.")
+    @staticmethod
+    def _categorize_overall_change(change):
+        log_hot_path("Categorize the overall change as increase, decrease, or stable.")
         
         if change > 0:
             return "increase"
@@ -72,50 +157,78 @@ class HistoricalTrendAnalysisAgent:
             return "stable"
 
 
-    def _analyze_transaction_patterns(self, transactions):
-        logging.info("Analyze transaction patterns (e.g., sends vs. receives).")
-        send_count = sum(1 for tx in transactions if tx["type"] == "send")
-        receive_count = sum(1 for tx in transactions if tx["type"] == "receive")
-        return {
-            "send_count": send_count,
-            "receive_count": receive_count,
-            "net_activity": receive_count - send_count
-        }
+    def analyze_trends(self, wallet_address, timeframes=None, transactions=None, now=None):
+        """`now` is the end of every window; it defaults to current_time, the reference of a batch run."""
+        timeframes = timeframes or self.timeframes
+        now = now or self.current_time
+        log_hot_path(f"Analyze trends over {', '.join(f'{days}-day' for days in timeframes)} timeframes.")
+        
+        with metrics.timer("trend_fetch", wallet_address=wallet_address):
+            features = None
+            if transactions is None and self.source == "rollups":
+                features = self.get_rollup_features(wallet_address, timeframes, now)
+            if features is None:
+                transactions, token_balances, balance_offsets = self.get_features(wallet_address=wallet_address,
+                                                                                  timeframes=timeframes,
+                                                                                  transactions=transactions,
+                                                                                  now=now)
+                features = TrendEngine(transactions), token_balances, balance_offsets
 
+        with metrics.timer("trend_compute", wallet_address=wallet_address):
+            return self.trends_from_engine(*features, timeframes, now, self.price_index)
 
-    def analyze_trends(self, wallet_address):
-        logging.info("Analyze trends over 30-day, 90-day, and 180-day timeframes.")
-        
-        transaction_history, token_balances = self.get_features(wallet_address=wallet_address)
 
-        timeframes = [30, 90, 180]
-        results = {}
+    @staticmethod
+    def compute_trends(transactions, token_balances, balance_offsets, timeframes, current_time,
+                       price_index=None):
+        return HistoricalTrendAnalysisAgent.trends_from_engine(TrendEngine(transactions), token_balances,
+                                                               balance_offsets, timeframes, current_time,
+                                                               price_index)
 
-        for days in timeframes:
-            transactions = self._filter_transactions_by_timeframe(days, transaction_history)
 
-            initial_balances = self._get_initial_balances(days, token_balances, transaction_history)
-            current_balances = {token["symbol"]: token["balance"] for token in token_balances}
+    @staticmethod
+    def trends_from_engine(engine, token_balances, balance_offsets, timeframes, current_time, price_index=None):
+        starts = engine.window_starts(timeframes, current_time)
+        current_balances = {token["symbol"]: token["balance"] for token in token_balances}
+        window_initial_balances = engine.initial_balances(starts, current_balances, balance_offsets)
+        window_transaction_patterns = engine.transaction_patterns(starts)
 
-            portfolio_value_change = self._calculate_portfolio_value_change(initial_balances, current_balances)
+        # One batched lookup prices every token at every window boundary plus now.
+        window_prices = [None] * (len(timeframes) + 1)
+        symbols = list(current_balances)
+        if price_index is not None and len(price_index) and symbols:
+            price_grid = price_index.price_grid(symbols, list(starts) + [current_time.timestamp()])
+            if not np.isnan(price_grid[-1]).all():
+                window_prices = [dict(zip(symbols, row)) for row in price_grid]
+        current_prices = window_prices[-1]
+
+        results = {}
 
-            notable_asset_changes = self._identify_notable_asset_changes(initial_balances, current_balances)
+        for days, initial_balances, transaction_patterns, initial_prices in zip(timeframes,
+                                                                                window_initial_balances,
+                                                                                window_transaction_patterns,
+                                                                                window_prices):
+            portfolio_value_change = HistoricalTrendAnalysisAgent._calculate_portfolio_value_change(initial_balances, current_balances,
+                                                                                                    initial_prices, current_prices)
 
-            transaction_patterns = self._analyze_transaction_patterns(transactions)
+            notable_asset_changes = HistoricalTrendAnalysisAgent._identify_notable_asset_changes(initial_balances, current_balances)
 
-            overall_change = self._categorize_overall_change(portfolio_value_change)
+            overall_change = HistoricalTrendAnalysisAgent._categorize_overall_change(portfolio_value_change)
 
             results[f"{days}_day_trend"] = {
                 "overall_change": overall_change,
                 "notable_changes": notable_asset_changes,
                 "transaction_patterns": transaction_patterns
             }
+            if current_prices is not None:
+                results[f"{days}_day_trend"]["value_change_usd"] = round(portfolio_value_change, 2)
 
         return results
 
 
-    def interpret_strategy(self, results):
-        logging.info("Interpret the holder's strategy based on trends.")
+    @staticmethod
+    def interpret_strategy(results):
+        log_hot_path("Interpret the holder's strategy based on trends.")
 
         strategy_insights = []
         for timeframe, data in results.items():
@@ -126,6 +239,9 @@ class HistoricalTrendAnalysisAgent:
             else:
                 strategy_insights.append(f"The portfolio value has remained stable over the {timeframe.replace('_', '-')} period, suggesting a holding strategy.")
 
+            if data.get("value_change_usd") is not None:
+                strategy_insights.append(f"Portfolio value changed by {data['value_change_usd']:+,.2f} USD.")
+
             if data["notable_changes"]:
                 strategy_insights.append(f"Notable changes include: {data['notable_changes']}")
 
@@ -139,11 +255,120 @@ class HistoricalTrendAnalysisAgent:
         return " ".join(strategy_insights)
     
 
-    def get_response(self, wallet_address):
+    def get_response(self, wallet_address, transactions=None, now=None):
         logging.info('Get result ...')
         
-        trend_results = self.analyze_trends(wallet_address)
+        # The agent is shared between request threads, so the reference time is passed down, never stored.
+        now = now or datetime.now()
+        trend_results = self.analyze_trends(wallet_address, transactions=transactions, now=now)
         conclusion = self.interpret_strategy(trend_results)
-        save_trend_analysis_to_file(trend_results=trend_results,
-                                    conclusion=conclusion,
-                                    filename=self.trend_analysis_report_path)
\ No newline at end of file
+
+        record = trend_record(wallet_address, trend_results, conclusion, now)
+        self.report_sink.add(record)
+        if self.render_text:
+            render_text_report(record, self.trend_analysis_report_path)
+        return {"trends": trend_results, "conclusion": conclusion}
+
+
+    def iter_wallet_chunks(self, wallet_file):
+        # Addresses are stored lower-cased, so they are normalized as ingestion does or no document would match.
+        chunk = []
+        for wallet_address in iter_wallet_addresses(wallet_file):
+            if wallet_address:
+                chunk.append(wallet_address)
+            if len(chunk) >= self.batch_chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+    def load_chunk(self, wallet_addresses, window_start):
+        payloads = {}
+        wallets = self.collection.find({"wallet_address": {"$in": wallet_addresses}},
+                                       {"_id": 0, "wallet_address": 1, "token_balances": 1})
+        for wallet in wallets:
+            payloads[wallet["wallet_address"]] = {"token_balances": wallet.get("token_balances", []),
+                                                  "transactions": TransactionColumns.from_cursor([]),
+                                                  "balance_offsets": {}}
+
+        # Columns pickle to the worker processes far smaller than the equivalent list of dicts.
+        transactions = self.transaction_collection.find(
+            {"wallet_address": {"$in": list(payloads)}, "timestamp": {"$gte": window_start}},
+            dict(TRANSACTION_PROJECTION, wallet_address=1)
+        ).sort([("wallet_address", 1), ("timestamp", 1)])
+        for wallet_address, wallet_transactions in groupby(transactions, key=lambda tx: tx["wallet_address"]):
+            payloads[wallet_address]["transactions"] = TransactionColumns.from_cursor(wallet_transactions)
+
+        for wallet_address, offsets in self.get_batch_balance_offsets(list(payloads), window_start).items():
+            payloads[wallet_address]["balance_offsets"] = offsets
+
+        return payloads
+
+
+    def write_batch_result(self, writer, output_file, wallet_address, trend_results, conclusion):
+        self.report_sink.add(trend_record(wallet_address, trend_results, conclusion, self.current_time))
+        record = {"wallet_address": wallet_address,
+                  "trends": trend_results,
+                  "conclusion": conclusion,
+                  "analyzed_at": self.current_time.isoformat()}
+        if output_file is not None:
+            output_file.write(json.dumps(record) + "\n")
+        else:
+            writer.add(UpdateOne({"wallet_address": wallet_address}, {"$set": record}, upsert=True),
+                       key=wallet_address)
+
+
+    def run_batch(self, wallet_file=None, output_path=None, timeframes=None):
+        wallet_file = wallet_file or self.wallet_file
+        timeframes = timeframes or self.timeframes
+        window_start = (self.current_time - timedelta(days=max(timeframes))).timestamp()
+
+        writer = self.cryto_db.get_bulk_writer(self.trend_collection)
+        output_file = open(output_path, 'w') if output_path else None
+        processed = 0
+
+        logging.info(f'Start batch trend analysis with {self.batch_workers} workers')
+        try:
+            with ProcessPoolExecutor(max_workers=self.batch_workers) as executor:
+                pending = set()
+                for wallet_addresses in self.iter_wallet_chunks(wallet_file):
+                    with metrics.timer("trend_batch_load", chunk_size=len(wallet_addresses)):
+                        payloads = self.load_chunk(wallet_addresses, window_start)
+                    pending.add(executor.submit(_analyze_wallet_chunk, payloads, timeframes, self.current_time))
+
+                    if len(pending) >= 2 * self.batch_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            for wallet_address, trend_results, conclusion in future.result():
+                                self.write_batch_result(writer, output_file, wallet_address, trend_results, conclusion)
+                                processed += 1
+
+                for future in pending:
+                    for wallet_address, trend_results, conclusion in future.result():
+                        self.write_batch_result(writer, output_file, wallet_address, trend_results, conclusion)
+                        processed += 1
+        finally:
+            writer.flush()
+            self.report_sink.flush()
+            if output_file is not None:
+                output_file.close()
+
+        metrics.inc("trend_batch_wallets_total", processed)
+        export_metrics()
+        logging.info(f'Batch trend analysis completed for {processed} wallets')
+        return processed
+
+
+def _analyze_wallet_chunk(payloads, timeframes, current_time):
+    price_index = get_price_index()
+    results = []
+    for wallet_address, payload in payloads.items():
+        trend_results = HistoricalTrendAnalysisAgent.compute_trends(payload["transactions"],
+                                                                    payload["token_balances"],
+                                                                    payload["balance_offsets"],
+                                                                    timeframes,
+                                                                    current_time,
+                                                                    price_index)
+        results.append((wallet_address, trend_results, HistoricalTrendAnalysisAgent.interpret_strategy(trend_results)))
+    return results
@@ -1,8 +1,17 @@
 import json
-
-from src.utils.response import get_client, get_chat_response
-from src.utils.common import write_json_to_text
+import time
+import asyncio
+from datetime import datetime
+
+from src.utils.response import (get_client,
+                                get_chat_response,
+                                get_async_client,
+                                get_chat_response_async)
+from src.utils.common import summarize_latencies
+from src.utils.report_sink import get_report_sink, wallet_age_record, render_text_report
+from src.utils.metrics import metrics
 from src.database.db.wallet_db import CryptoDatabase
+from src.modules.analysis.wallet_age import compute_wallet_age
 from src.utils.logger import logging
 from src.config.app_config import (CryptoConfig as cc,
                                    Config as cfg)
@@ -12,6 +21,7 @@ class WalletAgeAgent:
     def __init__(self):
         self.cryto_db = CryptoDatabase()
         self.collection = self.cryto_db.get_collection()
+        self.transaction_collection = self.cryto_db.get_transaction_collection()
         
         self.client = get_client(
             api_key=cfg.RUNPOD_TOKEN,
@@ -20,74 +30,152 @@ class WalletAgeAgent:
 
         self.model_name = cc.chatbot_model_name
         self.wallet_age_report_path = cc.wallet_age_report_path
-
-        self.output_format = """
-        {
-        "First Transaction": "YYYY-MM-DD". The date you calculated in step 1. Only the date in (YYYY-MM-DD) format,
-        "Wallet Age": "X years, Y months, Z days". X,Y and Z are the number you calculated in step 2 ,
-        "Category": "Veteran" or "Established" or "Intermediate" or "Newcomer". Pick one of those and only write the word. ,
-        "Analysis": Leave the analysis in step 4 here. Write the analysis in a clear and concise manner.
-        }
-        """
+        self.use_llm = cc.wallet_age_use_llm
+        self.max_in_flight = cc.wallet_age_max_in_flight
+        self.render_text = cc.reports_render_text
+        self.report_sink = get_report_sink()
 
         logging.info('Init Wallet Age Agent')
     
 
     def get_wallet_address(self, wallet_address):
-        document = self.collection.find_one({"wallet_address": wallet_address})
+        document = self.collection.find_one({"wallet_address": wallet_address},
+                                            {"_id": 0, "wallet_address": 1, "wallet_ages": 1,
+                                             "tokens_held": 1, "token_balances": 1, "wallet_ages_observed_at": 1})
         return document
 
 
-    def get_response(self, wallet_address):        
-        document = self.get_wallet_address(wallet_address)
+    def get_first_transaction_timestamp(self, wallet_address):
+        transaction = self.transaction_collection.find_one({"wallet_address": wallet_address},
+                                                           {"_id": 0, "timestamp": 1},
+                                                           sort=[("timestamp", 1)])
+        return transaction["timestamp"] if transaction else None
+
+
+    def build_summary(self, document, wallet_age):
+        return {
+            "wallet_address": document.get("wallet_address"),
+            "first_transaction": wallet_age["First Transaction"],
+            "wallet_age": wallet_age["Wallet Age"],
+            "category": wallet_age["Category"],
+            "latest_activity": (document.get("wallet_ages") or {}).get("latest"),
+            "tokens_held": [token.get("symbol") for token in document.get("token_balances", [])][:20],
+        }
 
-        document = str(document)
 
+    def build_messages(self, summary):
         system_prompt = f"""
-            You are a helpful AI assistant for extracting information in cryto wallet. The format of the wallet is in JSON format.
-            Your task is to wallet age analysis for a given wallet address. These are the information you need to extract:
-            1. Extract the first transaction date in (YYYY-MM-DD format). In the data, you will find the "wallet_ages" keys which contains the "first" key. From the value of the "first" key, extract how many days ago then do the convert back to (YYYY-MM-DD format) by subtracting the given number of days from today's date. \\
-               Today is: 2025-02-17 \\
-               Example: "first": "5 days ago" -> "2025-02-01"
-            
-            2. Calculate the wallet age into X years, Y months, Z days formats \\
-               Instructions:
-               - Assume 1 year = 365 days and 1 month = 30 days (for simplicity).
-               
-               Calculate:
-               - The number of full years by dividing the total days by 365.
-               - The remaining days after extracting full years.
-               - The number of full months by dividing the remaining days by 30.
-               - The number of full years by dividing the total days by 365.
-               
-               Provide the result in the format: "X years, Y months, Z days"
-               Example: "1 year, 0 months, 9 days" for 374 days.
-               If the number of years, months, or days is zero, still display it explicitly (e.g., "0 years, 3 months, 15 days"). Ensure that the output is structured and easy to understand.
-
-            3. From the "X years, Y months, Z days", you calculated in the previous step, categorize the wallet as:
-                - "Veteran" (5+ years)
-                - "Established" (2-5 years)
-                - "Intermediate" (1-2 years)
-                - "Newcomer" (less than 1 year)
-            
-            4. Provide a brief interpretation of what the wallet's age suggests about the holder's experience.
-
-
-            Your output must be in structured json format like this below. All of the value of each key is the answer of each task given you when doing extract the wallet. Each key is a string and each value is a string. Make sure to follow the format strictly:
-            {self.output_format}
-
-            Here is the provided wallet:
-            {document}
+            You are a helpful AI assistant for crypto wallet analysis.
+            The wallet age below has already been calculated. Provide a brief interpretation, in two or three sentences, of what the wallet's age suggests about the holder's experience.
+            Answer with the interpretation text only.
+
+            Wallet summary:
+            {json.dumps(summary)}
             """
-        
-        input_messages = [{'role': "system", "content": system_prompt}] + [{'role': "user", "content": "Analyze the wallet age for the given wallet address."}]
 
-        output = get_chat_response(self.client, self.model_name, input_messages)
+        return [{'role': "system", "content": system_prompt}] + [{'role': "user", "content": "Analyze the wallet age for the given wallet address."}]
+
+
+    def describe_wallet_age(self, summary):
+        return (f"The wallet has been active for {summary['wallet_age']} since {summary['first_transaction']}, "
+                f"which places it in the {summary['category']} category.")
+
+
+    def get_analysis(self, summary):
+        if not self.use_llm:
+            return self.describe_wallet_age(summary)
+
+        return get_chat_response(self.client, self.model_name, self.build_messages(summary)).strip()
+
+
+    async def get_analysis_async(self, summary, client):
+        if not self.use_llm:
+            return self.describe_wallet_age(summary)
+
+        response = await get_chat_response_async(client, self.model_name, self.build_messages(summary))
+        return response.strip()
 
-        output = json.loads(output)
 
-        write_json_to_text(data=output, output_text_file=self.wallet_age_report_path)
+    def get_wallet_age(self, wallet_address, transactions=None):
+        document = self.get_wallet_address(wallet_address) or {"wallet_address": wallet_address}
+        if transactions is not None:
+            first_timestamp = transactions.first_timestamp()
+        else:
+            first_timestamp = self.get_first_transaction_timestamp(wallet_address)
+
+        observed_at = document.get("wallet_ages_observed_at")
+        reference_time = datetime.fromtimestamp(observed_at) if observed_at else datetime.now()
+        wallet_age = compute_wallet_age(wallet_ages=document.get("wallet_ages"),
+                                        first_timestamp=first_timestamp,
+                                        reference_time=reference_time,
+                                        today=datetime.now().date())
+        return document, wallet_age
+
+
+    def get_response(self, wallet_address, transactions=None):
+        with metrics.timer("wallet_age_lookup", wallet_address=wallet_address):
+            document, wallet_age = self.get_wallet_age(wallet_address, transactions)
+
+        if wallet_age is None:
+            logging.info(f'No wallet age information stored for {wallet_address}')
+            output = {}
+        else:
+            output = dict(wallet_age)
+            output["Analysis"] = self.get_analysis(self.build_summary(document, wallet_age))
+
+        record = wallet_age_record(wallet_address, output, datetime.now())
+        self.report_sink.add(record)
+        if self.render_text:
+            render_text_report(record, self.wallet_age_report_path)
 
         logging.info('Finish wallet age analysis process ...')
 
-        return output
\ No newline at end of file
+        return output
+
+
+    async def get_response_async(self, wallet_address, client):
+        document, wallet_age = await asyncio.to_thread(self.get_wallet_age, wallet_address)
+        if wallet_age is None:
+            return {}
+
+        output = dict(wallet_age)
+        output["Analysis"] = await self.get_analysis_async(self.build_summary(document, wallet_age), client)
+        return output
+
+
+    async def analyze_many_async(self, wallet_addresses):
+        client = get_async_client(api_key=cfg.RUNPOD_TOKEN,
+                                  url=cfg.RUNPOD_URL,
+                                  max_connections=self.max_in_flight)
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        latencies = []
+
+        async def analyze(wallet_address):
+            async with semaphore:
+                started_at = time.perf_counter()
+                try:
+                    return wallet_address, await self.get_response_async(wallet_address, client)
+                except Exception as e:
+                    logging.error(f'Error in wallet age analysis for {wallet_address}: {e}')
+                    return wallet_address, None
+                finally:
+                    latencies.append(time.perf_counter() - started_at)
+
+        try:
+            results = dict(await asyncio.gather(*(analyze(wallet_address) for wallet_address in wallet_addresses)))
+        finally:
+            await client.close()
+
+        analyzed_at = datetime.now()
+        for wallet_address, output in results.items():
+            if output is not None:
+                self.report_sink.add(wallet_age_record(wallet_address, output, analyzed_at))
+        self.report_sink.flush()
+
+        latency_stats = summarize_latencies(latencies)
+        logging.info(f'Wallet age analysis for {len(results)} wallets, latency (s): {latency_stats}')
+        return results, latency_stats
+
+
+    def analyze_many(self, wallet_addresses):
+        return asyncio.run(self.analyze_many_async(wallet_addresses))
@@ -1,23 +1,97 @@
-from src.modules import (AgentProtocol,
-                         HistoricalTrendAnalysisAgent,
-                         WalletAgeAgent,
-                         DataIngestionAgent)
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
+import src.modules as modules
+
+from src.config.app_config import CryptoConfig as cc
 from src.utils.logger import logging
+from src.utils.metrics import metrics, export_metrics
+from src.database.db.wallet_db import CryptoDatabase
+from src.modules.ingestion.job_queue import normalize_address
+from src.modules.analysis.transaction_columns import load_transaction_columns
+
+
+COLUMN_BYTES_BUCKETS = (2**10, 2**14, 2**18, 2**20, 2**22, 2**24, 2**26)
 
 
 class AgentController:
     def __init__(self):
-        self.data_ingestion_agent = DataIngestionAgent()
-        self.wallet_age_agent = WalletAgeAgent()
-        self.trend_analysis_agent = HistoricalTrendAnalysisAgent()
+        self.freshness_ttl = cc.pipeline_freshness_ttl
+        self.executor = ThreadPoolExecutor(max_workers=cc.pipeline_analysis_workers)
+        self.agents = {}
+        self.agents_lock = threading.Lock()
+
+    def get_agent(self, name, factory):
+        # Agents are built on first use, which can come from several request threads at once; the lock keeps
+        # that to one agent, and one set of clients, per name.
+        agent = self.agents.get(name)
+        if agent is None:
+            with self.agents_lock:
+                agent = self.agents.get(name)
+                if agent is None:
+                    agent = self.agents[name] = factory()
+        return agent
+
+    @property
+    def data_ingestion_agent(self):
+        return self.get_agent("data_ingestion_agent", modules.DataIngestionAgent)
+
+    @property
+    def wallet_age_agent(self):
+        return self.get_agent("wallet_age_agent", modules.WalletAgeAgent)
+
+    @property
+    def trend_analysis_agent(self):
+        return self.get_agent("trend_analysis_agent", modules.HistoricalTrendAnalysisAgent)
+
+    @property
+    def transaction_collection(self):
+        return self.get_agent("transaction_collection", lambda: CryptoDatabase().get_transaction_collection())
+
+    def load_transactions(self, wallet_address):
+        with metrics.timer("transaction_load", wallet_address=wallet_address):
+            transactions = load_transaction_columns(self.transaction_collection, wallet_address)
+        metrics.observe("transaction_columns_bytes", transactions.nbytes(), buckets=COLUMN_BYTES_BUCKETS)
+        logging.info(f'Loaded {len(transactions)} transactions for {wallet_address} '
+                     f'into {transactions.nbytes() / 2**10:.1f} KiB of columns')
+        return transactions
+
+    def ensure_fresh(self, wallet_address):
+        if self.data_ingestion_agent.is_fresh(wallet_address, self.freshness_ttl):
+            logging.info(f'Stored data for {wallet_address} is fresh, skip scraping')
+            return
+        logging.info(f'Start scraping {wallet_address} ...')
+        self.data_ingestion_agent.ingest_wallet(wallet_address)
 
     def get_response(self, input):
-        logging.info('Start scraping ...')
-        self.data_ingestion_agent.run()
+        # Wallets are stored under lower-cased addresses, so a checksummed one would find nothing.
+        wallet_address = normalize_address(input)
+        if wallet_address is None:
+            raise ValueError(f'Invalid wallet address: {input}')
+
+        with metrics.timer("pipeline", wallet_address=wallet_address):
+            return self._get_response(wallet_address)
+
+    def _get_response(self, input):
+        with metrics.timer("freshness_check", wallet_address=input):
+            self.ensure_fresh(input)
+
+        wallet_age_agent = self.wallet_age_agent
+        trend_analysis_agent = self.trend_analysis_agent
+
+        # With trend.source set to transactions both agents read the same columns, so the history is fetched
+        # and decoded once per wallet; the rollup source reads daily buckets and never needs the full history.
+        transactions = self.load_transactions(input) if cc.trend_source == "transactions" else None
+
+        logging.info('Start wallet age and historical trend analysis')
+        wallet_age_future = self.executor.submit(wallet_age_agent.get_response, input, transactions)
+        trend_analysis_future = self.executor.submit(trend_analysis_agent.get_response, input, transactions,
+                                                     datetime.now())
+
+        return {"wallet_age": wallet_age_future.result(),
+                "trend_analysis": trend_analysis_future.result()}
 
-        logging.info('Start wage age analysis')
-        self.wallet_age_agent.get_response(input)
 
-        logging.info('Start historical trend analysis')
-        self.trend_analysis_agent.get_response(input)
\ No newline at end of file
+    def export_metrics(self):
+        export_metrics()
@@ -0,0 +1,324 @@
+import os
+import threading
+from array import array
+from datetime import timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+from src.config.app_config import CryptoConfig as cc
+from src.database.db.wallet_db import CryptoDatabase
+from src.modules.analysis.transaction_columns import Dictionary
+
+
+GRAPH_PROJECTION = {"_id": 1, "wallet_address": 1, "from": 1, "to": 1}
+
+
+def counterparty(document):
+    wallet_address = document["wallet_address"].lower()
+    sender = (document.get("from") or "").lower()
+    receiver = (document.get("to") or "").lower()
+    other = receiver if sender == wallet_address else sender
+    return wallet_address, (other if other and other != wallet_address else None)
+
+
+class CounterpartyGraph:
+    """Undirected wallet-counterparty graph weighted by transaction count.
+
+    Edges live in CSR arrays (indptr, indices, weights) plus a small dict-of-dicts delta for edges added
+    since the last compaction; the delta is merged into the CSR arrays once it holds `compact_threshold`
+    edges. Connected clusters are maintained with a union-find as edges arrive, so no query walks the graph.
+
+    `last_id` is the highest transaction _id read from Mongo. ObjectIds are minted by each writer's clock
+    and do not arrive in commit order, so catch_up() re-reads from `overlap` seconds before `last_id`;
+    `applied_ids` holds every _id added at or after that floor, whether read by catch_up or added straight
+    from a bulk write, so the re-read never counts a document twice. A document committed more than
+    `overlap` seconds after its _id was minted is still missed until the graph is rebuilt.
+    A transfer between two tracked wallets is stored once per wallet and so counts twice on its edge.
+    """
+
+    def __init__(self, compact_threshold, overlap=0):
+        self.compact_threshold = compact_threshold
+        self.overlap = overlap
+        self.addresses = Dictionary()
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.int64)
+        self.delta = {}
+        self.delta_edges = 0
+
+        self.parent = array('i')
+        self.members = {}
+
+        self.last_id = None
+        self.applied_ids = set()
+        self.lock = threading.RLock()
+
+
+    def _node(self, address):
+        node = self.addresses.encode(address)
+        if node == len(self.parent):
+            self.parent.append(node)
+        return node
+
+
+    def _find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+
+    def _union(self, a, b):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        members_a = self.members.pop(root_a, None) or [root_a]
+        members_b = self.members.pop(root_b, None) or [root_b]
+        if len(members_a) < len(members_b):
+            root_a, root_b, members_a, members_b = root_b, root_a, members_b, members_a
+        self.parent[root_b] = root_a
+        members_a.extend(members_b)
+        self.members[root_a] = members_a
+
+
+    def _add_edge(self, a, b):
+        for node, neighbor in ((a, b), (b, a)):
+            row = self.delta.setdefault(node, {})
+            row[neighbor] = row.get(neighbor, 0) + 1
+        self.delta_edges += 1
+        self._union(a, b)
+
+
+    def _add_document(self, document):
+        wallet_address, other = counterparty(document)
+        if other is not None:
+            self._add_edge(self._node(wallet_address), self._node(other))
+
+
+    def add_documents(self, documents, ids=()):
+        """Add newly inserted transaction documents; `ids` are their _ids, as returned by the bulk write."""
+        with self.lock:
+            for document in documents:
+                self._add_document(document)
+            self.applied_ids.update(ids)
+            if self.delta_edges >= self.compact_threshold:
+                self.compact()
+
+
+    def _floor_id(self):
+        if self.last_id is None:
+            return None
+        return ObjectId.from_datetime(self.last_id.generation_time - timedelta(seconds=self.overlap))
+
+
+    def _prune_applied_ids(self):
+        floor_id = self._floor_id()
+        if floor_id is not None:
+            self.applied_ids = {_id for _id in self.applied_ids if _id >= floor_id}
+        return len(self.applied_ids)
+
+
+    def catch_up(self, transaction_collection, batch_size):
+        """Add transactions written since the last catch_up; safe to call again at any time."""
+        with self.lock:
+            floor_id = self._floor_id()
+        query = {"_id": {"$gte": floor_id}} if floor_id is not None else {}
+        cursor = transaction_collection.find(query, GRAPH_PROJECTION).sort("_id", 1).batch_size(batch_size)
+        read = 0
+        added = 0
+        retained = len(self.applied_ids)
+        batch = []
+
+        def apply(batch):
+            nonlocal added, retained
+            with self.lock:
+                for document in batch:
+                    if document["_id"] not in self.applied_ids:
+                        self.applied_ids.add(document["_id"])
+                        self._add_document(document)
+                        added += 1
+                if self.last_id is None or batch[-1]["_id"] > self.last_id:
+                    self.last_id = batch[-1]["_id"]
+                # A full rebuild reads every document once; keep only the overlap window of _ids as it goes.
+                if len(self.applied_ids) > 2 * max(retained, batch_size):
+                    retained = self._prune_applied_ids()
+                if self.delta_edges >= self.compact_threshold:
+                    self.compact()
+
+        with metrics.timer("counterparty_graph_catch_up"):
+            for document in cursor:
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    apply(batch)
+                    read += len(batch)
+                    batch = []
+            if batch:
+                apply(batch)
+                read += len(batch)
+
+        with self.lock:
+            self._prune_applied_ids()
+            self.compact()
+        metrics.set_gauge("counterparty_graph_nodes", len(self.addresses))
+        metrics.set_gauge("counterparty_graph_edges", self.edge_count())
+        logging.info(f'Counterparty graph caught up on {added} new of {read} transactions read: '
+                     f'{len(self.addresses)} addresses, {self.edge_count()} edges')
+        return added
+
+
+    def compact(self):
+        with self.lock:
+            if not self.delta:
+                return
+            size = len(self.addresses)
+            base_rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+            delta_rows = np.fromiter((node for node, row in self.delta.items() for _ in row), dtype=np.int64)
+            delta_cols = np.fromiter((neighbor for row in self.delta.values() for neighbor in row), dtype=np.int64)
+            delta_weights = np.fromiter((count for row in self.delta.values() for count in row.values()),
+                                        dtype=np.int64)
+
+            keys = np.concatenate((base_rows * size + self.indices, delta_rows * size + delta_cols))
+            weights = np.concatenate((self.weights, delta_weights))
+            order = np.argsort(keys, kind='stable')
+            keys, weights = keys[order], weights[order]
+            starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+            keys = keys[starts]
+            self.weights = np.add.reduceat(weights, starts) if len(weights) else weights
+            self.indices = (keys % size).astype(np.int32)
+            self.indptr = np.concatenate(([0], np.cumsum(np.bincount(keys // size, minlength=size))))
+            self.delta = {}
+            self.delta_edges = 0
+
+
+    def _neighbors(self, node):
+        ids = weights = np.zeros(0, dtype=np.int64)
+        if node < len(self.indptr) - 1:
+            start, end = self.indptr[node], self.indptr[node + 1]
+            ids, weights = self.indices[start:end].astype(np.int64), self.weights[start:end]
+
+        row = self.delta.get(node)
+        if row:
+            ids = np.concatenate((ids, np.fromiter(row, dtype=np.int64, count=len(row))))
+            weights = np.concatenate((weights, np.fromiter(row.values(), dtype=np.int64, count=len(row))))
+            ids, inverse = np.unique(ids, return_inverse=True)
+            weights = np.bincount(inverse, weights=weights).astype(np.int64)
+        return ids, weights
+
+
+    def top_counterparties(self, address, k=10):
+        with self.lock:
+            node = self.addresses.code(address.lower())
+            if node < 0:
+                return []
+            ids, weights = self._neighbors(node)
+            top = np.argpartition(-weights, k)[:k] if len(weights) > k else np.arange(len(weights))
+            top = top[np.argsort(-weights[top], kind='stable')]
+            return [{"address": self.addresses.values[ids[index]], "transactions": int(weights[index])}
+                    for index in top]
+
+
+    def shared_counterparties(self, address_a, address_b):
+        with self.lock:
+            node_a = self.addresses.code(address_a.lower())
+            node_b = self.addresses.code(address_b.lower())
+            if node_a < 0 or node_b < 0:
+                return []
+            ids_a, weights_a = self._neighbors(node_a)
+            ids_b, weights_b = self._neighbors(node_b)
+            shared, index_a, index_b = np.intersect1d(ids_a, ids_b, assume_unique=True, return_indices=True)
+            order = np.argsort(-np.minimum(weights_a[index_a], weights_b[index_b]), kind='stable')
+            return [{"address": self.addresses.values[shared[i]],
+                     "transactions_a": int(weights_a[index_a[i]]),
+                     "transactions_b": int(weights_b[index_b[i]])}
+                    for i in order]
+
+
+    def cluster(self, address, limit=100):
+        """Size of the connected cluster containing `address` and up to `limit` of its members."""
+        with self.lock:
+            node = self.addresses.code(address.lower())
+            if node < 0:
+                return {"size": 0, "members": []}
+            members = self.members.get(self._find(node), [node])
+            return {"size": len(members), "members": [self.addresses.values[member] for member in members[:limit]]}
+
+
+    def edge_count(self):
+        return (int(self.indptr[-1]) + sum(len(row) for row in self.delta.values())) // 2
+
+
+    def save(self, path):
+        with self.lock:
+            self.compact()
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            temporary_path = path + '.tmp.npz'
+            np.savez(temporary_path,
+                     indptr=self.indptr,
+                     indices=self.indices,
+                     weights=self.weights,
+                     addresses=np.array(self.addresses.values, dtype=str),
+                     parent=np.frombuffer(self.parent, dtype=np.int32),
+                     last_id=np.array(str(self.last_id) if self.last_id is not None else ''),
+                     applied_ids=np.array(sorted(str(_id) for _id in self.applied_ids), dtype=str))
+            os.replace(temporary_path, path)
+        logging.info(f'Saved counterparty graph with {len(self.addresses)} addresses to {path}')
+
+
+    @classmethod
+    def load(cls, path, compact_threshold, overlap=0):
+        graph = cls(compact_threshold, overlap)
+        with np.load(path) as snapshot:
+            graph.addresses = Dictionary(snapshot["addresses"].tolist())
+            graph.indptr = snapshot["indptr"]
+            graph.indices = snapshot["indices"]
+            graph.weights = snapshot["weights"]
+            graph.parent = array('i', snapshot["parent"].tobytes())
+            last_id = str(snapshot["last_id"])
+            applied_ids = snapshot["applied_ids"].tolist() if "applied_ids" in snapshot else []
+        graph.last_id = ObjectId(last_id) if last_id else None
+        graph.applied_ids = {ObjectId(_id) for _id in applied_ids}
+
+        for node in range(len(graph.parent)):
+            root = graph._find(node)
+            if root != node:
+                graph.members.setdefault(root, [root]).append(node)
+        return graph
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_counterparty_graph(catch_up=True):
+    """Load the graph snapshot once per process, then read whatever Mongo has gained since it was saved."""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            if os.path.exists(cc.graph_snapshot_path):
+                _graph = CounterpartyGraph.load(cc.graph_snapshot_path, cc.graph_compact_threshold,
+                                                cc.graph_catch_up_overlap)
+            else:
+                _graph = CounterpartyGraph(cc.graph_compact_threshold, cc.graph_catch_up_overlap)
+            if catch_up:
+                catch_up_counterparty_graph()
+    return _graph
+
+
+def catch_up_counterparty_graph():
+    """Read what Mongo has gained since the loaded graph last caught up, including transactions whose bulk
+    write failed part-way and so never reached update_counterparty_graph."""
+    if _graph is not None:
+        return _graph.catch_up(CryptoDatabase().get_transaction_collection(), cc.graph_catch_up_batch_size)
+    return 0
+
+
+def update_counterparty_graph(documents, ids):
+    """Feed freshly inserted transactions to the graph if this process has it loaded; otherwise the
+    next catch_up() picks them up from Mongo."""
+    if _graph is not None:
+        _graph.add_documents(documents, ids)
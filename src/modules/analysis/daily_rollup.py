@@ -0,0 +1,115 @@
+import numpy as np
+from pymongo import UpdateOne
+
+from src.modules.analysis.trend_engine import TrendEngine
+
+
+SECONDS_PER_DAY = 86400
+ROLLUP_PROJECTION = {"_id": 0, "day": 1, "token": 1, "net_amount": 1, "send_count": 1, "receive_count": 1}
+
+
+def day_of(timestamp):
+    return int(timestamp // SECONDS_PER_DAY)
+
+
+def rollup_increments(documents):
+    """Sum transactions into per (wallet, token, UTC day) increments."""
+    increments = {}
+    for document in documents:
+        key = (document["wallet_address"], document.get("token"), day_of(document["timestamp"]))
+        increment = increments.setdefault(key, {"net_amount": 0.0, "send_count": 0, "receive_count": 0})
+        if document.get("type") == "send":
+            increment["net_amount"] -= document.get("amount") or 0.0
+            increment["send_count"] += 1
+        elif document.get("type") == "receive":
+            increment["net_amount"] += document.get("amount") or 0.0
+            increment["receive_count"] += 1
+    return increments
+
+
+def rollup_operations(increments):
+    return [UpdateOne({"wallet_address": wallet_address, "token": token, "day": day},
+                      {"$inc": increment},
+                      upsert=True)
+            for (wallet_address, token, day), increment in increments.items()]
+
+
+def rebuild_pipeline(match):
+    """Aggregation that recomputes rollup rows from raw transactions, in the shape rollup_increments produces."""
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"wallet_address": "$wallet_address",
+                    "token": "$token",
+                    "day": {"$floor": {"$divide": ["$timestamp", SECONDS_PER_DAY]}}},
+            "net_amount": {"$sum": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$type", "send"]}, "then": {"$multiply": ["$amount", -1]}},
+                    {"case": {"$eq": ["$type", "receive"]}, "then": "$amount"},
+                ],
+                "default": 0
+            }}},
+            "send_count": {"$sum": {"$cond": [{"$eq": ["$type", "send"]}, 1, 0]}},
+            "receive_count": {"$sum": {"$cond": [{"$eq": ["$type", "receive"]}, 1, 0]}},
+        }}
+    ]
+
+
+def boundary_day_ranges(starts):
+    """Timestamp ranges of the UTC days the window starts fall on; those days are read from raw transactions."""
+    return [{"timestamp": {"$gte": day * SECONDS_PER_DAY, "$lt": (day + 1) * SECONDS_PER_DAY}}
+            for day in sorted({day_of(start) for start in starts})]
+
+
+class RollupTrendEngine(TrendEngine):
+    """TrendEngine over daily rollup rows.
+
+    Whole days after a window start come from the rollup rows; the day a window starts on comes from
+    `boundary`, a TrendEngine over that day's raw transactions, so results match the per-transaction engine.
+    `rows` must hold every rollup row from the earliest window start day on, sorted by day.
+    """
+
+    def __init__(self, rows, boundary):
+        self.boundary = boundary
+        self.days = np.fromiter((row["day"] for row in rows), dtype=np.int64, count=len(rows))
+        send_counts = np.fromiter((row["send_count"] for row in rows), dtype=np.int64, count=len(rows))
+        receive_counts = np.fromiter((row["receive_count"] for row in rows), dtype=np.int64, count=len(rows))
+        net_amounts = np.fromiter((row["net_amount"] for row in rows), dtype=np.float64, count=len(rows))
+
+        self.send_prefix = np.concatenate(([0], np.cumsum(send_counts)))
+        self.receive_prefix = np.concatenate(([0], np.cumsum(receive_counts)))
+
+        self.token_series = {}
+        tokens = np.array([row["token"] for row in rows], dtype=object)
+        for symbol in set(tokens) - {None}:
+            mask = tokens == symbol
+            self.token_series[symbol] = (self.days[mask], np.concatenate(([0.0], np.cumsum(net_amounts[mask]))))
+
+
+    def pre_window_net_amounts(self, starts):
+        start_days = np.floor(starts / SECONDS_PER_DAY)
+        net_amounts = {}
+        for symbol, (token_days, prefix) in self.token_series.items():
+            net_amounts[symbol] = prefix[np.searchsorted(token_days, start_days, side='left')]
+
+        before_start = self.boundary.pre_window_net_amounts(starts)
+        before_day = self.boundary.pre_window_net_amounts(start_days * SECONDS_PER_DAY)
+        for symbol, amounts in before_start.items():
+            net_amounts[symbol] = net_amounts.get(symbol, 0.0) + amounts - before_day[symbol]
+        return net_amounts
+
+
+    def transaction_patterns(self, starts):
+        start_days = np.floor(starts / SECONDS_PER_DAY)
+        positions = np.searchsorted(self.days, start_days, side='right')
+        boundary_sends, boundary_receives = self.boundary.counts_between(starts, (start_days + 1) * SECONDS_PER_DAY)
+        send_counts = self.send_prefix[-1] - self.send_prefix[positions] + boundary_sends
+        receive_counts = self.receive_prefix[-1] - self.receive_prefix[positions] + boundary_receives
+        return [
+            {
+                "send_count": int(send_count),
+                "receive_count": int(receive_count),
+                "net_activity": int(receive_count - send_count)
+            }
+            for send_count, receive_count in zip(send_counts, receive_counts)
+        ]
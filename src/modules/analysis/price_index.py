@@ -0,0 +1,117 @@
+import os
+import glob
+import threading
+
+import numpy as np
+
+from src.utils.logger import logging
+from src.config.app_config import CryptoConfig as cc
+
+
+TIMESTAMP_BITS = 34
+
+
+class PriceIndex:
+    """Historical USD prices for many tokens in one sorted int64 key array.
+
+    Each key packs (token code, unix timestamp), so a batch of (token, timestamp)
+    lookups across any mix of tokens is a single searchsorted call. A lookup returns
+    the last known price at or before the timestamp, or NaN when the token is unknown
+    or the timestamp predates its series.
+    """
+
+    def __init__(self, series, fixed_prices=None, memo_size=100000):
+        self.codes = {}
+        keys = []
+        prices = []
+        for symbol, (timestamps, values) in series.items():
+            code = self.codes.setdefault(symbol.upper(), len(self.codes))
+            timestamps = np.asarray(timestamps, dtype=np.int64)
+            keys.append((np.int64(code) << TIMESTAMP_BITS) | timestamps)
+            prices.append(np.asarray(values, dtype=np.float64))
+
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        prices = np.concatenate(prices) if prices else np.empty(0, dtype=np.float64)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.prices = prices[order]
+
+        self.fixed_prices = {symbol.upper(): price for symbol, price in (fixed_prices or {}).items()}
+        self.memo_size = memo_size
+        self.memo = {}
+        self.lock = threading.Lock()
+
+
+    @classmethod
+    def from_directory(cls, directory, fixed_prices=None, memo_size=100000):
+        """Load one `<SYMBOL>.csv` per token with a `timestamp,price_usd` header."""
+        series = {}
+        for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+            data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+            if len(data):
+                series[os.path.splitext(os.path.basename(path))[0]] = (data[:, 0], data[:, 1])
+        logging.info(f'Loaded price series for {len(series)} tokens from {directory}')
+        return cls(series, fixed_prices=fixed_prices, memo_size=memo_size)
+
+
+    def __len__(self):
+        return len(self.codes)
+
+
+    def _lookup(self, symbols, timestamps):
+        codes = np.array([self.codes.get(symbol.upper(), -1) for symbol in symbols], dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        queries = (np.maximum(codes, 0) << TIMESTAMP_BITS) | timestamps
+
+        positions = np.searchsorted(self.keys, queries, side='right') - 1
+        found = (codes >= 0) & (positions >= 0)
+        found[found] &= (self.keys[positions[found]] >> TIMESTAMP_BITS) == codes[found]
+
+        prices = np.full(len(symbols), np.nan)
+        prices[found] = self.prices[positions[found]]
+        for index, symbol in enumerate(symbols):
+            fixed = self.fixed_prices.get(symbol.upper())
+            if fixed is not None:
+                prices[index] = fixed
+        return prices
+
+
+    def lookup(self, symbols, timestamps):
+        """Price each (symbol, timestamp) pair; repeated pairs are served from the memo."""
+        pairs = [(symbol, int(timestamp)) for symbol, timestamp in zip(symbols, timestamps)]
+        with self.lock:
+            cached = [self.memo.get(pair) for pair in pairs]
+
+        missing = [index for index, price in enumerate(cached) if price is None]
+        if missing:
+            prices = self._lookup([pairs[index][0] for index in missing], [pairs[index][1] for index in missing])
+            with self.lock:
+                if len(self.memo) + len(missing) > self.memo_size:
+                    self.memo.clear()
+                for index, price in zip(missing, prices):
+                    cached[index] = float(price)
+                    self.memo[pairs[index]] = cached[index]
+
+        return np.array(cached, dtype=np.float64)
+
+
+    def price_grid(self, symbols, timestamps):
+        """Prices for every symbol at every timestamp, shaped (len(timestamps), len(symbols))."""
+        symbols = list(symbols)
+        grid_symbols = symbols * len(timestamps)
+        grid_timestamps = np.repeat(np.asarray(timestamps, dtype=np.int64), len(symbols))
+        return self.lookup(grid_symbols, grid_timestamps).reshape(len(timestamps), len(symbols))
+
+
+_price_index = None
+_price_index_lock = threading.Lock()
+
+
+def get_price_index():
+    global _price_index
+    with _price_index_lock:
+        if _price_index is None:
+            _price_index = PriceIndex.from_directory(cc.prices_directory,
+                                                     fixed_prices=cc.prices_fixed,
+                                                     memo_size=cc.prices_memo_size)
+    return _price_index
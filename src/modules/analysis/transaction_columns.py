@@ -0,0 +1,143 @@
+import sys
+from array import array
+
+import numpy as np
+
+
+TRANSACTION_PROJECTION = {"_id": 0, "timestamp": 1, "token": 1, "amount": 1, "type": 1, "from": 1, "to": 1}
+
+
+class Dictionary:
+    """Interned string values and the int code each one is stored as."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.encode(value)
+
+
+    def encode(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            value = sys.intern(str(value))
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+    def code(self, value):
+        return self.codes.get(value, -1)
+
+
+    def __len__(self):
+        return len(self.values)
+
+
+    def nbytes(self):
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values)
+
+
+class TransactionColumns:
+    """One wallet's transactions as typed arrays sorted by timestamp.
+
+    Token, type and address strings are dictionary-encoded; `from` and `to` share one address dictionary.
+    A missing string is stored as code -1.
+    """
+
+    def __init__(self, timestamps, amounts, token_codes, tokens, type_codes, types, from_codes, to_codes, addresses):
+        order = None
+        if len(timestamps) > 1 and (np.diff(timestamps) < 0).any():
+            order = np.argsort(timestamps, kind='stable')
+
+        def sorted_column(values):
+            return values if order is None else values[order]
+
+        self.timestamps = sorted_column(timestamps)
+        self.amounts = sorted_column(amounts)
+        self.token_codes = sorted_column(token_codes)
+        self.type_codes = sorted_column(type_codes)
+        self.from_codes = sorted_column(from_codes)
+        self.to_codes = sorted_column(to_codes)
+        self.tokens = tokens
+        self.types = types
+        self.addresses = addresses
+
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        """Build the columns in one pass over a Mongo cursor or any iterable of transaction dicts."""
+        timestamps, amounts = array('d'), array('d')
+        token_codes, type_codes, from_codes, to_codes = array('i'), array('b'), array('i'), array('i')
+        tokens, types, addresses = Dictionary(), Dictionary(("send", "receive")), Dictionary()
+
+        for transaction in cursor:
+            timestamps.append(transaction["timestamp"])
+            amounts.append(transaction.get("amount") or 0.0)
+            token_codes.append(tokens.encode(transaction.get("token")))
+            type_codes.append(types.encode(transaction.get("type")))
+            from_codes.append(addresses.encode(transaction.get("from")))
+            to_codes.append(addresses.encode(transaction.get("to")))
+
+        return cls(timestamps=np.frombuffer(timestamps, dtype=np.float64),
+                   amounts=np.frombuffer(amounts, dtype=np.float64),
+                   token_codes=np.frombuffer(token_codes, dtype=np.int32),
+                   tokens=tokens,
+                   type_codes=np.frombuffer(type_codes, dtype=np.int8),
+                   types=types,
+                   from_codes=np.frombuffer(from_codes, dtype=np.int32),
+                   to_codes=np.frombuffer(to_codes, dtype=np.int32),
+                   addresses=addresses)
+
+
+    def __len__(self):
+        return len(self.timestamps)
+
+
+    def type_mask(self, transaction_type):
+        return self.type_codes == self.types.code(transaction_type)
+
+
+    def token_masks(self):
+        """Yield (symbol, boolean mask) for every token that occurs in the columns."""
+        for code, symbol in enumerate(self.tokens.values):
+            yield symbol, self.token_codes == code
+
+
+    def first_timestamp(self):
+        return float(self.timestamps[0]) if len(self) else None
+
+
+    def since(self, start):
+        """Columns for transactions at or after `start`, sharing the dictionaries with this instance."""
+        position = int(np.searchsorted(self.timestamps, start, side='left'))
+        return TransactionColumns(self.timestamps[position:], self.amounts[position:],
+                                  self.token_codes[position:], self.tokens,
+                                  self.type_codes[position:], self.types,
+                                  self.from_codes[position:], self.to_codes[position:],
+                                  self.addresses)
+
+
+    def nbytes(self):
+        arrays = (self.timestamps, self.amounts, self.token_codes, self.type_codes, self.from_codes, self.to_codes)
+        return (sum(column.nbytes for column in arrays)
+                + self.tokens.nbytes() + self.types.nbytes() + self.addresses.nbytes())
+
+
+def documents_nbytes(documents):
+    """Approximate footprint of transactions held as decoded dicts; BSON decoding allocates every key and value."""
+    total = sys.getsizeof(documents)
+    for document in documents:
+        total += sys.getsizeof(document)
+        total += sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in document.items())
+    return total
+
+
+def load_transaction_columns(transaction_collection, wallet_address, since=None):
+    query = {"wallet_address": wallet_address}
+    if since is not None:
+        query["timestamp"] = {"$gte": since}
+    return TransactionColumns.from_cursor(transaction_collection.find(query, TRANSACTION_PROJECTION)
+                                          .sort("timestamp", 1))
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import numpy as np
+
+from src.modules.analysis.transaction_columns import TransactionColumns
+
+
+class TrendEngine:
+    def __init__(self, columns):
+        self.timestamps = columns.timestamps
+
+        is_send = columns.type_mask("send")
+        is_receive = columns.type_mask("receive")
+        signed_amounts = np.where(is_send, -columns.amounts, np.where(is_receive, columns.amounts, 0.0))
+
+        self.send_prefix = np.concatenate(([0], np.cumsum(is_send, dtype=np.int64)))
+        self.receive_prefix = np.concatenate(([0], np.cumsum(is_receive, dtype=np.int64)))
+
+        self.token_series = {}
+        for symbol, mask in columns.token_masks():
+            self.token_series[symbol] = (
+                self.timestamps[mask],
+                np.concatenate(([0.0], np.cumsum(signed_amounts[mask])))
+            )
+
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        return cls(TransactionColumns.from_cursor(transactions))
+
+
+    @staticmethod
+    def window_starts(timeframes, current_time):
+        return np.array([(current_time - timedelta(days=days)).timestamp() for days in timeframes],
+                        dtype=np.float64)
+
+
+    def pre_window_net_amounts(self, starts):
+        net_amounts = {}
+        for symbol, (token_timestamps, prefix) in self.token_series.items():
+            net_amounts[symbol] = prefix[np.searchsorted(token_timestamps, starts, side='left')]
+        return net_amounts
+
+
+    def transaction_patterns(self, starts):
+        positions = np.searchsorted(self.timestamps, starts, side='left')
+        send_counts = self.send_prefix[-1] - self.send_prefix[positions]
+        receive_counts = self.receive_prefix[-1] - self.receive_prefix[positions]
+        return [
+            {
+                "send_count": int(send_count),
+                "receive_count": int(receive_count),
+                "net_activity": int(receive_count - send_count)
+            }
+            for send_count, receive_count in zip(send_counts, receive_counts)
+        ]
+
+
+    def counts_between(self, starts, ends):
+        """Send and receive counts of transactions with starts <= timestamp < ends."""
+        start_positions = np.searchsorted(self.timestamps, starts, side='left')
+        end_positions = np.searchsorted(self.timestamps, ends, side='left')
+        return (self.send_prefix[end_positions] - self.send_prefix[start_positions],
+                self.receive_prefix[end_positions] - self.receive_prefix[start_positions])
+
+
+    def initial_balances(self, starts, current_balances, balance_offsets=None):
+        balance_offsets = balance_offsets or {}
+        net_amounts = self.pre_window_net_amounts(starts)
+
+        balances = []
+        for index in range(len(starts)):
+            initial = {}
+            for symbol, balance in current_balances.items():
+                initial[symbol] = balance + balance_offsets.get(symbol, 0)
+                if symbol in net_amounts:
+                    initial[symbol] += float(net_amounts[symbol][index])
+            balances.append(initial)
+        return balances
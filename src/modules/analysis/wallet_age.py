@@ -0,0 +1,72 @@
+import re
+from datetime import datetime, timedelta
+
+
+RELATIVE_AGE_PATTERN = re.compile(r'(\d+)\s*(yrs?|years?|mths?|months?|days?|hrs?|hours?|mins?|minutes?|secs?|seconds?)\b',
+                                  re.IGNORECASE)
+RELATIVE_AGE_UNITS = {
+    'yr': timedelta(days=365), 'year': timedelta(days=365),
+    'mth': timedelta(days=30), 'month': timedelta(days=30),
+    'day': timedelta(days=1),
+    'hr': timedelta(hours=1), 'hour': timedelta(hours=1),
+    'min': timedelta(minutes=1), 'minute': timedelta(minutes=1),
+    'sec': timedelta(seconds=1), 'second': timedelta(seconds=1),
+}
+AGE_CATEGORIES = [(5, "Veteran"), (2, "Established"), (1, "Intermediate"), (0, "Newcomer")]
+
+
+def parse_relative_age(text):
+    if not text:
+        return None
+
+    matches = RELATIVE_AGE_PATTERN.findall(text)
+    if not matches:
+        return None
+
+    age = timedelta()
+    for value, unit in matches:
+        age += int(value) * RELATIVE_AGE_UNITS[unit.lower().rstrip('s')]
+    return age
+
+
+def first_transaction_date(wallet_ages, first_timestamp, reference_time):
+    candidates = []
+
+    relative_age = parse_relative_age((wallet_ages or {}).get("first"))
+    if relative_age is not None:
+        candidates.append((reference_time - relative_age).date())
+    if first_timestamp is not None:
+        candidates.append(datetime.fromtimestamp(first_timestamp).date())
+
+    return min(candidates) if candidates else None
+
+
+def wallet_age_breakdown(first_date, today):
+    total_days = max((today - first_date).days, 0)
+    years, remaining_days = divmod(total_days, 365)
+    months, days = divmod(remaining_days, 30)
+    return years, months, days
+
+
+def format_wallet_age(years, months, days):
+    parts = [(years, "year"), (months, "month"), (days, "day")]
+    return ", ".join(f"{value} {unit}{'' if value == 1 else 's'}" for value, unit in parts)
+
+
+def categorize_wallet_age(years):
+    for minimum_years, category in AGE_CATEGORIES:
+        if years >= minimum_years:
+            return category
+
+
+def compute_wallet_age(wallet_ages, first_timestamp, reference_time, today):
+    first_date = first_transaction_date(wallet_ages, first_timestamp, reference_time)
+    if first_date is None:
+        return None
+
+    years, months, days = wallet_age_breakdown(first_date, today)
+    return {
+        "First Transaction": first_date.isoformat(),
+        "Wallet Age": format_wallet_age(years, months, days),
+        "Category": categorize_wallet_age(years),
+    }
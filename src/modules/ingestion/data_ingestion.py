@@ -1,7 +1,13 @@
 import os
+import time
 import asyncio
 import json
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 
+import httpx
+from pymongo import UpdateOne
 from langchain_openai import ChatOpenAI
 from browser_use import Agent, Browser
 
@@ -10,18 +16,56 @@ from src.config.app_config import (Config as cfg,
                                    CryptoConfig as cpt)
 from src.utils.logger import logging
 from src.utils.common import find_valid_json, post_process_result
+from src.utils.langchain_cache import get_langchain_cache
+from src.utils.metrics import metrics, export_metrics, log_hot_path
+from src.utils.rate_control import get_endpoint, CircuitOpenError
+from src.utils.snapshot_store import get_snapshot_store
+from src.modules.ingestion.etherscan_extractor import (EtherscanExtractor,
+                                                       EtherscanExtractionError)
+from src.modules.ingestion.journal import IngestionJournal
+from src.modules.ingestion.job_queue import (IngestionJobQueue,
+                                             JobLease,
+                                             iter_wallet_addresses)
+from src.modules.ingestion.wallet_schema import validate_wallet_record, merge_sections
+from src.modules.ingestion.snapshot_replay import history_contents, replay_wallets
+from src.modules.analysis.counterparty_graph import update_counterparty_graph
+from src.modules.analysis.daily_rollup import rollup_increments, rollup_operations, rebuild_pipeline
+from src.modules.ingestion.scheduler import (TokenBucket,
+                                             BrowserContextPool,
+                                             IngestionScheduler)
 
 
 class DataIngestionAgent:
     def __init__(self):
         self.cryto_db = CryptoDatabase()
         self.collection = self.cryto_db.get_collection()
-        self.llm = ChatOpenAI(model=cpt.model, api_key=cfg.OPENAI_API_KEY)
+        self.transaction_collection = self.cryto_db.get_transaction_collection()
+        self.rollup_writer = self.cryto_db.get_bulk_writer(self.cryto_db.get_rollup_collection())
+        self.transaction_writer = self.cryto_db.get_bulk_writer(self.transaction_collection,
+                                                                on_flush=self.on_transactions_written,
+                                                                on_error=self.on_transactions_failed)
+        self.writer = self.cryto_db.get_bulk_writer(flush_first=self.transaction_writer)
+        self.watermark_writer = self.cryto_db.get_bulk_writer()
+        self.llm = ChatOpenAI(model=cpt.model, api_key=cfg.OPENAI_API_KEY, cache=get_langchain_cache())
         self.browser = Browser()
         self.wallet_file = cpt.data_path
         self.rate_limit_delay = cpt.rate_limit_delay
+        self.rate_limit_burst = cpt.rate_limit_burst
+        self.num_workers = cpt.num_workers
+        self.progress_interval = cpt.progress_interval
+        self.journal_path = cpt.journal_path
+        self.claim_batch_size = cpt.claim_batch_size
+        self.idle_poll_interval = cpt.idle_poll_interval
         self.etherscan_base_url = cpt.etherscan_base_url
+        self.use_fast_path = cpt.use_fast_path
+        self.watermarks = {}
+        self.unwritten_wallets = set()
+        self.wallet_locks = {}
+        self.wallet_locks_guard = threading.Lock()
         self.output = self.output_json()
+        self.output_example = post_process_result(self.output)
+        self.section_retries = cpt.section_retries
+        self.snapshot_store = get_snapshot_store()
 
         logging.info('Init Data Ingestion Agent')
     
@@ -56,9 +100,8 @@ class DataIngestionAgent:
         "wallet_ages": 
             {
             "latest": "2 days ago",
-            "first": "5 days ago",
-            }
-        ],
+            "first": "5 days ago"
+            },
         "transaction_history": [
             {
             "timestamp": 1708060800,
@@ -85,10 +128,57 @@ class DataIngestionAgent:
         """
 
 
-    async def scrape_wallet_data(self, wallet_address):
+    def get_extractor(self):
+        return EtherscanExtractor(base_url=cpt.etherscan_host,
+                                  max_connections=cpt.extractor_max_connections,
+                                  timeout=cpt.extractor_timeout,
+                                  max_pages=cpt.extractor_max_pages,
+                                  page_size=cpt.extractor_page_size,
+                                  user_agent=cpt.extractor_user_agent,
+                                  endpoint=get_endpoint("etherscan"),
+                                  max_token_pages=cpt.extractor_max_token_pages)
+
+
+    def begin_snapshot(self, wallet_address, source, full_history=False):
+        if self.snapshot_store is None:
+            return None
+        return self.snapshot_store.begin(wallet_address, source, full_history)
+
+
+    async def commit_snapshot(self, recording):
+        if recording is None:
+            return
         try:
-            agent = Agent(
-                task=f"""
+            await asyncio.to_thread(recording.commit)
+        except Exception as e:
+            logging.error(f'Could not store snapshot for {recording.wallet_address}: {e}')
+
+
+    async def scrape_wallet_data(self, wallet_address, browser_context=None, extractor=None):
+        watermark = self.watermarks.get(wallet_address)
+        if extractor is not None:
+            recording = self.begin_snapshot(wallet_address, "http", full_history=watermark is None)
+            try:
+                with metrics.timer("scrape", wallet_address=wallet_address, path="http"):
+                    wallet_data = await extractor.extract(wallet_address, watermark, recording)
+                metrics.inc("scrape_results_total", path="http", status="ok")
+                await self.commit_snapshot(recording)
+                return wallet_data
+            except (EtherscanExtractionError, httpx.HTTPError, CircuitOpenError) as e:
+                metrics.inc("scrape_results_total", path="http", status="fallback")
+                logging.info(f'Fast path failed for {wallet_address}, falling back to browser agent: {e}')
+
+        # Browser results are kept even when no valid JSON came out of them; a later parser may do better.
+        recording = self.begin_snapshot(wallet_address, "browser", full_history=watermark is None)
+        with metrics.timer("scrape", wallet_address=wallet_address, path="browser"):
+            wallet_data = await self.browse_wallet_data(wallet_address, browser_context, recording)
+        metrics.inc("scrape_results_total", path="browser", status="ok" if wallet_data else "failed")
+        await self.commit_snapshot(recording)
+        return wallet_data
+
+
+    def build_task(self, wallet_address):
+        return f"""
                     **Objective:**  
                     Visit [Etherscan]({self.etherscan_base_url}/{wallet_address}), navigate to the provided wallet address, and extract the following details:
                     1. Wallet Address
@@ -146,56 +236,429 @@ class DataIngestionAgent:
                     - Store the extracted information in the following strictly JSON format. Make sure these details are accurate and well-structured like the example below:
                     {self.output}
 
-                    """,
+                    """
+
+
+    def build_section_task(self, wallet_address, sections):
+        example = {section: self.output_example[section] for section in sections}
+        return f"""
+                    **Objective:**  
+                    Visit [Etherscan]({self.etherscan_base_url}/{wallet_address}) and extract only the following sections for this wallet: {", ".join(sections)}.
+                    Do not collect anything else.
+
+                    Return the result in the following strictly JSON format, inside a ```json block:
+                    ```json
+                    {json.dumps(example, indent=2)}
+                    ```
+                    """
+
+
+    async def run_browser_task(self, task, browser_context=None, recording=None, kind="browser_task", locator=None):
+        try:
+            agent = Agent(
+                task=task,
                 llm=self.llm,
-                browser=self.browser
+                browser=browser_context.browser if browser_context is not None else self.browser,
+                browser_context=browser_context
             )
 
-            result = await agent.run()
+            result = await get_endpoint("browser").call_async(agent.run)
+            metrics.observe("browser_agent_steps", len(result.history), buckets=(1, 2, 5, 10, 20, 50, 100))
+            if recording is not None:
+                recording.add(kind, locator, history_contents(result))
             
             parsed_data = find_valid_json(result)
 
             final_result = post_process_result(parsed_data) 
-
-            await asyncio.sleep(self.rate_limit_delay)
             
             return final_result
         
         except Exception as e:
             logging.error(f'Error in scraping wallet data: {e}')
             return None
+
+
+    async def browse_wallet_data(self, wallet_address, browser_context=None, recording=None):
+        data = await self.run_browser_task(self.build_task(wallet_address), browser_context, recording)
+        if data is None:
+            return None
+
+        wallet_data, invalid_sections = validate_wallet_record(data, wallet_address)
+        for _ in range(self.section_retries):
+            if not invalid_sections:
+                break
+            logging.info(f'Re-scraping {", ".join(invalid_sections)} for {wallet_address}')
+            metrics.inc("scrape_section_retries_total", len(invalid_sections))
+            patch = await self.run_browser_task(self.build_section_task(wallet_address, invalid_sections),
+                                                browser_context, recording,
+                                                kind="browser_section", locator=",".join(invalid_sections))
+            wallet_data, invalid_sections = merge_sections(wallet_data, patch, invalid_sections)
+
+        if invalid_sections:
+            metrics.inc("scrape_sections_missing_total", len(invalid_sections))
+            logging.warning(f'Saving {wallet_address} without {", ".join(invalid_sections)}')
+        return wallet_data
     
 
-    def save_mongodb(self, wallet_data):
+    def load_watermarks(self, wallet_addresses):
+        cursor = self.collection.find({"wallet_address": {"$in": wallet_addresses},
+                                       "ingestion_watermark": {"$exists": True}},
+                                      {"_id": 0, "wallet_address": 1, "ingestion_watermark": 1})
+        return {document["wallet_address"]: document["ingestion_watermark"] for document in cursor}
+
+
+    def build_watermark(self, transactions):
+        if not transactions:
+            return None
+        latest = max(transactions, key=lambda tx: tx["timestamp"])
+        return {"timestamp": latest["timestamp"], "tx_hash": latest["tx_hash"]}
+
+
+    def filter_new_transactions(self, transactions, watermark):
+        return [
+            tx for tx in transactions
+            if tx["timestamp"] > watermark["timestamp"]
+            or (tx["timestamp"] == watermark["timestamp"] and tx["tx_hash"] != watermark["tx_hash"])
+        ]
+
+
+    def save_transactions(self, wallet_address, transactions, replace=False):
+        for transaction in transactions:
+            document = dict(transaction, wallet_address=wallet_address)
+            self.transaction_writer.add(UpdateOne({"tx_hash": transaction["tx_hash"], "wallet_address": wallet_address},
+                                                  {"$set" if replace else "$setOnInsert": document},
+                                                  upsert=True),
+                                        key=document)
+
+
+    def advance_watermarks(self, documents):
+        """Move each wallet's watermark up to the newest of `documents`, the transactions a write applied.
+        Wallets with a failed transaction write keep no watermark until they are saved again."""
+        transactions_by_wallet = {}
+        for document in documents:
+            if document["wallet_address"] not in self.unwritten_wallets:
+                transactions_by_wallet.setdefault(document["wallet_address"], []).append(document)
+
+        for wallet_address, transactions in transactions_by_wallet.items():
+            watermark = self.build_watermark(transactions)
+            current = self.watermarks.get(wallet_address)
+            if current and current["timestamp"] >= watermark["timestamp"]:
+                continue
+            self.watermarks[wallet_address] = watermark
+            self.watermark_writer.add(UpdateOne({"wallet_address": wallet_address},
+                                                {"$set": {"ingestion_watermark": watermark}},
+                                                upsert=True))
+        self.watermark_writer.flush()
+
+
+    def on_transactions_failed(self, documents):
+        # A failed transaction may be older than one already written, so no watermark can skip past it;
+        # the wallet's next scrape fetches its full history again.
+        wallet_addresses = {document["wallet_address"] for document in documents}
+        self.unwritten_wallets.update(wallet_addresses)
+        for wallet_address in wallet_addresses:
+            self.watermarks.pop(wallet_address, None)
+            self.watermark_writer.add(UpdateOne({"wallet_address": wallet_address},
+                                                {"$unset": {"ingestion_watermark": ""}}))
+        self.watermark_writer.flush()
+
+
+    def on_transactions_written(self, documents, result):
+        self.advance_watermarks(documents)
+
+        # Only transactions inserted by this write move the rollups and the graph; re-sent duplicates match
+        # an existing document and are not upserted.
+        upserted_ids = result.upserted_ids or {}
+        if not upserted_ids:
+            return
+        inserted = [documents[index] for index in upserted_ids]
+
+        for operation in rollup_operations(rollup_increments(inserted)):
+            self.rollup_writer.add(operation)
+        self.rollup_writer.flush()
+
+        if cpt.graph_enabled:
+            update_counterparty_graph(inserted, list(upserted_ids.values()))
+
+
+    def save_mongodb(self, wallet_data, replace=False, scraped_at=None):
+        """Queue a scraped wallet for writing; with `replace`, stored transactions are overwritten
+        instead of kept, which is how re-extracted snapshots correct earlier parses."""
         if wallet_data:
-            existing_entry = self.collection.find_one({"wallet_address": wallet_data["wallet_address"]})
-            if existing_entry:
-                self.collection.update_one({"wallet_address": wallet_data["wallet_address"]}, {"$set": wallet_data})
-                logging.info(f"Updated wallet data for address: {wallet_data['wallet_address']}")
-            else:
-                self.collection.insert_one(wallet_data)
-                logging.info(f"Saved wallet data for address: {wallet_data['wallet_address']}")
+            wallet_address = wallet_data["wallet_address"]
+            watermark = None if replace else self.watermarks.get(wallet_address)
+
+            fields = {key: value for key, value in wallet_data.items() if key != "transaction_history"}
+            fields["scraped_at"] = scraped_at or int(time.time())
+            if "wallet_ages" in fields:
+                fields["wallet_ages_observed_at"] = fields["scraped_at"]
+            transactions = wallet_data.get("transaction_history", [])
+            if watermark is not None:
+                transactions = self.filter_new_transactions(transactions, watermark)
+
+            if transactions:
+                self.unwritten_wallets.discard(wallet_address)
+                self.save_transactions(wallet_address, transactions, replace)
+
+            self.writer.add(UpdateOne({"wallet_address": wallet_address}, {"$set": fields}, upsert=True),
+                            key=wallet_address)
+            log_hot_path(f"Queued {len(transactions)} new transactions for address: {wallet_address}")
+
+
+    def migrate_embedded_transactions(self):
+        """Move transaction_history arrays from wallet documents written before the transactions collection
+        existed. Idempotent; a watermark only moves forward, from the transactions that were written."""
+        cursor = self.collection.find({"transaction_history": {"$exists": True}},
+                                      {"_id": 0, "wallet_address": 1, "transaction_history": 1,
+                                       "ingestion_watermark": 1})
+        migrated = 0
+        for document in cursor:
+            if document.get("ingestion_watermark"):
+                self.watermarks[document["wallet_address"]] = document["ingestion_watermark"]
+            self.save_transactions(document["wallet_address"], document["transaction_history"] or [])
+            self.writer.add(UpdateOne({"wallet_address": document["wallet_address"]},
+                                      {"$unset": {"transaction_history": ""}}),
+                            key=document["wallet_address"])
+            migrated += 1
+        self.writer.flush()
+
+        if migrated:
+            logging.info(f'Moved embedded transactions of {migrated} wallets into {self.transaction_collection.name}')
+        return migrated
 
     
+    def rebuild_rollups(self, wallet_addresses=None):
+        """Recompute daily rollups from raw transactions, for backfills; run it while ingestion is paused."""
+        match = {"wallet_address": {"$in": wallet_addresses}} if wallet_addresses else {}
+        rollup_collection = self.cryto_db.get_rollup_collection()
+        rollup_collection.delete_many(match)
+
+        writer = self.cryto_db.get_bulk_writer(rollup_collection)
+        rows = 0
+        for row in self.transaction_collection.aggregate(rebuild_pipeline(match), allowDiskUse=True):
+            key = row.pop("_id")
+            writer.add(UpdateOne({"wallet_address": key["wallet_address"], "token": key.get("token"),
+                                  "day": int(key["day"])},
+                                 {"$set": row},
+                                 upsert=True))
+            rows += 1
+        writer.flush()
+
+        logging.info(f'Rebuilt {rows} daily rollup rows')
+        return rows
+
+
+    def delete_stale_transactions(self, wallet_address, transactions):
+        """Delete a wallet's stored transactions that are not in `transactions`, its complete re-extracted history."""
+        kept = {transaction["tx_hash"] for transaction in transactions}
+        stale = [document["_id"] for document in self.transaction_collection.find({"wallet_address": wallet_address},
+                                                                                  {"_id": 1, "tx_hash": 1})
+                 if document.get("tx_hash") not in kept]
+        if stale:
+            self.transaction_collection.delete_many({"_id": {"$in": stale}})
+        return len(stale)
+
+
+    def reextract(self, wallet_addresses=None, workers=None, chunk_size=50):
+        """Rebuild wallet records with the current parsing code by replaying each wallet's stored fetches,
+        oldest first. Run it while ingestion is paused: stale transactions are deleted."""
+        if self.snapshot_store is None:
+            logging.warning('Snapshot store is disabled, nothing to re-extract')
+            return {"replayed": 0, "failed": 0, "stale": 0}
+
+        wallets = list(self.snapshot_store.wallet_fetches(wallet_addresses))
+        chunks = [wallets[start:start + chunk_size] for start in range(0, len(wallets), chunk_size)]
+        replayed = []
+        failed = 0
+        stale = 0
+
+        with metrics.timer("snapshot_reextract"), ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            for results in executor.map(replay_wallets, chunks):
+                for wallet_address, fetched_at, wallet_data, complete, error in results:
+                    if wallet_data is None:
+                        failed += 1
+                        logging.warning(f'Could not re-extract {wallet_address}: {error}')
+                        continue
+                    if error:
+                        logging.warning(f'Re-extracted {wallet_address} without some snapshots: {error}')
+                    self.save_mongodb(wallet_data, replace=True, scraped_at=int(fetched_at))
+                    # Only a whole history says which stored rows the parsers no longer produce.
+                    if complete:
+                        stale += self.delete_stale_transactions(wallet_address, wallet_data["transaction_history"])
+                    replayed.append(wallet_address)
+        self.writer.flush()
+
+        # Replaced transactions can change amounts and types, which the incremental rollups never see.
+        if replayed:
+            self.rebuild_rollups(replayed)
+        logging.info(f'Re-extracted {len(replayed)} wallets from snapshots, {failed} failed, '
+                     f'{stale} stale transactions deleted')
+        return {"replayed": len(replayed), "failed": failed, "stale": stale}
+
+
     async def process_wallets(self, wallet_file):
         if not os.path.exists(wallet_file):
             logging.info(f"Error: File '{wallet_file} not found.")
             return
         
-        with open(wallet_file, 'r') as f:
-            wallet_addresses = [line.strip() for line in f if line.strip()]
+        wallet_addresses = list(dict.fromkeys(wallet_address for wallet_address in iter_wallet_addresses(wallet_file)
+                                              if wallet_address is not None))
         
-        logging.info(f'Found {len(wallet_addresses)} wallet addresses in the file.')
+        logging.info(f'Found {len(wallet_addresses)} unique wallet addresses in the file.')
+
+        # A run is one version of the wallet file; only a run that was interrupted leaves its journal behind.
+        stat = os.stat(wallet_file)
+        run_id = f'{os.path.abspath(wallet_file)}:{stat.st_mtime_ns}:{stat.st_size}'
+        journal = IngestionJournal(self.journal_path)
+        completed = journal.start(run_id)
+        pending_addresses = [wallet_address for wallet_address in wallet_addresses if wallet_address not in completed]
+        if len(pending_addresses) < len(wallet_addresses):
+            logging.info(f'Resuming: skip {len(wallet_addresses) - len(pending_addresses)} wallets completed by an interrupted run.')
+
+        try:
+            await self.ingest(pending_addresses, journal)
+            # Failed wallets are finished for this run too; the next run scrapes every wallet again.
+            _, _, failed = journal.load()
+            if failed:
+                logging.info(f'{len(failed)} wallets failed in this run.')
+            journal.reset()
+        finally:
+            journal.close()
+
+
+    async def ingest(self, wallet_addresses, journal=None):
+        # Several ingests can run at once, each on its own event loop (see ingest_wallet), so the browser and
+        # the HTTP client belong to this call; watermarks are merged, not replaced.
+        watermarks = await asyncio.to_thread(self.load_watermarks, wallet_addresses)
+        self.watermarks.update(watermarks)
+        logging.info(f'Loaded watermarks for {len(watermarks)} tracked wallets.')
 
-        tasks = [self.scrape_wallet_data(wallet_address) for wallet_address in wallet_addresses]
-        results = await asyncio.gather(*tasks)
+        num_workers = max(min(self.num_workers, len(wallet_addresses)), 1)
+        browser = Browser()
+        context_pool = BrowserContextPool(browser, num_workers)
+        rate_limiter = TokenBucket(rate=1 / self.rate_limit_delay, capacity=self.rate_limit_burst)
+        extractor = self.get_extractor().open() if self.use_fast_path else None
 
-        for wallet_data in results:
+        async def scrape(wallet_address, browser_context):
+            return await self.scrape_wallet_data(wallet_address, browser_context, extractor)
+
+        async def on_result(wallet_address, wallet_data):
+            # Queuing a wallet can flush a batch, whose rollup and graph updates follow it; keep all of that
+            # off the event loop so the other workers keep scraping.
             if wallet_data:
-                self.save_mongodb(wallet_data)
+                await asyncio.to_thread(self.save_mongodb, wallet_data)
+            elif journal is not None:
+                journal.record([wallet_address], "failed")
+
+        if journal is not None:
+            self.writer.on_flush = lambda keys, result: journal.record(keys, "completed")
+
+        scheduler = IngestionScheduler(handler=scrape,
+                                       context_pool=context_pool,
+                                       rate_limiter=rate_limiter,
+                                       num_workers=num_workers,
+                                       progress_interval=self.progress_interval,
+                                       on_result=on_result)
+
+        try:
+            await context_pool.start()
+            stats = await scheduler.run(wallet_addresses)
+        finally:
+            await context_pool.close()
+            await browser.close()
+            if extractor is not None:
+                await extractor.close()
+            await asyncio.to_thread(self.writer.flush)
+            if journal is not None:
+                self.writer.on_flush = None
+
+        return stats
             
     
+    def get_job_queue(self):
+        return IngestionJobQueue(self.cryto_db.get_job_collection(),
+                                 lease_seconds=cpt.lease_seconds,
+                                 max_attempts=cpt.max_attempts)
+
+
+    def enqueue_wallets(self, wallet_file=None):
+        self.migrate_embedded_transactions()
+        queue = self.get_job_queue()
+        return queue.enqueue_file(wallet_file or self.wallet_file,
+                                  self.cryto_db.get_bulk_writer(queue.collection))
+
+
+    async def keep_lease_alive(self, lease, interval):
+        while True:
+            await asyncio.sleep(interval)
+            open_addresses = lease.open_addresses()
+            if open_addresses:
+                await asyncio.to_thread(lease.queue.heartbeat, lease.worker_id, open_addresses)
+
+
+    async def run_queue_worker(self, worker_id, follow=False):
+        queue = self.get_job_queue()
+        processed = 0
+        logging.info(f'Ingestion worker {worker_id} started')
+
+        while True:
+            wallet_addresses = await asyncio.to_thread(queue.claim, worker_id, self.claim_batch_size)
+            if not wallet_addresses:
+                # Leases held by other workers may still expire and come back, so only stop once nothing is open;
+                # expired leases on their last attempt are failed here, or they would stay open forever.
+                await asyncio.to_thread(queue.requeue_expired)
+                if not follow and not await asyncio.to_thread(queue.has_open_jobs):
+                    break
+                await asyncio.sleep(self.idle_poll_interval)
+                continue
+
+            lease = JobLease(queue, worker_id, wallet_addresses)
+            heartbeat = asyncio.create_task(self.keep_lease_alive(lease, queue.lease_seconds / 3))
+            try:
+                await self.ingest(wallet_addresses, lease)
+            finally:
+                heartbeat.cancel()
+                # Anything neither completed nor failed (e.g. a rejected bulk write) goes back to the queue.
+                await asyncio.to_thread(lease.record, lease.open_addresses(), "failed")
+            processed += len(wallet_addresses)
+
+        logging.info(f'Ingestion worker {worker_id} finished after {processed} wallets: {queue.stats()}')
+        return processed
+
+
+    def is_fresh(self, wallet_address, ttl):
+        document = self.collection.find_one({"wallet_address": wallet_address}, {"_id": 0, "scraped_at": 1})
+        return bool(document and document.get("scraped_at")) and time.time() - document["scraped_at"] < ttl
+
+
+    @contextmanager
+    def wallet_lock(self, wallet_address):
+        """Serialize on-demand scrapes of one wallet; scrapes of different wallets run concurrently."""
+        with self.wallet_locks_guard:
+            lock, holders = self.wallet_locks.get(wallet_address, (None, 0))
+            lock = lock or threading.Lock()
+            self.wallet_locks[wallet_address] = (lock, holders + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self.wallet_locks_guard:
+                lock, holders = self.wallet_locks[wallet_address]
+                if holders == 1:
+                    del self.wallet_locks[wallet_address]
+                else:
+                    self.wallet_locks[wallet_address] = (lock, holders - 1)
+
+
+    def ingest_wallet(self, wallet_address):
+        with self.wallet_lock(wallet_address):
+            asyncio.run(self.ingest([wallet_address]))
+        logging.info(f'Data ingestion completed for {wallet_address}')
+
+
     def run(self):
+        self.migrate_embedded_transactions()
         asyncio.run(self.process_wallets(self.wallet_file))
+        export_metrics()
         logging.info('Data Ingestion Agent completed successfully')
 
@@ -0,0 +1,376 @@
+import re
+import asyncio
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+
+import httpx
+
+from src.utils.logger import logging
+from src.utils.rate_control import CircuitOpenError
+
+
+TX_HASH_PATTERN = re.compile(r'/tx/(0x[0-9a-fA-F]{64})')
+ADDRESS_PATTERN = re.compile(r'/address/(0x[0-9a-fA-F]{40})')
+TOKEN_HREF_PATTERN = re.compile(r'/token/(0x[0-9a-fA-F]{40})')
+DATETIME_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{1,2}:\d{2}:\d{2})')
+AMOUNT_PATTERN = re.compile(r'^([\d,]+(?:\.\d+)?)\s*ETH$')
+TOKEN_AMOUNT_PATTERN = re.compile(r'^([\d,]+(?:\.\d+)?)$')
+TOKEN_SYMBOL_PATTERN = re.compile(r'\(([^()\s]+)\)')
+ETH_BALANCE_PATTERN = re.compile(r'ETH Balance\s*([\d,]+(?:\.\d+)?)\s*ETH', re.IGNORECASE)
+TOKEN_ENTRY_PATTERN = re.compile(r'\(([^()\s]+)\)\s*([\d,]+(?:\.\d+)?)\s*(\S+)')
+FIRST_TXN_PATTERN = re.compile(r'First Txn Sent.*?from\s+(.+?\bago)', re.IGNORECASE | re.DOTALL)
+LATEST_TXN_PATTERN = re.compile(r'(?:Last|Latest) Txn Sent.*?from\s+(.+?\bago)', re.IGNORECASE | re.DOTALL)
+NO_ENTRIES_PATTERN = re.compile(r'There are no matching entries', re.IGNORECASE)
+DECIMALS_PATTERN = re.compile(r'\bwith\s+(\d+)\s+Decimals\b|\bDecimals\s*:?\s*(\d+)\b', re.IGNORECASE)
+
+
+class EtherscanExtractionError(Exception):
+    pass
+
+
+class _PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.text = []
+        self.rows = []
+        self.token_links = []
+        self._row = None
+        self._cell = None
+        self._token_link = None
+
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'tr':
+            self._row = []
+        elif tag == 'td' and self._row is not None:
+            self._cell = {'text': [], 'hrefs': [], 'targets': [], 'titles': []}
+
+        if self._cell is not None:
+            if attrs.get('href'):
+                self._cell['hrefs'].append(attrs['href'])
+            if attrs.get('data-highlight-target'):
+                self._cell['targets'].append(attrs['data-highlight-target'])
+            for key in ('data-bs-title', 'title'):
+                if attrs.get(key):
+                    self._cell['titles'].append(attrs[key])
+
+        if tag == 'a' and TOKEN_HREF_PATTERN.search(attrs.get('href') or ''):
+            self._token_link = {'href': attrs['href'], 'text': []}
+
+
+    def handle_endtag(self, tag):
+        if tag == 'td' and self._cell is not None and self._row is not None:
+            self._cell['text'] = ' '.join(' '.join(self._cell['text']).split())
+            self._row.append(self._cell)
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            if self._row:
+                self.rows.append(self._row)
+            self._row = None
+        elif tag == 'a' and self._token_link is not None:
+            self._token_link['text'] = ' '.join(' '.join(self._token_link['text']).split())
+            self.token_links.append(self._token_link)
+            self._token_link = None
+
+
+    def handle_data(self, data):
+        self.text.append(data)
+        if self._cell is not None:
+            self._cell['text'].append(data)
+        if self._token_link is not None:
+            self._token_link['text'].append(data)
+
+
+def _parse_html(html):
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def _to_float(value):
+    return float(value.replace(',', ''))
+
+
+def parse_address_page(html, wallet_address):
+    parser = _parse_html(html)
+    text = ' '.join(' '.join(parser.text).split())
+
+    balance_match = ETH_BALANCE_PATTERN.search(text)
+    if not balance_match:
+        raise EtherscanExtractionError(f'ETH balance not found for {wallet_address}')
+
+    tokens_held = [{"symbol": "ETH", "contract_address": "native", "decimals": 18}]
+    token_balances = [{"symbol": "ETH", "balance": _to_float(balance_match.group(1))}]
+
+    seen = set()
+    for link in parser.token_links:
+        entry = TOKEN_ENTRY_PATTERN.search(link['text'])
+        contract = TOKEN_HREF_PATTERN.search(link['href']).group(1)
+        if not entry or contract.lower() in seen:
+            continue
+        seen.add(contract.lower())
+        symbol = entry.group(1)
+        tokens_held.append({"symbol": symbol, "contract_address": contract, "decimals": None})
+        token_balances.append({"symbol": symbol, "balance": _to_float(entry.group(2))})
+
+    first_match = FIRST_TXN_PATTERN.search(text)
+    latest_match = LATEST_TXN_PATTERN.search(text)
+
+    return {
+        "wallet_address": wallet_address,
+        "tokens_held": tokens_held,
+        "token_balances": token_balances,
+        "wallet_ages": {
+            "latest": latest_match.group(1).strip() if latest_match else None,
+            "first": first_match.group(1).strip() if first_match else None,
+        },
+    }
+
+
+def _parse_transaction_row(row, wallet_address, token_transfer=False):
+    """One row of /txs, or of /tokentxns with `token_transfer`, where the amount has no unit and
+    a cell links the token."""
+    tx_hash = None
+    timestamp = None
+    amount = None
+    direction = None
+    token = "ETH" if not token_transfer else None
+    addresses = []
+
+    for cell in row:
+        if token_transfer and token is None:
+            token_match = next(filter(None, map(TOKEN_HREF_PATTERN.search, cell['hrefs'])), None)
+            if token_match:
+                symbol_match = TOKEN_SYMBOL_PATTERN.search(cell['text'])
+                token = symbol_match.group(1) if symbol_match else cell['text'] or None
+                continue
+
+        for href in cell['hrefs']:
+            hash_match = TX_HASH_PATTERN.search(href)
+            if hash_match and tx_hash is None:
+                tx_hash = hash_match.group(1)
+
+        if timestamp is None:
+            for candidate in [cell['text']] + cell['titles']:
+                date_match = DATETIME_PATTERN.search(candidate)
+                if date_match:
+                    parsed = datetime.strptime(date_match.group(1), '%Y-%m-%d %H:%M:%S')
+                    timestamp = int(parsed.replace(tzinfo=timezone.utc).timestamp())
+                    break
+
+        if cell['text'].upper() in ('IN', 'OUT', 'SELF'):
+            direction = cell['text'].upper()
+
+        # Linked numbers (e.g. the block) are not amounts.
+        amount_pattern = TOKEN_AMOUNT_PATTERN if token_transfer else AMOUNT_PATTERN
+        amount_match = amount_pattern.match(cell['text']) if not cell['hrefs'] else None
+        if amount_match and amount is None:
+            amount = _to_float(amount_match.group(1))
+
+        cell_addresses = [target for target in cell['targets'] if target.startswith('0x')]
+        if not cell_addresses:
+            cell_addresses = [m.group(1) for m in map(ADDRESS_PATTERN.search, cell['hrefs']) if m]
+        if cell_addresses:
+            addresses.append(cell_addresses[0])
+
+    if tx_hash is None or timestamp is None or amount is None or token is None or len(addresses) < 2:
+        return None
+
+    sender, receiver = addresses[0], addresses[1]
+    if direction is None:
+        direction = 'OUT' if sender.lower() == wallet_address.lower() else 'IN'
+
+    return {
+        "timestamp": timestamp,
+        "tx_hash": tx_hash,
+        "token": token,
+        "amount": amount,
+        "type": "receive" if direction == 'IN' else "send",
+        "asset_type": "ERC-20" if token_transfer else "native",
+        "from": sender,
+        "to": receiver,
+    }
+
+
+def parse_transactions_page(html, wallet_address, token_transfers=False):
+    """Rows of a /txs page, or of a /tokentxns page with `token_transfers`."""
+    parser = _parse_html(html)
+    transactions = []
+    for row in parser.rows:
+        transaction = _parse_transaction_row(row, wallet_address, token_transfers)
+        if transaction:
+            transactions.append(transaction)
+
+    # An empty list has to come from Etherscan's own empty-table notice; anything else means the layout
+    # no longer matches and the browser agent should take over.
+    if not transactions and not NO_ENTRIES_PATTERN.search(' '.join(parser.text)):
+        raise EtherscanExtractionError(f'No transactions parsed for {wallet_address}')
+    return transactions
+
+
+def merge_transfers(transactions, token_transfers):
+    """Native transactions and token transfers as one history, newest first, with one record per tx_hash
+    since stored transactions are keyed by wallet and hash. A token transfer replaces the zero-value contract
+    call that carried it; otherwise the first record of a hash is kept."""
+    merged = {}
+    for transaction in transactions:
+        merged.setdefault(transaction["tx_hash"], transaction)
+    for transfer in token_transfers:
+        existing = merged.get(transfer["tx_hash"])
+        if existing is None or (existing["asset_type"] == "native" and existing["amount"] == 0):
+            merged[transfer["tx_hash"]] = transfer
+    return sorted(merged.values(), key=lambda transaction: transaction["timestamp"], reverse=True)
+
+
+def parse_token_page(html):
+    match = DECIMALS_PATTERN.search(' '.join(' '.join(_parse_html(html).text).split()))
+    return int(match.group(1) or match.group(2)) if match else None
+
+
+def apply_token_decimals(wallet_data, decimals):
+    for token in wallet_data.get("tokens_held", []):
+        if token["decimals"] is None:
+            token["decimals"] = decimals.get(token["contract_address"].lower())
+
+
+def take_until_watermark(transactions, watermark):
+    if not watermark:
+        return list(transactions)
+
+    new_transactions = []
+    for transaction in transactions:
+        if transaction["tx_hash"] == watermark["tx_hash"] or transaction["timestamp"] < watermark["timestamp"]:
+            break
+        new_transactions.append(transaction)
+    return new_transactions
+
+
+class EtherscanExtractor:
+    def __init__(self, base_url, max_connections, timeout, max_pages, page_size, user_agent, endpoint=None,
+                 max_token_pages=0):
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.page_size = page_size
+        self.user_agent = user_agent
+        self.endpoint = endpoint
+        self.max_token_pages = max_token_pages
+        self.token_decimals = {}
+        self.client = None
+
+
+    def open(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            headers={'User-Agent': self.user_agent},
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections)
+        )
+        return self
+
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+    async def __aenter__(self):
+        return self.open()
+
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+    async def _get(self, path, params=None):
+        response = await self.client.get(path, params=params)
+        response.raise_for_status()
+        return response.text
+
+
+    async def fetch(self, path, params=None):
+        if self.endpoint is None:
+            return await self._get(path, params)
+        return await self.endpoint.call_async(self._get, path, params)
+
+
+    async def fetch_transactions_page(self, wallet_address, page, recorder=None, token_transfers=False):
+        path, kind = ('/tokentxns', "token_transfers") if token_transfers else ('/txs', "transactions")
+        html = await self.fetch(path, params={'a': wallet_address, 'ps': self.page_size, 'p': page})
+        if recorder is not None:
+            recorder.add(kind, f"{path}?a={wallet_address}&ps={self.page_size}&p={page}", html)
+        return parse_transactions_page(html, wallet_address, token_transfers)
+
+
+    async def fetch_token_decimals(self, contract_address, recorder=None):
+        """Decimals from the token page; a contract's decimals never change, so each is fetched once."""
+        key = contract_address.lower()
+        if key not in self.token_decimals:
+            try:
+                html = await self.fetch(f'/token/{contract_address}')
+            except (httpx.HTTPError, CircuitOpenError) as e:
+                logging.warning(f'Could not read decimals for token {contract_address}: {e}')
+                return None
+            if recorder is not None:
+                recorder.add("token", f'/token/{contract_address}', html)
+            self.token_decimals[key] = parse_token_page(html)
+        return self.token_decimals[key]
+
+
+    async def fill_token_decimals(self, wallet_data, recorder=None):
+        contracts = [token["contract_address"] for token in wallet_data["tokens_held"]
+                     if token["decimals"] is None][:self.max_token_pages]
+        decimals = await asyncio.gather(*(self.fetch_token_decimals(contract, recorder) for contract in contracts))
+        apply_token_decimals(wallet_data, {contract.lower(): value for contract, value in zip(contracts, decimals)})
+
+
+    async def fetch_transactions(self, wallet_address, watermark=None, first_page=None, recorder=None,
+                                 token_transfers=False):
+        transactions = []
+        for page in range(1, self.max_pages + 1):
+            if page == 1 and first_page is not None:
+                page_transactions = first_page
+            else:
+                page_transactions = await self.fetch_transactions_page(wallet_address, page, recorder,
+                                                                       token_transfers)
+            if not page_transactions:
+                break
+
+            new_transactions = take_until_watermark(page_transactions, watermark)
+            transactions.extend(new_transactions)
+            if len(new_transactions) < len(page_transactions) or len(page_transactions) < self.page_size:
+                break
+        return transactions
+
+
+    async def extract(self, wallet_address, watermark=None, recorder=None):
+        """`recorder`, if given, receives every fetched page as (kind, locator, html)."""
+        first_page = first_token_page = None
+        if watermark:
+            # Incoming token transfers never show up in /txs, so both lists are checked for anything new.
+            first_page, first_token_page = await asyncio.gather(
+                self.fetch_transactions_page(wallet_address, 1, recorder),
+                self.fetch_transactions_page(wallet_address, 1, recorder, token_transfers=True))
+            if ((first_page or first_token_page)
+                    and not any(take_until_watermark(page[:1], watermark) for page in (first_page, first_token_page))):
+                logging.info(f'No new transactions for {wallet_address} since {watermark["tx_hash"]}')
+                return {"wallet_address": wallet_address, "transaction_history": []}
+
+        html = await self.fetch(f'/address/{wallet_address}')
+        if recorder is not None:
+            recorder.add("address", f'/address/{wallet_address}', html)
+        wallet_data = parse_address_page(html, wallet_address)
+        await self.fill_token_decimals(wallet_data, recorder)
+        transactions, token_transfers = await asyncio.gather(
+            self.fetch_transactions(wallet_address, watermark, first_page, recorder),
+            self.fetch_transactions(wallet_address, watermark, first_token_page, recorder, token_transfers=True))
+        wallet_data["transaction_history"] = merge_transfers(transactions, token_transfers)
+
+        logging.info(f'Extracted {len(wallet_data["transaction_history"])} transactions for {wallet_address} over HTTP')
+        return wallet_data
@@ -0,0 +1,165 @@
+import re
+import time
+import threading
+
+from pymongo import ReturnDocument, UpdateOne
+
+from src.utils.logger import logging
+
+
+WALLET_ADDRESS_PATTERN = re.compile(r'^0x[0-9a-f]{40}$')
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def normalize_address(value):
+    """Lower-case and validate a wallet address; returns None for anything that is not one."""
+    address = value.strip().lower()
+    return address if WALLET_ADDRESS_PATTERN.match(address) else None
+
+
+def iter_wallet_addresses(wallet_file):
+    """Stream normalized addresses from a file, one per line, skipping blanks and invalid lines."""
+    with open(wallet_file, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield normalize_address(line)
+
+
+class IngestionJobQueue:
+    """Wallet ingestion jobs in a Mongo collection, claimed by workers under time-limited leases.
+
+    A job's _id is its normalized wallet address, so enqueueing the same address twice is a no-op.
+    A worker that stops heartbeating loses its leases once they expire and the jobs are claimed again.
+    """
+
+    def __init__(self, collection, lease_seconds, max_attempts):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+
+    def enqueue_file(self, wallet_file, writer):
+        read = 0
+        invalid = 0
+        for wallet_address in iter_wallet_addresses(wallet_file):
+            read += 1
+            if wallet_address is None:
+                invalid += 1
+                continue
+            writer.add(UpdateOne({"_id": wallet_address},
+                                 {"$setOnInsert": {"status": PENDING,
+                                                   "attempts": 0,
+                                                   "enqueued_at": time.time()}},
+                                 upsert=True),
+                       key=wallet_address)
+        writer.flush()
+
+        logging.info(f'Enqueued {writer.written} new wallets from {wallet_file} '
+                     f'({read} lines read, {invalid} invalid)')
+        return {"read": read, "invalid": invalid, "enqueued": writer.written}
+
+
+    def claim(self, worker_id, limit):
+        now = time.time()
+        claimable = {"$or": [{"status": PENDING},
+                             {"status": LEASED, "lease_expires_at": {"$lt": now}}],
+                     "attempts": {"$lt": self.max_attempts}}
+        claimed = []
+        for _ in range(limit):
+            job = self.collection.find_one_and_update(
+                claimable,
+                {"$set": {"status": LEASED,
+                          "lease_owner": worker_id,
+                          "lease_expires_at": now + self.lease_seconds},
+                 "$inc": {"attempts": 1}},
+                sort=[("enqueued_at", 1)],
+                projection={"_id": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                break
+            claimed.append(job["_id"])
+        return claimed
+
+
+    def heartbeat(self, worker_id, wallet_addresses):
+        result = self.collection.update_many({"_id": {"$in": list(wallet_addresses)},
+                                              "status": LEASED,
+                                              "lease_owner": worker_id},
+                                             {"$set": {"lease_expires_at": time.time() + self.lease_seconds}})
+        return result.modified_count
+
+
+    def complete(self, worker_id, wallet_addresses):
+        self.collection.update_many({"_id": {"$in": list(wallet_addresses)}, "lease_owner": worker_id},
+                                    {"$set": {"status": DONE, "completed_at": time.time()},
+                                     "$unset": {"lease_owner": "", "lease_expires_at": ""}})
+
+
+    def fail(self, worker_id, wallet_addresses):
+        """Release failed jobs for another attempt, or park them once max_attempts is used up."""
+        owned = {"_id": {"$in": list(wallet_addresses)}, "lease_owner": worker_id}
+        release = {"$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        self.collection.update_many(dict(owned, attempts={"$gte": self.max_attempts}),
+                                    dict(release, **{"$set": {"status": FAILED}}))
+        self.collection.update_many(dict(owned, attempts={"$lt": self.max_attempts}),
+                                    dict(release, **{"$set": {"status": PENDING}}))
+
+
+    def requeue_expired(self):
+        """Return jobs whose lease expired to the queue; a worker that died on the last attempt fails the job,
+        which claim() would otherwise never pick up again."""
+        expired = {"status": LEASED, "lease_expires_at": {"$lt": time.time()}}
+        release = {"$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        failed = self.collection.update_many(dict(expired, attempts={"$gte": self.max_attempts}),
+                                             dict(release, **{"$set": {"status": FAILED}}))
+        result = self.collection.update_many(dict(expired, attempts={"$lt": self.max_attempts}),
+                                             dict(release, **{"$set": {"status": PENDING}}))
+        if result.modified_count or failed.modified_count:
+            logging.info(f'Requeued {result.modified_count} jobs with expired leases, '
+                         f'failed {failed.modified_count} out of attempts')
+        return result.modified_count
+
+
+    def has_open_jobs(self):
+        return self.collection.count_documents({"status": {"$in": [PENDING, LEASED]}}, limit=1) > 0
+
+
+    def stats(self):
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+class JobLease:
+    """Journal-compatible view of one worker's claimed jobs, so DataIngestionAgent.ingest can report
+    completions after the bulk write lands, exactly as it does for the file journal."""
+
+    def __init__(self, queue, worker_id, wallet_addresses):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.open = set(wallet_addresses)
+        # Bulk writes report completions from writer threads while the heartbeat reads open jobs.
+        self.lock = threading.Lock()
+
+
+    def open_addresses(self):
+        with self.lock:
+            return list(self.open)
+
+
+    def record(self, wallet_addresses, status):
+        with self.lock:
+            wallet_addresses = [wallet_address for wallet_address in wallet_addresses if wallet_address in self.open]
+            if not wallet_addresses:
+                return
+            if status == "completed":
+                self.queue.complete(self.worker_id, wallet_addresses)
+            else:
+                self.queue.fail(self.worker_id, wallet_addresses)
+            self.open.difference_update(wallet_addresses)
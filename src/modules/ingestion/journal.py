@@ -0,0 +1,74 @@
+import os
+import json
+import time
+import threading
+
+from src.utils.logger import logging
+
+
+class IngestionJournal:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+
+
+    def load(self):
+        """The run the journal was written for, and the wallets that run completed and failed."""
+        run_id = None
+        completed = set()
+        failed = set()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line behind.
+                    continue
+                if "run_id" in entry:
+                    run_id = entry["run_id"]
+                elif entry["status"] == "completed":
+                    completed.add(entry["wallet_address"])
+                    failed.discard(entry["wallet_address"])
+                else:
+                    failed.add(entry["wallet_address"])
+        return run_id, completed, failed
+
+
+    def start(self, run_id):
+        """Resume `run_id` when the journal was left behind by it, or start it over; returns the wallets
+        already completed. A journal from any other run is discarded."""
+        journal_run_id, completed, _ = self.load()
+        if journal_run_id == run_id:
+            return completed
+
+        self.reset()
+        with self.lock:
+            self.file.write(json.dumps({"run_id": run_id, "at": time.time()}) + "\n")
+            self.file.flush()
+        return set()
+
+
+    def record(self, wallet_addresses, status):
+        with self.lock:
+            for wallet_address in wallet_addresses:
+                self.file.write(json.dumps({"wallet_address": wallet_address,
+                                            "status": status,
+                                            "at": time.time()}) + "\n")
+            self.file.flush()
+
+
+    def reset(self):
+        with self.lock:
+            self.file.close()
+            self.file = open(self.path, 'w', encoding='utf-8')
+        logging.info(f'Ingestion journal {self.path} reset')
+
+
+    def close(self):
+        with self.lock:
+            self.file.close()
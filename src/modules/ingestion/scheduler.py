@@ -0,0 +1,153 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+    async def acquire(self):
+        async with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class BrowserContextPool:
+    def __init__(self, browser, size):
+        self.browser = browser
+        self.size = size
+        self.contexts = []
+        self.available = asyncio.Queue()
+
+
+    async def start(self):
+        for _ in range(self.size):
+            context = await self.browser.new_context()
+            self.contexts.append(context)
+            self.available.put_nowait(context)
+        logging.info(f'Browser context pool started with {self.size} contexts')
+
+
+    @asynccontextmanager
+    async def acquire(self):
+        context = await self.available.get()
+        try:
+            yield context
+        finally:
+            self.available.put_nowait(context)
+
+
+    async def close(self):
+        for context in self.contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logging.error(f'Error closing browser context: {e}')
+        self.contexts = []
+
+
+class IngestionScheduler:
+    """Runs `handler` over items on `num_workers` workers; `on_result` is a coroutine function
+    awaited by the worker that produced the result."""
+
+    def __init__(self, handler, context_pool, rate_limiter, num_workers, progress_interval, on_result=None):
+        self.handler = handler
+        self.on_result = on_result
+        self.context_pool = context_pool
+        self.rate_limiter = rate_limiter
+        self.num_workers = num_workers
+        self.progress_interval = progress_interval
+
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.started_at = None
+
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            result = None
+            try:
+                await self.rate_limiter.acquire()
+                self.in_flight += 1
+                async with self.context_pool.acquire() as context:
+                    result = await self.handler(item, context)
+            except Exception as e:
+                logging.error(f'Worker failed on {item}: {e}')
+            finally:
+                self.in_flight -= 1
+
+            try:
+                if result is None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                if self.on_result is not None:
+                    await self.on_result(item, result)
+            except Exception as e:
+                logging.error(f'Result callback failed on {item}: {e}')
+            finally:
+                queue.task_done()
+
+
+    def _log_progress(self, queue):
+        elapsed = time.monotonic() - self.started_at
+        done = self.completed + self.failed
+        throughput = done / elapsed if elapsed > 0 else 0.0
+        metrics.set_gauge("ingestion_queue_depth", queue.qsize())
+        metrics.set_gauge("ingestion_in_flight", self.in_flight)
+        metrics.set_gauge("ingestion_throughput_wallets_per_second", throughput)
+        logging.info(
+            f'Ingestion progress: {done}/{self.total} done '
+            f'({self.completed} ok, {self.failed} failed), '
+            f'queue depth {queue.qsize()}, in flight {self.in_flight}, '
+            f'throughput {throughput:.2f} wallets/s'
+        )
+
+
+    async def _report(self, queue):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self._log_progress(queue)
+
+
+    async def run(self, items):
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        self.total = queue.qsize()
+        self.started_at = time.monotonic()
+
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.num_workers)]
+        reporter = asyncio.create_task(self._report(queue))
+
+        try:
+            await queue.join()
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+
+        self._log_progress(queue)
+        return {"total": self.total, "completed": self.completed, "failed": self.failed}
@@ -0,0 +1,110 @@
+import json
+from types import SimpleNamespace
+
+from src.utils.common import find_valid_json, post_process_result
+from src.utils.snapshot_store import SnapshotStore
+from src.modules.ingestion.etherscan_extractor import (parse_address_page,
+                                                       parse_transactions_page,
+                                                       parse_token_page,
+                                                       apply_token_decimals,
+                                                       merge_transfers)
+from src.modules.ingestion.wallet_schema import validate_wallet_record, merge_sections
+
+
+def history_contents(result):
+    """Every step's extracted content from an agent history, so find_valid_json can be re-run on it later."""
+    contents = []
+    for step in result.history:
+        try:
+            contents.append(str(step.result[0].extracted_content))
+        except (KeyError, IndexError, TypeError, AttributeError):
+            contents.append(None)
+    return json.dumps(contents)
+
+
+def history_from_contents(content):
+    return SimpleNamespace(history=[
+        SimpleNamespace(result=[SimpleNamespace(extracted_content=step)] if step is not None else [])
+        for step in json.loads(content)
+    ])
+
+
+def replay_http(wallet_address, pages):
+    wallet_data = {"wallet_address": wallet_address}
+    transactions = []
+    token_transfers = []
+    decimals = {}
+    for kind, locator, content in pages:
+        if kind == "address":
+            wallet_data.update(parse_address_page(content, wallet_address))
+        elif kind == "transactions":
+            transactions.extend(parse_transactions_page(content, wallet_address))
+        elif kind == "token_transfers":
+            token_transfers.extend(parse_transactions_page(content, wallet_address, token_transfers=True))
+        elif kind == "token":
+            decimals[locator.rsplit('/', 1)[-1].lower()] = parse_token_page(content)
+    apply_token_decimals(wallet_data, decimals)
+    wallet_data["transaction_history"] = merge_transfers(transactions, token_transfers)
+    return wallet_data
+
+
+def replay_browser(wallet_address, pages):
+    record = None
+    for kind, locator, content in pages:
+        data = post_process_result(find_valid_json(history_from_contents(content)))
+        if kind == "browser_task":
+            if data is None:
+                return None
+            record, _ = validate_wallet_record(data, wallet_address)
+        elif record is not None:
+            record, _ = merge_sections(record, data, locator.split(","))
+    return record
+
+
+def replay_fetch(fetch):
+    """Rebuild the wallet record a stored fetch would produce with the current parsing code."""
+    pages = [(kind, locator, SnapshotStore.read_object_file(path)) for kind, locator, path in fetch["pages"]]
+    if fetch["source"] == "http":
+        return replay_http(fetch["wallet_address"], pages)
+    return replay_browser(fetch["wallet_address"], pages)
+
+
+def merge_records(records):
+    """Fold the records replayed from one wallet's fetches, oldest first: later fields win, and transactions
+    are united by tx_hash with the latest parse of each kept."""
+    merged = {}
+    transactions = {}
+    for record in records:
+        for transaction in record.get("transaction_history") or []:
+            transactions[transaction["tx_hash"]] = transaction
+        merged.update((key, value) for key, value in record.items() if key != "transaction_history")
+    merged["transaction_history"] = list(transactions.values())
+    return merged
+
+
+def replay_wallets(wallets):
+    """Replay each wallet's chain from SnapshotStore.wallet_fetches as
+    (wallet_address, fetched_at, wallet_data, complete, error). `complete` is only True when the chain starts
+    with a full-history fetch and every fetch in it replayed, so the result holds the wallet's whole history."""
+    results = []
+    for wallet in wallets:
+        records = []
+        errors = []
+        for fetch in wallet["fetches"]:
+            try:
+                record = replay_fetch(fetch)
+            except Exception as e:
+                record = None
+                error = str(e)
+            else:
+                error = None if record is not None else "no valid JSON in stored result"
+            if error is not None:
+                errors.append(f'fetch at {fetch["fetched_at"]:.0f}: {error}')
+            else:
+                records.append(record)
+        results.append((wallet["wallet_address"],
+                        wallet["fetches"][-1]["fetched_at"],
+                        merge_records(records) if records else None,
+                        wallet["complete"] and not errors,
+                        "; ".join(errors) or None))
+    return results
@@ -0,0 +1,126 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator
+
+
+class TokenHeld(BaseModel):
+    symbol: str
+    contract_address: str
+    decimals: Optional[int] = None
+
+
+class TokenBalance(BaseModel):
+    symbol: str
+    balance: float
+
+    @field_validator("balance", mode="before")
+    @classmethod
+    def parse_balance(cls, value):
+        if isinstance(value, str):
+            return value.replace(',', '').split()[0]
+        return value
+
+
+class WalletAges(BaseModel):
+    latest: Optional[str] = None
+    first: Optional[str] = None
+
+
+class Transaction(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    timestamp: int
+    tx_hash: str
+    token: str
+    amount: float
+    type: Literal["send", "receive"]
+    asset_type: str = "native"
+    sender: Optional[str] = Field(default=None, alias="from")
+    receiver: Optional[str] = Field(default=None, alias="to")
+
+    @field_validator("amount", mode="before")
+    @classmethod
+    def parse_amount(cls, value):
+        if isinstance(value, str):
+            return value.replace(',', '').split()[0]
+        return value
+
+    @field_validator("type", mode="before")
+    @classmethod
+    def normalize_type(cls, value):
+        if isinstance(value, str):
+            value = value.strip().lower()
+            return {"in": "receive", "out": "send"}.get(value, value)
+        return value
+
+
+SECTION_ADAPTERS = {
+    "tokens_held": TypeAdapter(List[TokenHeld]),
+    "token_balances": TypeAdapter(List[TokenBalance]),
+    "wallet_ages": TypeAdapter(WalletAges),
+}
+TRANSACTION_ADAPTER = TypeAdapter(Transaction)
+SECTIONS = ("tokens_held", "token_balances", "wallet_ages", "transaction_history")
+
+
+def _dump(value):
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    return value
+
+
+def validate_transactions(transactions):
+    """Validate transactions one by one, dropping the rows that do not fit the schema."""
+    if not isinstance(transactions, list):
+        return None, 0
+
+    valid = []
+    for transaction in transactions:
+        try:
+            valid.append(TRANSACTION_ADAPTER.validate_python(transaction).model_dump(by_alias=True))
+        except ValidationError:
+            continue
+    return valid, len(transactions) - len(valid)
+
+
+def validate_wallet_record(data, wallet_address):
+    """Validate a scraped wallet record section by section.
+
+    Returns the record with every valid section normalized, and the names of the
+    sections that are missing or invalid so that only those need to be scraped again.
+    """
+    record = {"wallet_address": wallet_address}
+    invalid_sections = []
+    data = data if isinstance(data, dict) else {}
+
+    for section in SECTIONS:
+        value = data.get(section)
+        if value is None:
+            invalid_sections.append(section)
+            continue
+
+        if section == "transaction_history":
+            transactions, dropped = validate_transactions(value)
+            if transactions is None or (dropped and not transactions):
+                invalid_sections.append(section)
+            else:
+                record[section] = transactions
+            continue
+
+        try:
+            record[section] = _dump(SECTION_ADAPTERS[section].validate_python(value))
+        except ValidationError:
+            invalid_sections.append(section)
+
+    return record, invalid_sections
+
+
+def merge_sections(record, data, sections):
+    """Merge re-scraped sections into a partially valid record."""
+    patch, invalid_sections = validate_wallet_record(data, record["wallet_address"])
+    for section in sections:
+        if section in patch:
+            record[section] = patch[section]
+    return record, [section for section in sections if section in invalid_sections]
@@ -0,0 +1,233 @@
+import time
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+from src.config.app_config import CryptoConfig as cc
+from src.modules.ingestion.job_queue import normalize_address
+
+
+class ServiceBusyError(Exception):
+    pass
+
+
+class AnalysisService:
+    """Serves wallet analyses with per-wallet single-flight, a short TTL cache and a bounded executor.
+
+    `handler` is a blocking callable taking a wallet address, normally AgentController.get_response.
+    `graph_catch_up`, if given, is a blocking callable run every `graph_catch_up_interval` seconds to add
+    transactions that did not reach the graph from this process's bulk writes.
+    """
+
+    def __init__(self, handler, cache_ttl, cache_max_entries, max_workers, max_pending, graph=None,
+                 graph_catch_up=None, graph_catch_up_interval=None):
+        self.handler = handler
+        self.graph = graph
+        self.graph_catch_up = graph_catch_up
+        self.graph_catch_up_interval = graph_catch_up_interval
+        self.graph_catch_up_task = None
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wallet-analysis')
+
+        self.cache = OrderedDict()
+        self.in_flight = {}
+
+
+    def get_cached(self, wallet_address):
+        entry = self.cache.get(wallet_address)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self.cache[wallet_address]
+            return None
+        self.cache.move_to_end(wallet_address)
+        return result
+
+
+    def set_cached(self, wallet_address, result):
+        self.cache[wallet_address] = (time.monotonic() + self.cache_ttl, result)
+        self.cache.move_to_end(wallet_address)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+
+
+    async def _run(self, wallet_address):
+        loop = asyncio.get_running_loop()
+        try:
+            with metrics.timer("service_analysis", wallet_address=wallet_address):
+                result = await loop.run_in_executor(self.executor, self.handler, wallet_address)
+            self.set_cached(wallet_address, result)
+            return result
+        finally:
+            del self.in_flight[wallet_address]
+
+
+    async def analyze(self, wallet_address):
+        """`wallet_address` must be normalized, as it keys the cache, the in-flight map and the stored wallet."""
+        result = self.get_cached(wallet_address)
+        if result is not None:
+            metrics.inc("service_requests_total", outcome="cache_hit")
+            return result
+
+        task = self.in_flight.get(wallet_address)
+        if task is not None:
+            metrics.inc("service_requests_total", outcome="coalesced")
+        else:
+            if len(self.in_flight) >= self.max_pending:
+                metrics.inc("service_requests_total", outcome="rejected")
+                raise ServiceBusyError(f'{len(self.in_flight)} analyses already in flight')
+            metrics.inc("service_requests_total", outcome="started")
+            task = self.in_flight[wallet_address] = asyncio.ensure_future(self._run(wallet_address))
+
+        # Shield so a client disconnecting does not cancel the work other waiters share.
+        return await asyncio.shield(task)
+
+
+    @staticmethod
+    def invalid_address(value):
+        return web.json_response({"error": f"invalid wallet address: {value}"}, status=400)
+
+
+    async def handle_analysis(self, request):
+        # Addresses are case-insensitive; normalizing here keeps checksum and lower-case requests on one
+        # cache entry and one stored wallet, as file ingestion does.
+        wallet_address = normalize_address(request.match_info['wallet_address'])
+        if wallet_address is None:
+            return self.invalid_address(request.match_info['wallet_address'])
+
+        try:
+            result = await self.analyze(wallet_address)
+        except ServiceBusyError as e:
+            return web.json_response({"error": str(e)}, status=503, headers={"Retry-After": "5"})
+        except Exception as e:
+            logging.error(f'Analysis failed for {wallet_address}: {e}')
+            return web.json_response({"error": "analysis failed"}, status=500)
+        return web.json_response({"wallet_address": wallet_address, **result})
+
+
+    async def handle_counterparties(self, request):
+        if self.graph is None:
+            return web.json_response({"error": "counterparty graph is disabled"}, status=404)
+        wallet_address = normalize_address(request.match_info['wallet_address'])
+        if wallet_address is None:
+            return self.invalid_address(request.match_info['wallet_address'])
+
+        if 'shared_with' in request.query:
+            other = normalize_address(request.query['shared_with'])
+            if other is None:
+                return self.invalid_address(request.query['shared_with'])
+            return web.json_response({"wallet_address": wallet_address,
+                                      "shared_with": other,
+                                      "counterparties": self.graph.shared_counterparties(wallet_address, other)})
+
+        try:
+            k = int(request.query.get('k', 10))
+        except ValueError:
+            k = 0
+        if k < 1:
+            return web.json_response({"error": f"k must be a positive integer: {request.query['k']}"}, status=400)
+        return web.json_response({"wallet_address": wallet_address,
+                                  "counterparties": self.graph.top_counterparties(wallet_address, k),
+                                  "cluster": self.graph.cluster(wallet_address, limit=k)})
+
+
+    async def handle_health(self, request):
+        return web.json_response({"status": "ok",
+                                  "in_flight": len(self.in_flight),
+                                  "cached": len(self.cache)})
+
+
+    async def handle_metrics(self, request):
+        return web.Response(text=metrics.export_prometheus(), content_type='text/plain')
+
+
+    async def catch_up_graph(self):
+        while True:
+            await asyncio.sleep(self.graph_catch_up_interval)
+            try:
+                await asyncio.to_thread(self.graph_catch_up)
+            except Exception as e:
+                logging.error(f'Counterparty graph catch-up failed: {e}')
+
+
+    async def on_startup(self, app):
+        if self.graph_catch_up is not None and self.graph_catch_up_interval:
+            self.graph_catch_up_task = asyncio.create_task(self.catch_up_graph())
+
+
+    async def on_cleanup(self, app):
+        if self.graph_catch_up_task is not None:
+            self.graph_catch_up_task.cancel()
+            await asyncio.gather(self.graph_catch_up_task, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.graph is not None:
+            await asyncio.to_thread(self.graph.save, cc.graph_snapshot_path)
+
+
+    def build_app(self):
+        app = web.Application()
+        app.add_routes([web.get('/wallets/{wallet_address}/analysis', self.handle_analysis),
+                        web.get('/wallets/{wallet_address}/counterparties', self.handle_counterparties),
+                        web.get('/health', self.handle_health),
+                        web.get('/metrics', self.handle_metrics)])
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+
+def create_service(stub=False, stub_scrape_delay=1.0, stub_transactions=200):
+    # Text reports go to one fixed path and would be clobbered by concurrent requests;
+    # the report sink still records every result.
+    cc.reports_render_text = False
+
+    if stub:
+        from src.service.stubs import use_in_memory_mongo, use_stub_backends
+        use_in_memory_mongo()
+
+    from src.modules.agent_controller import AgentController
+    controller = AgentController()
+    if stub:
+        use_stub_backends(controller, scrape_delay=stub_scrape_delay, num_transactions=stub_transactions)
+
+    graph = graph_catch_up = None
+    if cc.graph_enabled:
+        from src.modules.analysis.counterparty_graph import get_counterparty_graph, catch_up_counterparty_graph
+        graph = get_counterparty_graph()
+        graph_catch_up = catch_up_counterparty_graph
+
+    return AnalysisService(handler=controller.get_response,
+                           cache_ttl=cc.service_cache_ttl,
+                           cache_max_entries=cc.service_cache_max_entries,
+                           max_workers=cc.service_max_workers,
+                           max_pending=cc.service_max_pending,
+                           graph=graph,
+                           graph_catch_up=graph_catch_up,
+                           graph_catch_up_interval=cc.graph_catch_up_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve wallet analyses over HTTP.')
+    parser.add_argument('--host', default=cc.service_host)
+    parser.add_argument('--port', type=int, default=cc.service_port)
+    parser.add_argument('--stub', action='store_true',
+                        help='Use in-memory Mongo, synthetic scrapes and a stub LLM for local testing')
+    parser.add_argument('--stub-scrape-delay', type=float, default=1.0)
+    parser.add_argument('--stub-transactions', type=int, default=200)
+    args = parser.parse_args()
+
+    service = create_service(stub=args.stub,
+                             stub_scrape_delay=args.stub_scrape_delay,
+                             stub_transactions=args.stub_transactions)
+    web.run_app(service.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
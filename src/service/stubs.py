@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+from src.config.app_config import DatabaseConfig
+from src.database.base_database import BaseDatabase
+from src.utils.synthetic_wallets import generate_wallet
+
+
+class StubCompletions:
+    """Stands in for client.chat.completions so the wallet age path runs without a model server."""
+
+    def create(self, model, messages, **params):
+        usage = SimpleNamespace(prompt_tokens=sum(len(m["content"]) // 4 for m in messages), completion_tokens=32)
+        message = SimpleNamespace(content="The wallet shows long-term, steady activity.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class StubChatClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=StubCompletions())
+
+
+def use_in_memory_mongo():
+    """Route every CryptoDatabase to one mongomock client instead of a server."""
+    import mongomock
+    from mongomock.collection import BulkOperationBuilder
+
+    # pymongo >= 4.9 passes `sort` to bulk update ops, which mongomock 4.x does not accept yet.
+    add_update = BulkOperationBuilder.add_update
+    BulkOperationBuilder.add_update = lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs)
+
+    config = DatabaseConfig().init_database()
+    BaseDatabase.register_client(BaseDatabase.build_url(config['hostname'], config['port']), mongomock.MongoClient())
+
+
+def stub_scraper(delay, num_transactions, num_tokens=10):
+    """Replacement for DataIngestionAgent.scrape_wallet_data that returns a synthetic wallet after `delay` seconds."""
+
+    async def scrape_wallet_data(wallet_address, browser_context=None, extractor=None):
+        await asyncio.sleep(delay)
+        seed = int(hashlib.sha1(wallet_address.encode()).hexdigest()[:8], 16)
+        return generate_wallet(num_transactions, num_tokens=num_tokens, seed=seed, wallet_address=wallet_address)
+
+    return scrape_wallet_data
+
+
+def use_stub_backends(controller, scrape_delay=1.0, num_transactions=200):
+    """Swap the scrape and LLM backends of an AgentController for local stand-ins."""
+    ingestion_agent = controller.data_ingestion_agent
+    ingestion_agent.use_fast_path = False
+    ingestion_agent.scrape_wallet_data = stub_scraper(scrape_delay, num_transactions)
+    controller.wallet_age_agent.client = StubChatClient()
+    return controller
+
+
+def rate_limited_app(max_concurrency, latency=0.05):
+    """aiohttp app that answers 429 whenever more than `max_concurrency` requests are in flight."""
+    from aiohttp import web
+
+    state = {"in_flight": 0, "served": 0, "throttled": 0}
+
+    async def handle(request):
+        if state["in_flight"] >= max_concurrency:
+            state["throttled"] += 1
+            return web.Response(status=429, text="Too Many Requests")
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            state["in_flight"] -= 1
+        state["served"] += 1
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app["state"] = state
+    app.router.add_route("*", "/{tail:.*}", handle)
+    return app
@@ -1,8 +1,8 @@
 import yaml
-import re
-import json
+import math
 
 from src.utils.logger import logging
+from src.utils.json_repair import repair_json
 
 
 def read_yaml_file(file_path):
@@ -19,25 +19,41 @@ def read_yaml_file(file_path):
 
 
 def find_valid_json(data):
+    fallback = None
     for i in range(-1, -len(data.history) - 1, -1): 
         try:
             extracted_content = str(data.history[i].result[0].extracted_content)
             if "```json" in extracted_content:
                 return extracted_content  
+            if fallback is None and "{" in extracted_content:
+                fallback = extracted_content
         except (KeyError, IndexError, TypeError) as e:
             continue 
 
-    return None  
+    return fallback  
 
 
 def post_process_result(data):
-    match = re.search(r'```json\n(.*?)\n```', data, re.DOTALL)
-    if match:
-        json_str = match.group(1)  
-        data_dict = json.loads(json_str)  
-        return data_dict
-    else:
+    if not data:
         return None
+    data_dict = repair_json(data)
+    return data_dict if isinstance(data_dict, dict) else None
+
+
+def summarize_latencies(latencies):
+    if not latencies:
+        return {"count": 0}
+
+    ordered = sorted(latencies)
+
+    def percentile(value):
+        return ordered[max(math.ceil(value / 100 * len(ordered)) - 1, 0)]
+
+    return {"count": len(ordered),
+            "p50": percentile(50),
+            "p90": percentile(90),
+            "p99": percentile(99),
+            "max": ordered[-1]}
 
 
 def write_json_to_text(data, output_text_file):
@@ -64,20 +80,16 @@ def write_json_to_text(data, output_text_file):
 
 def save_trend_analysis_to_file(trend_results, conclusion, filename):
     with open(filename, "w") as file:
-        file.write("30-Day Trend:\n")
-        file.write(f"- Overall change: {trend_results['30_day_trend']['overall_change']}\n")
-        file.write(f"- Notable changes: {trend_results['30_day_trend']['notable_changes']}\n")
-        file.write(f"- Transaction patterns: {trend_results['30_day_trend']['transaction_patterns']}\n")
-
-        file.write("\n90-Day Trend:\n")
-        file.write(f"- Overall change: {trend_results['90_day_trend']['overall_change']}\n")
-        file.write(f"- Notable changes: {trend_results['90_day_trend']['notable_changes']}\n")
-        file.write(f"- Transaction patterns: {trend_results['90_day_trend']['transaction_patterns']}\n")
-
-        file.write("\n180-Day Trend:\n")
-        file.write(f"- Overall change: {trend_results['180_day_trend']['overall_change']}\n")
-        file.write(f"- Notable changes: {trend_results['180_day_trend']['notable_changes']}\n")
-        file.write(f"- Transaction patterns: {trend_results['180_day_trend']['transaction_patterns']}\n")
+        for index, (timeframe, trend) in enumerate(trend_results.items()):
+            days = timeframe.split('_')[0]
+            if index > 0:
+                file.write("\n")
+            file.write(f"{days}-Day Trend:\n")
+            file.write(f"- Overall change: {trend['overall_change']}\n")
+            if trend.get('value_change_usd') is not None:
+                file.write(f"- Portfolio value change: {trend['value_change_usd']:+,.2f} USD\n")
+            file.write(f"- Notable changes: {trend['notable_changes']}\n")
+            file.write(f"- Transaction patterns: {trend['transaction_patterns']}\n")
 
         file.write("\nConclusion:\n")
         file.write(conclusion)
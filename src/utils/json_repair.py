@@ -0,0 +1,85 @@
+import re
+import json
+
+
+FENCE_PATTERN = re.compile(r'```(?:json)?\s*(.*?)(?:```|$)', re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r',(\s*[}\]])')
+CLOSERS = {'{': '}', '[': ']'}
+
+
+def _scan(text):
+    """Copy text while dropping unmatched closing brackets.
+
+    Returns the kept characters, the brackets still open at the end, whether the text
+    ended inside a string, and cut points (offset, open brackets) after each complete value.
+    """
+    out = []
+    stack = []
+    cut_points = []
+    in_string = False
+    escaped = False
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(char)
+        elif char in '}]':
+            if not stack or CLOSERS[stack[-1]] != char:
+                continue
+            stack.pop()
+            out.append(char)
+            cut_points.append((len(out), list(stack)))
+            continue
+        elif char == ',':
+            cut_points.append((len(out), list(stack)))
+        out.append(char)
+
+    return ''.join(out), stack, in_string, cut_points
+
+
+def _close(text, stack):
+    text = TRAILING_COMMA_PATTERN.sub(r'\1', text.rstrip().rstrip(','))
+    return text + ''.join(CLOSERS[bracket] for bracket in reversed(stack))
+
+
+def repair_json(text, max_attempts=20):
+    """Parse JSON produced by an LLM, tolerating code fences, trailing commas,
+    stray closing brackets and output truncated mid-value. Returns None if nothing parses."""
+    if not text:
+        return None
+
+    fenced = FENCE_PATTERN.search(text)
+    if fenced and '{' in fenced.group(1):
+        text = fenced.group(1)
+    start = text.find('{')
+    if start < 0:
+        return None
+    text = text[start:]
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    scanned, stack, in_string, cut_points = _scan(text)
+    candidates = [_close(scanned + ('"' if in_string else ''), stack)]
+    for offset, open_brackets in reversed(cut_points[-max_attempts:]):
+        candidates.append(_close(scanned[:offset], open_brackets))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
@@ -0,0 +1,32 @@
+import json
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from src.utils.llm_cache import get_llm_cache
+
+
+class LangChainLLMCache(BaseCache):
+    def __init__(self, cache):
+        self.cache = cache
+
+
+    def lookup(self, prompt, llm_string):
+        value = self.cache.get(self.cache.make_key(llm_string, {}, prompt))
+        if value is None:
+            return None
+        return [loads(generation) for generation in json.loads(value)]
+
+
+    def update(self, prompt, llm_string, return_val):
+        value = json.dumps([dumps(generation) for generation in return_val])
+        self.cache.set(self.cache.make_key(llm_string, {}, prompt), value)
+
+
+    def clear(self, **kwargs):
+        self.cache.clear()
+
+
+def get_langchain_cache():
+    cache = get_llm_cache()
+    return LangChainLLMCache(cache) if cache is not None else None
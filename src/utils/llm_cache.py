@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from src.utils.logger import logging
+from src.config.app_config import CryptoConfig as cc
+
+
+class LLMCache:
+    def __init__(self, path, max_entries, ttl_seconds):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)")
+
+
+    @staticmethod
+    def make_key(model, params, messages):
+        payload = json.dumps({"model": model, "params": params, "messages": messages},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self.connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.connection.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                                    (key, value, now, now))
+            self.connection.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM llm_cache")
+
+
+    def stats(self):
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries}
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _llm_cache
+    if not cc.llm_cache_enabled:
+        return None
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(path=cc.llm_cache_path,
+                                  max_entries=cc.llm_cache_max_entries,
+                                  ttl_seconds=cc.llm_cache_ttl_seconds)
+            logging.info(f'LLM response cache opened at {cc.llm_cache_path}')
+    return _llm_cache
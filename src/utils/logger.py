@@ -1,6 +1,8 @@
+import os
 import logging
 
 log_filename = "logs/api.log"
+os.makedirs(os.path.dirname(log_filename), exist_ok=True)
 
 logging.basicConfig(
     level=logging.INFO,  
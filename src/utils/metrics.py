@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from src.utils.logger import logging
+from src.config.app_config import CryptoConfig as cc
+
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, max_spans):
+        self.max_spans = max_spans
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.spans = []
+        self.started_at = time.time()
+
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+
+    def record_span(self, name, started_at, duration, **attributes):
+        with self.lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append({"name": name,
+                                   "ph": "X",
+                                   "ts": int(started_at * 1e6),
+                                   "dur": int(duration * 1e6),
+                                   "pid": os.getpid(),
+                                   "tid": threading.get_ident(),
+                                   "args": attributes})
+
+
+    @contextmanager
+    def timer(self, stage, wallet_address=None, **labels):
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            self.observe(f"{stage}_duration_seconds", duration, **labels)
+            attributes = dict(labels)
+            if wallet_address is not None:
+                attributes["wallet_address"] = wallet_address
+            self.record_span(stage, started_at, duration, **attributes)
+
+
+    def export_prometheus(self):
+        lines = []
+        with self.lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric_name, label_key), value in sorted(metrics.items()):
+                        if metric_name == name:
+                            lines.append(f"{name}{_format_labels(label_key)} {value}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric_name, label_key), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if metric_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(label_key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(label_key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(label_key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+    def export_trace(self):
+        with self.lock:
+            return {"traceEvents": list(self.spans), "displayTimeUnit": "ms"}
+
+
+    def write(self, prometheus_path, trace_path):
+        for path, content in ((prometheus_path, self.export_prometheus()),
+                              (trace_path, json.dumps(self.export_trace()))):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        logging.info(f'Metrics written to {prometheus_path} and {trace_path}')
+
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.spans.clear()
+
+
+metrics = MetricsRegistry(max_spans=cc.metrics_max_spans)
+
+
+def export_metrics():
+    metrics.write(cc.metrics_prometheus_path, cc.metrics_trace_path)
+
+
+def log_hot_path(message):
+    if cc.metrics_verbose_logging:
+        logging.info(message)
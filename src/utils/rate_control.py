@@ -0,0 +1,315 @@
+import time
+import random
+import asyncio
+import threading
+
+import httpx
+import openai
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+from src.config.app_config import CryptoConfig as cc
+
+
+THROTTLE = "throttle"
+RETRY = "retry"
+FATAL = "fatal"
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def classify_error(error):
+    """Sort an exception from httpx or the OpenAI client into throttle, retry or fatal."""
+    if isinstance(error, openai.RateLimitError):
+        return THROTTLE
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)):
+        return RETRY
+    if isinstance(error, openai.APIStatusError):
+        return THROTTLE if error.status_code in THROTTLE_STATUS_CODES else FATAL
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        if status_code in THROTTLE_STATUS_CODES:
+            return THROTTLE
+        return RETRY if status_code >= 500 else FATAL
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError)):
+        return RETRY
+    return FATAL
+
+
+def retry_after(error):
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: +increase per window of successes, *decrease_factor on throttling.
+
+    Decreases are applied at most once per cooldown, so a burst of 429s from requests that were
+    already in flight counts as one congestion signal.
+    """
+
+    def __init__(self, name, initial, minimum, maximum, increase=1.0, decrease_factor=0.5, cooldown=1.0):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.completed = 0
+        self.window_started_at = time.monotonic()
+        self.condition = threading.Condition()
+        # Futures of coroutines waiting in acquire_async, with their loops; the limiter is shared by
+        # threads and by more than one event loop, so they are woken with call_soon_threadsafe.
+        self.async_waiters = []
+        self._report()
+
+
+    def _try_acquire(self):
+        if self.in_flight < max(int(self.limit), 1):
+            self.in_flight += 1
+            return True
+        return False
+
+
+    def acquire(self):
+        with self.condition:
+            while not self._try_acquire():
+                self.condition.wait()
+
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.condition:
+                if self._try_acquire():
+                    return
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self.condition:
+                    if (loop, waiter) in self.async_waiters:
+                        self.async_waiters.remove((loop, waiter))
+
+
+    def _notify_all(self):
+        self.condition.notify_all()
+        waiters, self.async_waiters = self.async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # the waiter's loop is already closed
+
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self._notify_all()
+
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.maximum, self.limit + self.increase / max(self.limit, 1.0))
+            self.completed += 1
+            self._notify_all()
+        self._report()
+
+
+    def on_throttle(self):
+        with self.condition:
+            now = time.monotonic()
+            if now - self.last_decrease < self.cooldown:
+                return
+            self.last_decrease = now
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+        logging.info(f'{self.name} throttled, concurrency limit cut to {self.limit:.2f}')
+        metrics.inc("rate_limit_throttled_total", endpoint=self.name)
+        self._report()
+
+
+    def _report(self):
+        metrics.set_gauge("rate_limit_concurrency", round(self.limit, 2), endpoint=self.name)
+        elapsed = time.monotonic() - self.window_started_at
+        if elapsed >= 5:
+            metrics.set_gauge("rate_limit_requests_per_second", round(self.completed / elapsed, 2),
+                              endpoint=self.name)
+            self.completed = 0
+            self.window_started_at = time.monotonic()
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets one trial call through
+    once `reset_timeout` has passed; a successful trial closes it again.
+
+    before_call returns True for the trial call, which must end with end_trial whatever its outcome,
+    or no other trial is ever let through."""
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                raise CircuitOpenError(f'Circuit for {self.name} is open')
+            self.trial_in_flight = True
+            return True
+
+
+    def end_trial(self):
+        """Let the next trial through after one that neither closed nor re-opened the circuit,
+        e.g. a fatal error or a cancelled call."""
+        with self.lock:
+            self.trial_in_flight = False
+
+
+    def on_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logging.info(f'Circuit for {self.name} closed')
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+        metrics.set_gauge("circuit_open", 0, endpoint=self.name)
+
+
+    def on_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures < self.failure_threshold:
+                return
+            if self.opened_at is None:
+                logging.warning(f'Circuit for {self.name} opened after {self.failures} consecutive failures')
+            self.opened_at = time.monotonic()
+        metrics.set_gauge("circuit_open", 1, endpoint=self.name)
+
+
+class ResilientEndpoint:
+    """Runs calls to one upstream through its adaptive limiter, circuit breaker and jittered retries."""
+
+    def __init__(self, name, limiter, breaker, max_retries, base_delay, max_delay):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+
+    def _on_error(self, error, attempt):
+        kind = classify_error(error)
+        if kind == THROTTLE:
+            self.limiter.on_throttle()
+        if kind == FATAL:
+            return None
+
+        self.breaker.on_failure()
+        if attempt >= self.max_retries:
+            return None
+        metrics.inc("rate_limit_retries_total", endpoint=self.name, reason=kind)
+        return max(backoff_delay(attempt, self.base_delay, self.max_delay), retry_after(error) or 0)
+
+
+    def call(self, func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            trial = self.breaker.before_call()
+            try:
+                self.limiter.acquire()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    delay = self._on_error(e, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self.limiter.on_success()
+                    self.breaker.on_success()
+                    return result
+                finally:
+                    self.limiter.release()
+            finally:
+                if trial:
+                    self.breaker.end_trial()
+            time.sleep(delay)
+
+
+    async def call_async(self, func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            trial = self.breaker.before_call()
+            try:
+                await self.limiter.acquire_async()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    delay = self._on_error(e, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self.limiter.on_success()
+                    self.breaker.on_success()
+                    return result
+                finally:
+                    self.limiter.release()
+            finally:
+                if trial:
+                    self.breaker.end_trial()
+            await asyncio.sleep(delay)
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def get_endpoint(name):
+    with _endpoints_lock:
+        endpoint = _endpoints.get(name)
+        if endpoint is None:
+            endpoint_cfg = cc.rate_control_endpoints[name]
+            endpoint = _endpoints[name] = ResilientEndpoint(
+                name,
+                limiter=AdaptiveLimiter(name,
+                                        initial=endpoint_cfg['initial_concurrency'],
+                                        minimum=endpoint_cfg['min_concurrency'],
+                                        maximum=endpoint_cfg['max_concurrency'],
+                                        cooldown=endpoint_cfg['cooldown']),
+                breaker=CircuitBreaker(name,
+                                       failure_threshold=endpoint_cfg['failure_threshold'],
+                                       reset_timeout=endpoint_cfg['reset_timeout']),
+                max_retries=cc.rate_control_max_retries,
+                base_delay=cc.rate_control_base_delay,
+                max_delay=cc.rate_control_max_delay
+            )
+    return endpoint
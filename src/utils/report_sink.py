@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import atexit
+import threading
+from datetime import datetime
+
+from src.utils.logger import logging
+from src.utils.common import save_trend_analysis_to_file, write_json_to_text
+from src.config.app_config import CryptoConfig as cc
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def trend_record(wallet_address, trend_results, conclusion, analyzed_at):
+    windows = []
+    for timeframe, trend in trend_results.items():
+        windows.append({"days": int(timeframe.split('_')[0]),
+                        "overall_change": trend["overall_change"],
+                        "notable_changes": trend["notable_changes"],
+                        "value_change_usd": trend.get("value_change_usd"),
+                        **trend["transaction_patterns"]})
+    return {"report": "trend",
+            "wallet_address": wallet_address,
+            "analyzed_at": analyzed_at.isoformat(),
+            "windows": windows,
+            "conclusion": conclusion}
+
+
+def wallet_age_record(wallet_address, output, analyzed_at):
+    return {"report": "wallet_age",
+            "wallet_address": wallet_address,
+            "analyzed_at": analyzed_at.isoformat(),
+            "first_transaction": output.get("First Transaction"),
+            "wallet_age": output.get("Wallet Age"),
+            "category": output.get("Category"),
+            "analysis": output.get("Analysis")}
+
+
+def record_rows(record):
+    """Flatten a record into columnar rows: one row per trend window, one row per wallet age."""
+    if record["report"] != "trend":
+        return [{key: value for key, value in record.items() if key != "report"}]
+
+    return [{"wallet_address": record["wallet_address"],
+             "analyzed_at": record["analyzed_at"],
+             **dict(window, notable_changes=json.dumps(window["notable_changes"])),
+             "conclusion": record["conclusion"]}
+            for window in record["windows"]]
+
+
+def render_text_report(record, filename):
+    if record["report"] == "trend":
+        trend_results = {
+            f"{window['days']}_day_trend": {
+                "overall_change": window["overall_change"],
+                "notable_changes": window["notable_changes"],
+                "transaction_patterns": {key: window[key] for key in ("send_count", "receive_count", "net_activity")},
+                "value_change_usd": window.get("value_change_usd"),
+            }
+            for window in record["windows"]
+        }
+        save_trend_analysis_to_file(trend_results=trend_results, conclusion=record["conclusion"], filename=filename)
+    else:
+        write_json_to_text(data={"First Transaction": record["first_transaction"],
+                                 "Wallet Age": record["wallet_age"],
+                                 "Category": record["category"],
+                                 "Analysis": record["analysis"]} if record["category"] else {},
+                           output_text_file=filename)
+
+
+class ReportSink:
+    """Buffers per-wallet report records and appends them to date-partitioned JSONL and Parquet files.
+
+    Every process writes its own part files, so concurrent runs never share a file handle.
+    """
+
+    def __init__(self, directory, batch_size, flush_interval, formats):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.formats = set(formats)
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+        if "parquet" in self.formats and pq is None:
+            raise ImportError('reports.formats includes parquet but pyarrow is not installed; '
+                              'install it or remove parquet from reports.formats')
+
+        self.records = []
+        self.last_flush = time.monotonic()
+        self.parts = 0
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+            due = (len(self.records) >= self.batch_size
+                   or time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+
+    def partition_path(self, report, run_date):
+        path = os.path.join(self.directory, report, f"run_date={run_date}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+    def flush(self):
+        with self.lock:
+            records, self.records = self.records, []
+            self.last_flush = time.monotonic()
+
+        if not records:
+            return
+
+        partitions = {}
+        for record in records:
+            partitions.setdefault((record["report"], record["analyzed_at"][:10]), []).append(record)
+
+        with self.write_lock:
+            self.parts += 1
+            for (report, run_date), partition in partitions.items():
+                path = self.partition_path(report, run_date)
+                if "jsonl" in self.formats:
+                    with open(os.path.join(path, f"part-{self.run_id}.jsonl"), 'a', encoding='utf-8') as f:
+                        f.writelines(json.dumps(record) + "\n" for record in partition)
+                if "parquet" in self.formats:
+                    rows = [row for record in partition for row in record_rows(record)]
+                    pq.write_table(pa.Table.from_pylist(rows),
+                                   os.path.join(path, f"part-{self.run_id}-{self.parts:05d}.parquet"))
+
+        logging.info(f'Report sink flushed {len(records)} records to {self.directory}')
+
+
+_report_sink = None
+_report_sink_lock = threading.Lock()
+
+
+def get_report_sink():
+    global _report_sink
+    with _report_sink_lock:
+        if _report_sink is None:
+            _report_sink = ReportSink(directory=cc.reports_directory,
+                                      batch_size=cc.reports_batch_size,
+                                      flush_interval=cc.reports_flush_interval,
+                                      formats=cc.reports_formats)
+            atexit.register(_report_sink.flush)
+    return _report_sink
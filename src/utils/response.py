@@ -1,27 +1,98 @@
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
 
 from src.utils.logger import logging
+from src.utils.llm_cache import get_llm_cache
+from src.utils.metrics import metrics, log_hot_path
+from src.utils.rate_control import get_endpoint
 from src.config.app_config import CryptoConfig as cc
 
 def get_client(api_key, url):
     logging.info('Getting client ...')
+    # Retries are handled by the rate-controlled llm endpoint instead of the client.
     return OpenAI(
         api_key=api_key,
-        base_url=url
+        base_url=url,
+        max_retries=0
     )
 
-def get_chat_response(client, model_name, messages):
-    logging.info('Getting chat response ...')
+def get_async_client(api_key, url, max_connections):
+    logging.info('Getting async client ...')
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=url,
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections)
+        )
+    )
+
+def _prepare_request(model_name, messages):
     input_messages = []
     for message in messages:
         input_messages.append({'role': message['role'], 'content': message['content']})
+
+    params = {'temperature': cc.temperature, 'top_p': cc.top_p, 'max_tokens': cc.max_tokens}
+
+    cache = get_llm_cache()
+    cache_key = cache.make_key(model_name, params, input_messages) if cache is not None else None
+    return input_messages, params, cache, cache_key
+
+def _get_cached_response(cache, cache_key, model_name):
+    if cache is None:
+        return None
+    cached_response = cache.get(cache_key)
+    metrics.inc("llm_cache_lookups_total", model=model_name, result="hit" if cached_response is not None else "miss")
+    return cached_response
+
+def _record_usage(completion, model_name):
+    usage = getattr(completion, 'usage', None)
+    if usage is not None:
+        metrics.inc("llm_tokens_total", usage.prompt_tokens or 0, model=model_name, kind="prompt")
+        metrics.inc("llm_tokens_total", usage.completion_tokens or 0, model=model_name, kind="completion")
+    metrics.inc("llm_requests_total", model=model_name)
+
+def get_chat_response(client, model_name, messages):
+    log_hot_path('Getting chat response ...')
+    input_messages, params, cache, cache_key = _prepare_request(model_name, messages)
+    cached_response = _get_cached_response(cache, cache_key, model_name)
+    if cached_response is not None:
+        return cached_response
     
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=input_messages,
-        temperature=cc.temperature,
-        top_p=cc.top_p,
-        max_tokens=cc.max_tokens
-    ).choices[0].message.content
-
-    return response
\ No newline at end of file
+    with metrics.timer("llm_request", model=model_name):
+        completion = get_endpoint("llm").call(
+            client.chat.completions.create,
+            model=model_name,
+            messages=input_messages,
+            **params
+        )
+    _record_usage(completion, model_name)
+    response = completion.choices[0].message.content
+
+    if cache is not None and response is not None:
+        cache.set(cache_key, response)
+
+    return response
+
+async def get_chat_response_async(client, model_name, messages):
+    log_hot_path('Getting async chat response ...')
+    input_messages, params, cache, cache_key = _prepare_request(model_name, messages)
+    cached_response = _get_cached_response(cache, cache_key, model_name)
+    if cached_response is not None:
+        return cached_response
+
+    with metrics.timer("llm_request", model=model_name):
+        completion = await get_endpoint("llm").call_async(
+            client.chat.completions.create,
+            model=model_name,
+            messages=input_messages,
+            **params
+        )
+    _record_usage(completion, model_name)
+    response = completion.choices[0].message.content
+
+    if cache is not None and response is not None:
+        cache.set(cache_key, response)
+
+    return response
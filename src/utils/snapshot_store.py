@@ -0,0 +1,261 @@
+import os
+import time
+import uuid
+import zlib
+import sqlite3
+import hashlib
+import itertools
+import threading
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+from src.config.app_config import CryptoConfig as cc
+
+
+class SnapshotRecording:
+    """Pages captured during one scrape of one wallet; nothing is written until commit().
+
+    `full_history` marks a scrape that was not cut off at the wallet's ingestion watermark.
+    """
+
+    def __init__(self, store, wallet_address, source, full_history=False):
+        self.store = store
+        self.wallet_address = wallet_address
+        self.source = source
+        self.full_history = full_history
+        self.fetched_at = time.time()
+        self.pages = []
+
+
+    def add(self, kind, locator, content):
+        self.pages.append((kind, locator, content))
+
+
+    def commit(self):
+        if self.pages:
+            self.store.save_fetch(self.wallet_address, self.source, self.fetched_at, self.pages, self.full_history)
+
+
+class SnapshotStore:
+    """Raw pages and agent results, zlib-compressed in content-addressed files under `directory/objects`.
+
+    A SQLite index maps each fetch (wallet, source, time) to its pages in order. Identical content is
+    stored once. Incremental scrapes only hold what was new, so a wallet's history is its latest full-history
+    fetch plus every fetch after it. Once the objects exceed `max_bytes`, fetches older than that chain are
+    dropped first, then whole chains, least recently fetched wallet first.
+    """
+
+    def __init__(self, directory, max_bytes, compression_level):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS fetches (
+                fetch_id TEXT PRIMARY KEY,
+                wallet_address TEXT NOT NULL,
+                source TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                full_history INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS fetches_wallet ON fetches (wallet_address, fetched_at);
+            CREATE INDEX IF NOT EXISTS fetches_fetched_at ON fetches (fetched_at);
+            CREATE TABLE IF NOT EXISTS pages (
+                fetch_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                locator TEXT,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (fetch_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest);
+            CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL
+            );
+        """)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(fetches)")]
+        if "full_history" not in columns:
+            self.connection.execute("ALTER TABLE fetches ADD COLUMN full_history INTEGER NOT NULL DEFAULT 0")
+
+
+    def begin(self, wallet_address, source, full_history=False):
+        return SnapshotRecording(self, wallet_address, source, full_history)
+
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:])
+
+
+    def write_object(self, digest, data):
+        """Store one object unless it is indexed already; must be called under the lock."""
+        if self.connection.execute("SELECT 1 FROM objects WHERE digest = ?", (digest,)).fetchone():
+            return
+        compressed = zlib.compress(data, self.compression_level)
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(temporary_path, path)
+        self.connection.execute("INSERT INTO objects (digest, size, stored_size) VALUES (?, ?, ?)",
+                                (digest, len(data), len(compressed)))
+
+
+    @staticmethod
+    def read_object_file(path):
+        with open(path, 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+
+
+    def read_object(self, digest):
+        return self.read_object_file(self.object_path(digest))
+
+
+    def save_fetch(self, wallet_address, source, fetched_at, pages, full_history=False):
+        fetch_id = uuid.uuid4().hex
+        encoded = [content.encode('utf-8') for _, _, content in pages]
+        digests = [hashlib.sha256(data).hexdigest() for data in encoded]
+
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for digest, data in zip(digests, encoded):
+                    self.write_object(digest, data)
+                self.connection.execute("INSERT INTO fetches (fetch_id, wallet_address, source, fetched_at, "
+                                        "full_history) VALUES (?, ?, ?, ?, ?)",
+                                        (fetch_id, wallet_address, source, fetched_at, int(full_history)))
+                self.connection.executemany("INSERT INTO pages (fetch_id, seq, kind, locator, digest) "
+                                            "VALUES (?, ?, ?, ?, ?)",
+                                            [(fetch_id, seq, kind, locator, digest)
+                                             for seq, ((kind, locator, _), digest) in enumerate(zip(pages, digests))])
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        metrics.inc("snapshot_fetches_total", source=source)
+        self.evict()
+        return fetch_id
+
+
+    def stored_bytes(self):
+        return self.connection.execute("SELECT COALESCE(SUM(stored_size), 0) FROM objects").fetchone()[0]
+
+
+    def evict(self):
+        with self.lock:
+            excess = self.stored_bytes() - self.max_bytes
+            if excess <= 0:
+                return 0
+
+            # Fetches older than their wallet's latest full-history fetch go first, oldest first; then the
+            # chains of whole wallets, least recently fetched first.
+            candidates = self.connection.execute("""
+                SELECT f.fetch_id, f.wallet_address, f.fetched_at < COALESCE(b.baseline, -1) AS superseded
+                FROM fetches f
+                JOIN (SELECT wallet_address, MAX(fetched_at) AS latest FROM fetches
+                      GROUP BY wallet_address) l ON l.wallet_address = f.wallet_address
+                LEFT JOIN (SELECT wallet_address, MAX(fetched_at) AS baseline FROM fetches WHERE full_history
+                           GROUP BY wallet_address) b ON b.wallet_address = f.wallet_address
+                ORDER BY superseded DESC,
+                         CASE WHEN superseded THEN f.fetched_at ELSE l.latest END,
+                         f.wallet_address,
+                         f.fetched_at
+            """).fetchall()
+
+            evicted = 0
+            chain_wallet = None
+            self.connection.execute("BEGIN IMMEDIATE")
+            for fetch_id, wallet_address, superseded in candidates:
+                # Part of a chain cannot be replayed on its own, so a chain once started is dropped whole.
+                if excess <= 0 and (superseded or wallet_address != chain_wallet):
+                    break
+                if not superseded:
+                    chain_wallet = wallet_address
+                digests = [row[0] for row in self.connection.execute(
+                    "SELECT DISTINCT digest FROM pages WHERE fetch_id = ?", (fetch_id,))]
+                self.connection.execute("DELETE FROM pages WHERE fetch_id = ?", (fetch_id,))
+                self.connection.execute("DELETE FROM fetches WHERE fetch_id = ?", (fetch_id,))
+                for digest in digests:
+                    if self.connection.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1",
+                                               (digest,)).fetchone():
+                        continue
+                    row = self.connection.execute("SELECT stored_size FROM objects WHERE digest = ?",
+                                                  (digest,)).fetchone()
+                    self.connection.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                    try:
+                        os.remove(self.object_path(digest))
+                    except FileNotFoundError:
+                        pass
+                    excess -= row[0] if row else 0
+                evicted += 1
+            self.connection.execute("COMMIT")
+
+        metrics.inc("snapshot_evictions_total", evicted)
+        logging.info(f'Evicted {evicted} snapshot fetches to stay under {self.max_bytes} bytes')
+        return evicted
+
+
+    def wallet_fetches(self, wallet_addresses=None):
+        """Each wallet's chain of fetches, oldest first, from its latest full-history fetch on or from its
+        oldest retained fetch if it has none, as {wallet_address, complete, fetches}. `complete` is True
+        when the chain starts with a full-history fetch; each fetch is
+        {wallet_address, source, fetched_at, pages: [(kind, locator, path)]}."""
+        with self.lock:
+            rows = self.connection.execute("SELECT fetch_id, wallet_address, source, fetched_at, full_history "
+                                           "FROM fetches ORDER BY wallet_address, fetched_at").fetchall()
+        wanted = set(wallet_addresses) if wallet_addresses is not None else None
+
+        for wallet_address, chain in itertools.groupby(rows, key=lambda row: row[1]):
+            if wanted is not None and wallet_address not in wanted:
+                continue
+            chain = list(chain)
+            chain = chain[max((index for index, row in enumerate(chain) if row[4]), default=0):]
+
+            fetches = []
+            for fetch_id, _, source, fetched_at, _ in chain:
+                with self.lock:
+                    pages = self.connection.execute("SELECT kind, locator, digest FROM pages WHERE fetch_id = ? "
+                                                    "ORDER BY seq", (fetch_id,)).fetchall()
+                fetches.append({"wallet_address": wallet_address,
+                                "source": source,
+                                "fetched_at": fetched_at,
+                                "pages": [(kind, locator, self.object_path(digest)) for kind, locator, digest in pages]})
+            yield {"wallet_address": wallet_address, "complete": bool(chain[0][4]), "fetches": fetches}
+
+
+    def stats(self):
+        with self.lock:
+            fetches = self.connection.execute("SELECT COUNT(*), COUNT(DISTINCT wallet_address) FROM fetches").fetchone()
+            objects = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) "
+                                              "FROM objects").fetchone()
+        return {"fetches": fetches[0],
+                "wallets": fetches[1],
+                "objects": objects[0],
+                "raw_bytes": objects[1],
+                "stored_bytes": objects[2]}
+
+
+_snapshot_store = None
+_snapshot_store_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    global _snapshot_store
+    if not cc.snapshots_enabled:
+        return None
+
+    with _snapshot_store_lock:
+        if _snapshot_store is None:
+            _snapshot_store = SnapshotStore(directory=cc.snapshots_directory,
+                                            max_bytes=cc.snapshots_max_bytes,
+                                            compression_level=cc.snapshots_compression_level)
+            logging.info(f'Snapshot store opened at {cc.snapshots_directory}')
+    return _snapshot_store
@@ -0,0 +1,68 @@
+import time
+import random
+
+
+SECONDS_PER_DAY = 86400
+
+
+def random_hex(rng, length):
+    return f'0x{rng.getrandbits(length * 4):0{length}x}'
+
+
+def token_universe(rng, num_tokens):
+    tokens = [{"symbol": "ETH", "contract_address": "native", "decimals": 18}]
+    for index in range(1, num_tokens):
+        tokens.append({"symbol": f"TKN{index:04d}",
+                       "contract_address": random_hex(rng, 40),
+                       "decimals": rng.choice([6, 8, 18])})
+    return tokens
+
+
+def format_relative_age(seconds):
+    days = int(seconds // SECONDS_PER_DAY)
+    years, days = divmod(days, 365)
+    months, days = divmod(days, 30)
+    parts = [(years, "yr"), (months, "mth"), (days, "day")]
+    text = ' '.join(f"{value} {unit}{'s' if value != 1 else ''}" for value, unit in parts if value)
+    return f"{text or '0 days'} ago"
+
+
+def generate_wallet(num_transactions, num_tokens=20, history_days=730, seed=0, now=None, wallet_address=None):
+    """Build one wallet document shaped like DataIngestionAgent.output_json()."""
+    rng = random.Random(seed)
+    now = int(now or time.time())
+    wallet_address = wallet_address or random_hex(rng, 40)
+    tokens = token_universe(rng, max(num_tokens, 1))
+
+    # A few tokens carry most of the activity, like real wallets.
+    weights = [1 / (rank + 1) for rank in range(len(tokens))]
+    earliest = now - history_days * SECONDS_PER_DAY
+    timestamps = sorted((rng.randint(earliest, now) for _ in range(num_transactions)), reverse=True)
+
+    transaction_history = []
+    for timestamp in timestamps:
+        token = rng.choices(tokens, weights=weights)[0]
+        tx_type = rng.choice(("send", "receive"))
+        counterparty = random_hex(rng, 40)
+        transaction_history.append({
+            "timestamp": timestamp,
+            "tx_hash": random_hex(rng, 64),
+            "token": token["symbol"],
+            "amount": round(rng.lognormvariate(0, 2), 6),
+            "type": tx_type,
+            "asset_type": "native" if token["symbol"] == "ETH" else "ERC-20",
+            "from": wallet_address if tx_type == "send" else counterparty,
+            "to": counterparty if tx_type == "send" else wallet_address,
+        })
+
+    return {
+        "wallet_address": wallet_address,
+        "tokens_held": tokens,
+        "token_balances": [{"symbol": token["symbol"], "balance": round(rng.lognormvariate(2, 2), 6)}
+                           for token in tokens],
+        "wallet_ages": {
+            "latest": format_relative_age(now - timestamps[0]) if timestamps else None,
+            "first": format_relative_age(now - timestamps[-1]) if timestamps else None,
+        },
+        "transaction_history": transaction_history,
+    }
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.app_config import (CryptoConfig as cc,
+                                   Config as cfg)
+
+
+@pytest.fixture
+def in_memory_mongo():
+    """One fresh mongomock client per test, shared by every agent the test builds."""
+    pytest.importorskip("mongomock")
+    from src.service.stubs import use_in_memory_mongo
+
+    use_in_memory_mongo()
+
+
+@pytest.fixture
+def ingestion_agent(in_memory_mongo, monkeypatch):
+    monkeypatch.setattr(cfg, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(cc, "llm_cache_enabled", False)
+    monkeypatch.setattr(cc, "snapshots_enabled", False)
+    monkeypatch.setattr(cc, "graph_enabled", False)
+
+    from src.modules.ingestion.data_ingestion import DataIngestionAgent
+    agent = DataIngestionAgent()
+    for collection in (agent.collection, agent.transaction_collection, agent.cryto_db.get_rollup_collection()):
+        collection.delete_many({})
+    return agent
+
+
+@pytest.fixture
+def trend_agent(in_memory_mongo, monkeypatch, tmp_path):
+    import src.utils.report_sink as report_sink
+
+    monkeypatch.setattr(report_sink, "_report_sink", None)
+    monkeypatch.setattr(cc, "reports_directory", str(tmp_path / "reports"))
+    monkeypatch.setattr(cc, "reports_render_text", False)
+
+    from src.modules.agent.trend_agent import HistoricalTrendAnalysisAgent
+    agent = HistoricalTrendAnalysisAgent()
+    for collection in (agent.collection, agent.transaction_collection, agent.rollup_collection):
+        collection.delete_many({})
+    yield agent
+    # Flush now rather than at exit, when the captured log stream is already closed.
+    agent.report_sink.flush()
@@ -0,0 +1,101 @@
+import os
+import argparse
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+FIXTURE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "etherscan")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIRECTORY, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class EtherscanFixtureServer:
+    """Stands in for Etherscan, serving the HTML fixtures under the paths EtherscanExtractor requests.
+
+    `transaction_pages` are served as /txs pages 1, 2, ... and `token_transfer_pages` as /tokentxns pages;
+    later pages get the empty-table fixture. Every requested path is kept in `requests`.
+    """
+
+    def __init__(self, address_page="address.html", transaction_pages=("transactions.html",),
+                 token_page="token.html", token_transfer_pages=("token_transfers.html",)):
+        self.address_page = address_page
+        self.transaction_pages = list(transaction_pages)
+        self.token_transfer_pages = list(token_transfer_pages)
+        self.token_page = token_page
+        self.requests = []
+        self.server = None
+
+
+    def build_app(self):
+        app = web.Application(middlewares=[self.record])
+        app.add_routes([web.get('/address/{wallet_address}', self.handle_address),
+                        web.get('/txs', self.handle_transactions),
+                        web.get('/tokentxns', self.handle_token_transfers),
+                        web.get('/token/{contract_address}', self.handle_token)])
+        return app
+
+
+    @web.middleware
+    async def record(self, request, handler):
+        self.requests.append(request.path_qs)
+        return await handler(request)
+
+
+    @staticmethod
+    def html(name):
+        return web.Response(text=read_fixture(name), content_type='text/html')
+
+
+    async def handle_address(self, request):
+        return self.html(self.address_page)
+
+
+    def page(self, request, pages):
+        page = int(request.query.get('p', 1))
+        if page <= len(pages):
+            return self.html(pages[page - 1])
+        return self.html("transactions_empty.html")
+
+
+    async def handle_transactions(self, request):
+        return self.page(request, self.transaction_pages)
+
+
+    async def handle_token_transfers(self, request):
+        return self.page(request, self.token_transfer_pages)
+
+
+    async def handle_token(self, request):
+        if self.token_page is None:
+            raise web.HTTPNotFound()
+        return self.html(self.token_page)
+
+
+    @property
+    def base_url(self):
+        return str(self.server.make_url('')).rstrip('/')
+
+
+    async def __aenter__(self):
+        self.server = TestServer(self.build_app())
+        await self.server.start_server()
+        return self
+
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the Etherscan HTML fixtures; point extractor.etherscan_host here.')
+    parser.add_argument('--port', type=int, default=8081)
+    args = parser.parse_args()
+    web.run_app(EtherscanFixtureServer().build_app(), host='127.0.0.1', port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import time
+import asyncio
+import argparse
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class MockOpenAIServer:
+    """OpenAI-compatible /v1/chat/completions that answers after `delay` seconds.
+
+    Tracks how many requests are being served at once, so tests can check client-side concurrency bounds.
+    """
+
+    def __init__(self, delay=0.05, content="The wallet shows long-term, steady activity."):
+        self.delay = delay
+        self.content = content
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.server = None
+
+
+    def build_app(self):
+        app = web.Application()
+        app.add_routes([web.post('/v1/chat/completions', self.handle_completion)])
+        return app
+
+
+    async def handle_completion(self, request):
+        body = await request.json()
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        prompt_tokens = sum(len(message["content"]) // 4 for message in body["messages"])
+        return web.json_response({
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0,
+                         "message": {"role": "assistant", "content": self.content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 12, "total_tokens": prompt_tokens + 12},
+        })
+
+
+    @property
+    def base_url(self):
+        return str(self.server.make_url('/v1'))
+
+
+    async def __aenter__(self):
+        self.server = TestServer(self.build_app())
+        await self.server.start_server()
+        return self
+
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a mock OpenAI-compatible chat endpoint; point RUNPOD_URL here.')
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--delay', type=float, default=0.2)
+    args = parser.parse_args()
+    web.run_app(MockOpenAIServer(delay=args.delay).build_app(), host='127.0.0.1', port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import src.modules as modules
+from src.modules.agent_controller import AgentController
+
+
+def test_agents_are_built_once_under_concurrent_first_use(monkeypatch):
+    built = []
+
+    def slow_agent():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    monkeypatch.setattr(modules, "WalletAgeAgent", slow_agent)
+    controller = AgentController()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        agents = list(executor.map(lambda _: controller.wallet_age_agent, range(8)))
+
+    assert len(built) == 1
+    assert all(agent is built[0] for agent in agents)
+
+
+def test_get_response_normalizes_the_address(monkeypatch):
+    controller = AgentController()
+    monkeypatch.setattr(controller, "_get_response", lambda wallet_address: wallet_address)
+
+    assert controller.get_response(" 0xAbCdEf0123456789aBcDeF0123456789AbCdEf01 ") == \
+        "0xabcdef0123456789abcdef0123456789abcdef01"
+    with pytest.raises(ValueError):
+        controller.get_response("not-an-address")
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import threading
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.service.analysis_service import AnalysisService
+
+
+CHECKSUM_ADDRESS = "0xAbC0000000000000000000000000000000000001"
+SLOW_ADDRESS = "0x" + "5" * 40
+
+
+class RecordingHandler:
+    def __init__(self, slow_delay=0.0):
+        self.slow_delay = slow_delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, wallet_address):
+        with self.lock:
+            self.calls.append(wallet_address)
+        time.sleep(self.slow_delay if wallet_address == SLOW_ADDRESS else 0.01)
+        return {"trend_analysis": {}, "wallet_age": {}}
+
+
+class StubGraph:
+    def top_counterparties(self, address, k=10):
+        return []
+
+    def shared_counterparties(self, address_a, address_b):
+        return []
+
+    def cluster(self, address, limit=100):
+        return {"size": 0, "members": []}
+
+    def save(self, path):
+        pass
+
+
+def run_with_client(service, scenario):
+    async def run():
+        async with TestClient(TestServer(service.build_app())) as client:
+            return await scenario(client)
+    return asyncio.run(run())
+
+
+def build_service(handler, graph=None):
+    return AnalysisService(handler=handler, cache_ttl=60, cache_max_entries=100, max_workers=4, max_pending=10,
+                           graph=graph)
+
+
+def test_addresses_are_normalized_once():
+    handler = RecordingHandler()
+
+    async def scenario(client):
+        first = await client.get(f'/wallets/{CHECKSUM_ADDRESS}/analysis')
+        second = await client.get(f'/wallets/{CHECKSUM_ADDRESS.lower()}/analysis')
+        return await first.json(), await second.json()
+
+    first, second = run_with_client(build_service(handler), scenario)
+    assert handler.calls == [CHECKSUM_ADDRESS.lower()]
+    assert first["wallet_address"] == second["wallet_address"] == CHECKSUM_ADDRESS.lower()
+
+
+def test_slow_wallet_does_not_block_others():
+    handler = RecordingHandler(slow_delay=1.0)
+
+    async def scenario(client):
+        slow = asyncio.ensure_future(client.get(f'/wallets/{SLOW_ADDRESS}/analysis'))
+        await asyncio.sleep(0.05)
+        started_at = time.perf_counter()
+        fast = await client.get(f'/wallets/{CHECKSUM_ADDRESS}/analysis')
+        elapsed = time.perf_counter() - started_at
+        await slow
+        return fast.status, elapsed
+
+    status, elapsed = run_with_client(build_service(handler), scenario)
+    assert status == 200
+    assert elapsed < 0.5
+
+
+def test_invalid_requests_get_400():
+    async def scenario(client):
+        responses = [await client.get('/wallets/0x123/analysis'),
+                     await client.get(f'/wallets/{CHECKSUM_ADDRESS}/counterparties?k=abc'),
+                     await client.get(f'/wallets/{CHECKSUM_ADDRESS}/counterparties?k=0'),
+                     await client.get(f'/wallets/{CHECKSUM_ADDRESS}/counterparties?shared_with=nope'),
+                     await client.get(f'/wallets/{CHECKSUM_ADDRESS}/counterparties?k=5')]
+        return [response.status for response in responses]
+
+    assert run_with_client(build_service(RecordingHandler(), StubGraph()), scenario) == [400, 400, 400, 400, 200]
+
+
+def test_graph_is_caught_up_periodically():
+    calls = []
+    service = AnalysisService(handler=RecordingHandler(), cache_ttl=60, cache_max_entries=100, max_workers=4,
+                              max_pending=10, graph=StubGraph(), graph_catch_up=lambda: calls.append(time.monotonic()),
+                              graph_catch_up_interval=0.05)
+
+    async def scenario(client):
+        await asyncio.sleep(0.3)
+
+    run_with_client(service, scenario)
+    assert len(calls) >= 2
+    assert service.graph_catch_up_task.done()
@@ -0,0 +1,46 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.database.bulk_writer import BulkUpsertWriter
+
+
+class PartiallyFailingCollection:
+    """Answers every bulk write as a server does when the operation at `failed_index` hits a duplicate key."""
+
+    name = "transactions"
+
+    def __init__(self, failed_index):
+        self.failed_index = failed_index
+        self.ids = {}
+
+    def bulk_write(self, operations, ordered):
+        upserted = []
+        for index, _ in enumerate(operations):
+            if index != self.failed_index:
+                self.ids[index] = ObjectId()
+                upserted.append({"index": index, "_id": self.ids[index]})
+        raise BulkWriteError({"writeErrors": [{"index": self.failed_index, "code": 11000,
+                                               "errmsg": "E11000 duplicate key error"}],
+                              "writeConcernErrors": [],
+                              "nInserted": 0,
+                              "nUpserted": len(upserted),
+                              "nMatched": 0,
+                              "nModified": 0,
+                              "nRemoved": 0,
+                              "upserted": upserted})
+
+
+def test_partially_failed_write_reports_the_applied_operations():
+    flushed = []
+    collection = PartiallyFailingCollection(failed_index=1)
+    writer = BulkUpsertWriter(collection, batch_size=100, flush_interval=60,
+                              on_flush=lambda keys, result: flushed.append((keys, result)))
+    for key in ("a", "b", "c"):
+        writer.add(UpdateOne({"key": key}, {"$setOnInsert": {"key": key}}, upsert=True), key=key)
+    writer.flush()
+
+    (keys, result), = flushed
+    assert keys == ["a", "c"]
+    assert result.upserted_ids == {0: collection.ids[0], 1: collection.ids[2]}
+    assert writer.written == 2
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+from bson import ObjectId
+
+from src.modules.analysis.counterparty_graph import CounterpartyGraph
+
+
+WALLET = "0x" + "a" * 40
+COUNTERPARTY = "0x" + "b" * 40
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def transaction(seconds, serial):
+    # ObjectIds minted `seconds` after START; `serial` keeps ids minted in the same second distinct.
+    _id = ObjectId(ObjectId.from_datetime(START + timedelta(seconds=seconds)).binary[:4] + serial.to_bytes(8, 'big'))
+    return {"_id": _id, "wallet_address": WALLET, "from": WALLET, "to": COUNTERPARTY}
+
+
+def edge_weight(graph):
+    return graph.top_counterparties(WALLET)[0]["transactions"]
+
+
+def test_catch_up_reads_transactions_committed_out_of_id_order():
+    collection = mongomock.MongoClient().db.transactions
+    collection.insert_many([transaction(0, 1), transaction(100, 2)])
+    graph = CounterpartyGraph(compact_threshold=1000, overlap=300)
+    assert graph.catch_up(collection, batch_size=1) == 2
+
+    # A writer minted this _id before the last one read but committed it afterwards.
+    collection.insert_one(transaction(50, 3))
+    assert graph.catch_up(collection, batch_size=1) == 1
+    assert graph.catch_up(collection, batch_size=1) == 0
+    assert edge_weight(graph) == 3
+
+
+def test_catch_up_skips_documents_added_from_bulk_writes():
+    collection = mongomock.MongoClient().db.transactions
+    graph = CounterpartyGraph(compact_threshold=1000, overlap=300)
+    documents = [transaction(0, 1), transaction(10, 2)]
+    collection.insert_many([dict(document) for document in documents])
+    graph.add_documents(documents, [document["_id"] for document in documents])
+
+    assert graph.catch_up(collection, batch_size=10) == 0
+    assert edge_weight(graph) == 2
+
+
+def test_reloaded_graph_does_not_recount_the_overlap(tmp_path):
+    collection = mongomock.MongoClient().db.transactions
+    collection.insert_many([transaction(0, 1), transaction(100, 2)])
+    graph = CounterpartyGraph(compact_threshold=1000, overlap=300)
+    graph.catch_up(collection, batch_size=10)
+    path = str(tmp_path / "graph.npz")
+    graph.save(path)
+
+    collection.insert_one(transaction(200, 3))
+    reloaded = CounterpartyGraph.load(path, compact_threshold=1000, overlap=300)
+    assert reloaded.catch_up(collection, batch_size=10) == 1
+    assert edge_weight(reloaded) == 3
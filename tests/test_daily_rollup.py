@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from src.modules.analysis.daily_rollup import SECONDS_PER_DAY, rollup_increments
+from src.utils.synthetic_wallets import generate_wallet
+
+
+NOW = datetime(2024, 6, 1, 12, 0)
+WALLET_ADDRESS = "0x" + "1" * 40
+
+
+def rollup_rows(collection):
+    return {(row["wallet_address"], row["token"], row["day"]): (round(row["net_amount"], 6), row["send_count"],
+                                                                row["receive_count"])
+            for row in collection.find({}, {"_id": 0})}
+
+
+def test_increments_sum_transactions_per_wallet_token_and_day():
+    day = 19700
+    increments = rollup_increments([
+        {"wallet_address": WALLET_ADDRESS, "token": "ETH", "timestamp": day * SECONDS_PER_DAY, "amount": 2.0,
+         "type": "receive"},
+        {"wallet_address": WALLET_ADDRESS, "token": "ETH", "timestamp": (day + 1) * SECONDS_PER_DAY - 1,
+         "amount": 0.5, "type": "send"},
+        {"wallet_address": WALLET_ADDRESS, "token": "ETH", "timestamp": (day + 1) * SECONDS_PER_DAY, "amount": 1.0,
+         "type": "send"},
+        {"wallet_address": WALLET_ADDRESS, "token": "USDT", "timestamp": day * SECONDS_PER_DAY, "amount": None,
+         "type": "contract"},
+    ])
+
+    assert increments == {
+        (WALLET_ADDRESS, "ETH", day): {"net_amount": 1.5, "send_count": 1, "receive_count": 1},
+        (WALLET_ADDRESS, "ETH", day + 1): {"net_amount": -1.0, "send_count": 1, "receive_count": 0},
+        (WALLET_ADDRESS, "USDT", day): {"net_amount": 0.0, "send_count": 0, "receive_count": 0},
+    }
+
+
+def test_ingested_rollups_count_each_transaction_once_and_match_a_rebuild(ingestion_agent):
+    wallet = generate_wallet(200, num_tokens=4, history_days=60, seed=3, now=NOW.timestamp())
+    rollup_collection = ingestion_agent.cryto_db.get_rollup_collection()
+    ingestion_agent.save_mongodb(wallet)
+    ingestion_agent.writer.flush()
+    ingested = rollup_rows(rollup_collection)
+
+    # Re-sent transactions match stored documents and leave the rollups alone.
+    ingestion_agent.watermarks.clear()
+    ingestion_agent.save_mongodb(wallet)
+    ingestion_agent.writer.flush()
+    assert rollup_rows(rollup_collection) == ingested
+
+    expected = {(wallet_address, token, day): (round(increment["net_amount"], 6), increment["send_count"],
+                                               increment["receive_count"])
+                for (wallet_address, token, day), increment in
+                rollup_increments([dict(tx, wallet_address=wallet["wallet_address"])
+                                   for tx in wallet["transaction_history"]]).items()}
+    assert ingested == expected
+
+    ingestion_agent.rebuild_rollups()
+    assert rollup_rows(rollup_collection) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rollup_trends_match_the_transactions_source(ingestion_agent, trend_agent, monkeypatch, seed):
+    wallet = generate_wallet(300, num_tokens=6, history_days=400, seed=seed, now=NOW.timestamp())
+    ingestion_agent.save_mongodb(wallet)
+    ingestion_agent.writer.flush()
+    timeframes = [7, 30, 90, 180, 365]
+
+    monkeypatch.setattr(trend_agent, "source", "transactions")
+    expected = trend_agent.analyze_trends(wallet["wallet_address"], timeframes, now=NOW)
+    monkeypatch.setattr(trend_agent, "source", "rollups")
+    assert trend_agent.get_rollup_features(wallet["wallet_address"], timeframes, NOW) is not None
+    results = trend_agent.analyze_trends(wallet["wallet_address"], timeframes, now=NOW)
+
+    assert results.keys() == expected.keys()
+    for timeframe, trend in expected.items():
+        assert results[timeframe]["overall_change"] == trend["overall_change"]
+        assert results[timeframe]["transaction_patterns"] == trend["transaction_patterns"]
+        assert results[timeframe]["notable_changes"] == pytest.approx(trend["notable_changes"])
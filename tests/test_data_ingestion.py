@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+
+
+WALLET_ADDRESS = "0x" + "1" * 40
+
+
+class FailingTransactionCollection:
+    """Applies each operation to `collection` except those for `failing_hashes`, which fail as a server
+    reports failed operations of an unordered bulk write."""
+
+    def __init__(self, collection, failing_hashes):
+        self.collection = collection
+        self.failing_hashes = set(failing_hashes)
+        self.name = collection.name
+
+    def bulk_write(self, operations, ordered):
+        errors, upserted = [], []
+        for index, operation in enumerate(operations):
+            if operation._filter["tx_hash"] in self.failing_hashes:
+                errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+                continue
+            result = self.collection.bulk_write([operation], ordered=False)
+            upserted.extend({"index": index, "_id": _id} for _id in result.upserted_ids.values())
+
+        details = {"writeErrors": errors, "writeConcernErrors": [], "nInserted": 0, "nUpserted": len(upserted),
+                   "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": upserted}
+        if errors:
+            raise BulkWriteError(details)
+        return BulkWriteResult(details, True)
+
+
+def wallet(*timestamps):
+    return {"wallet_address": WALLET_ADDRESS,
+            "transaction_history": [{"timestamp": timestamp, "tx_hash": f"0x{timestamp:064x}", "token": "ETH",
+                                     "amount": 1.0, "type": "receive", "asset_type": "native",
+                                     "from": "0x" + "2" * 40, "to": WALLET_ADDRESS}
+                                    for timestamp in timestamps]}
+
+
+def stored_watermark(agent):
+    return agent.collection.find_one({"wallet_address": WALLET_ADDRESS}).get("ingestion_watermark")
+
+
+def test_failed_transaction_write_drops_the_watermark(ingestion_agent):
+    ingestion_agent.save_mongodb(wallet(100))
+    ingestion_agent.writer.flush()
+    assert stored_watermark(ingestion_agent) == {"timestamp": 100, "tx_hash": f"0x{100:064x}"}
+
+    # The newest transaction is written but an older one is not, so no watermark may stay past the older one.
+    transaction_collection = ingestion_agent.transaction_writer.collection
+    ingestion_agent.transaction_writer.collection = FailingTransactionCollection(transaction_collection,
+                                                                                 [f"0x{200:064x}"])
+    ingestion_agent.save_mongodb(wallet(300, 200))
+    ingestion_agent.writer.flush()
+    assert stored_watermark(ingestion_agent) is None
+    assert WALLET_ADDRESS not in ingestion_agent.watermarks
+    assert transaction_collection.count_documents({}) == 2
+
+    ingestion_agent.transaction_writer.collection = transaction_collection
+    ingestion_agent.save_mongodb(wallet(300, 200, 100))
+    ingestion_agent.writer.flush()
+    assert stored_watermark(ingestion_agent) == {"timestamp": 300, "tx_hash": f"0x{300:064x}"}
+    assert transaction_collection.count_documents({}) == 3
+
+
+def recording_ingest(ingested, failing=(), crash_after=None):
+    """Stands in for DataIngestionAgent.ingest: journals each wallet as the real one does, failing `failing`
+    and raising once `crash_after` wallets are done."""
+
+    async def ingest(wallet_addresses, journal=None):
+        ingested.append(list(wallet_addresses))
+        for count, wallet_address in enumerate(wallet_addresses):
+            if count == crash_after:
+                raise KeyboardInterrupt
+            journal.record([wallet_address], "failed" if wallet_address in failing else "completed")
+
+    return ingest
+
+
+def test_failed_wallet_does_not_stop_the_next_run_from_ingesting_the_rest(ingestion_agent, monkeypatch, tmp_path):
+    wallet_addresses = [f"0x{index:040x}" for index in range(1, 4)]
+    wallet_file = tmp_path / "wallets.txt"
+    wallet_file.write_text("\n".join(wallet_addresses))
+    monkeypatch.setattr(ingestion_agent, "journal_path", str(tmp_path / "journal.jsonl"))
+    ingested = []
+
+    monkeypatch.setattr(ingestion_agent, "ingest", recording_ingest(ingested, failing=wallet_addresses[1:2]))
+    asyncio.run(ingestion_agent.process_wallets(str(wallet_file)))
+    asyncio.run(ingestion_agent.process_wallets(str(wallet_file)))
+    assert ingested == [wallet_addresses, wallet_addresses]
+
+
+def test_only_an_interrupted_run_of_the_same_file_is_resumed(ingestion_agent, monkeypatch, tmp_path):
+    wallet_addresses = [f"0x{index:040x}" for index in range(1, 4)]
+    wallet_file = tmp_path / "wallets.txt"
+    wallet_file.write_text("\n".join(wallet_addresses))
+    monkeypatch.setattr(ingestion_agent, "journal_path", str(tmp_path / "journal.jsonl"))
+    ingested = []
+
+    monkeypatch.setattr(ingestion_agent, "ingest", recording_ingest(ingested, crash_after=1))
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(ingestion_agent.process_wallets(str(wallet_file)))
+    monkeypatch.setattr(ingestion_agent, "ingest", recording_ingest(ingested))
+    asyncio.run(ingestion_agent.process_wallets(str(wallet_file)))
+    assert ingested == [wallet_addresses, wallet_addresses[1:]]
+
+    # A new version of the file is a new run, even when the previous one was interrupted.
+    monkeypatch.setattr(ingestion_agent, "ingest", recording_ingest(ingested, crash_after=1))
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(ingestion_agent.process_wallets(str(wallet_file)))
+    wallet_file.write_text("\n".join(wallet_addresses + [f"0x{4:040x}"]))
+    monkeypatch.setattr(ingestion_agent, "ingest", recording_ingest(ingested))
+    asyncio.run(ingestion_agent.process_wallets(str(wallet_file)))
+    assert ingested[-1] == wallet_addresses + [f"0x{4:040x}"]
+
+
+def test_browser_scrape_without_a_watermark_starts_a_snapshot_chain(ingestion_agent, monkeypatch, tmp_path):
+    from src.utils.snapshot_store import SnapshotStore
+
+    store = SnapshotStore(str(tmp_path / "snapshots"), max_bytes=2**30, compression_level=1)
+    monkeypatch.setattr(ingestion_agent, "snapshot_store", store)
+
+    async def browse_wallet_data(wallet_address, browser_context=None, recording=None):
+        recording.add("browser_task", None, '{"wallet_address": "%s"}' % wallet_address)
+        return {"wallet_address": wallet_address}
+
+    monkeypatch.setattr(ingestion_agent, "browse_wallet_data", browse_wallet_data)
+    asyncio.run(ingestion_agent.scrape_wallet_data(WALLET_ADDRESS))
+    ingestion_agent.watermarks[WALLET_ADDRESS] = {"timestamp": 100, "tx_hash": f"0x{100:064x}"}
+    asyncio.run(ingestion_agent.scrape_wallet_data(WALLET_ADDRESS))
+
+    # The chain is complete only when it starts at a full-history fetch, here the first one.
+    (wallet,) = store.wallet_fetches()
+    assert wallet["complete"]
+    assert len(wallet["fetches"]) == 2
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from etherscan_fixture_server import EtherscanFixtureServer, read_fixture
+from src.modules.ingestion.etherscan_extractor import (EtherscanExtractor,
+                                                       EtherscanExtractionError,
+                                                       parse_address_page,
+                                                       parse_transactions_page,
+                                                       parse_token_page,
+                                                       merge_transfers)
+
+
+WALLET_ADDRESS = "0x1111111111111111111111111111111111111111"
+LATEST_HASH = "0x" + "a" * 64
+FIRST_HASH = "0x" + "b" * 64
+SENT_TOKEN_HASH = "0x" + "c" * 64
+RECEIVED_TOKEN_HASH = "0x" + "d" * 64
+
+
+class Recorder:
+    def __init__(self):
+        self.pages = []
+
+    def add(self, kind, locator, content):
+        self.pages.append((kind, locator))
+
+
+def extract(server, watermark=None, recorder=None):
+    async def run():
+        async with server:
+            extractor = EtherscanExtractor(base_url=server.base_url, max_connections=2, timeout=5, max_pages=3,
+                                           page_size=50, user_agent='test', max_token_pages=5)
+            async with extractor:
+                return await extractor.extract(WALLET_ADDRESS, watermark, recorder)
+    return asyncio.run(run())
+
+
+def test_parse_address_page():
+    wallet_data = parse_address_page(read_fixture("address.html"), WALLET_ADDRESS)
+
+    assert wallet_data["token_balances"] == [{"symbol": "ETH", "balance": 1.5},
+                                             {"symbol": "USDT", "balance": 1250.5},
+                                             {"symbol": "DAI", "balance": 42.0}]
+    assert [token["contract_address"] for token in wallet_data["tokens_held"]] == [
+        "native", "0xdAC17F958D2ee523a2206206994597C13D831ec7", "0x6B175474E89094C44Da98b954EedeAC495271d0F"]
+    assert wallet_data["wallet_ages"] == {"latest": "2 days ago", "first": "5 days ago"}
+
+
+def test_parse_address_page_without_balance():
+    with pytest.raises(EtherscanExtractionError):
+        parse_address_page(read_fixture("transactions.html"), WALLET_ADDRESS)
+
+
+def test_parse_transactions_page():
+    transactions = parse_transactions_page(read_fixture("transactions.html"), WALLET_ADDRESS)
+
+    assert transactions == [
+        {"timestamp": 1708060800, "tx_hash": LATEST_HASH, "token": "ETH", "amount": 0.25, "type": "send",
+         "asset_type": "native", "from": WALLET_ADDRESS, "to": "0x2222222222222222222222222222222222222222"},
+        {"timestamp": 1707814800, "tx_hash": FIRST_HASH, "token": "ETH", "amount": 1000.75, "type": "receive",
+         "asset_type": "native", "from": "0x3333333333333333333333333333333333333333", "to": WALLET_ADDRESS},
+    ]
+
+
+def test_parse_empty_transactions_page():
+    assert parse_transactions_page(read_fixture("transactions_empty.html"), WALLET_ADDRESS) == []
+
+
+def test_parse_unrecognised_transactions_page():
+    with pytest.raises(EtherscanExtractionError):
+        parse_transactions_page(read_fixture("transactions_redesigned.html"), WALLET_ADDRESS)
+
+
+def test_parse_token_transfers_page():
+    transfers = parse_transactions_page(read_fixture("token_transfers.html"), WALLET_ADDRESS, token_transfers=True)
+    assert transfers == [
+        {"timestamp": 1708164000, "tx_hash": SENT_TOKEN_HASH, "token": "USDT", "amount": 500.0, "type": "send",
+         "asset_type": "ERC-20", "from": WALLET_ADDRESS, "to": "0x4444444444444444444444444444444444444444"},
+        {"timestamp": 1707912000, "tx_hash": RECEIVED_TOKEN_HASH, "token": "DAI", "amount": 1200.5,
+         "type": "receive", "asset_type": "ERC-20", "from": "0x5555555555555555555555555555555555555555",
+         "to": WALLET_ADDRESS},
+    ]
+
+
+def test_merge_transfers_replaces_the_zero_value_call():
+    call = {"timestamp": 2, "tx_hash": SENT_TOKEN_HASH, "token": "ETH", "amount": 0.0, "asset_type": "native"}
+    transfer = dict(call, token="USDT", amount=500.0, asset_type="ERC-20")
+    payment = {"timestamp": 1, "tx_hash": LATEST_HASH, "token": "ETH", "amount": 1.0, "asset_type": "native"}
+    assert merge_transfers([payment, call], [transfer]) == [transfer, payment]
+    assert merge_transfers([payment], [dict(transfer, tx_hash=LATEST_HASH)]) == [payment]
+
+
+def test_parse_token_page():
+    assert parse_token_page(read_fixture("token.html")) == 6
+    assert parse_token_page(read_fixture("address.html")) is None
+
+
+def test_extract():
+    server = EtherscanFixtureServer()
+    recorder = Recorder()
+    wallet_data = extract(server, recorder=recorder)
+
+    assert [tx["tx_hash"] for tx in wallet_data["transaction_history"]] == [SENT_TOKEN_HASH, LATEST_HASH,
+                                                                            RECEIVED_TOKEN_HASH, FIRST_HASH]
+    assert [token["decimals"] for token in wallet_data["tokens_held"]] == [18, 6, 6]
+    assert sorted(kind for kind, _ in recorder.pages) == ["address", "token", "token", "token_transfers",
+                                                          "transactions"]
+    assert f'/address/{WALLET_ADDRESS}' in server.requests
+
+
+def test_extract_without_token_pages():
+    wallet_data = extract(EtherscanFixtureServer(token_page=None))
+    assert [token["decimals"] for token in wallet_data["tokens_held"]] == [18, None, None]
+
+
+def test_extract_empty_wallet():
+    wallet_data = extract(EtherscanFixtureServer(transaction_pages=["transactions_empty.html"],
+                                                 token_transfer_pages=["transactions_empty.html"]))
+    assert wallet_data["transaction_history"] == []
+
+
+def test_extract_unrecognised_layout_raises():
+    with pytest.raises(EtherscanExtractionError):
+        extract(EtherscanFixtureServer(transaction_pages=["transactions_redesigned.html"]))
+
+
+def test_extract_up_to_watermark():
+    server = EtherscanFixtureServer()
+    wallet_data = extract(server, watermark={"timestamp": 1708164000, "tx_hash": SENT_TOKEN_HASH})
+
+    assert wallet_data == {"wallet_address": WALLET_ADDRESS, "transaction_history": []}
+    assert not any(path.startswith('/address/') for path in server.requests)
+
+
+def test_extract_new_transactions_since_watermark():
+    wallet_data = extract(EtherscanFixtureServer(), watermark={"timestamp": 1707814800, "tx_hash": FIRST_HASH})
+    assert [tx["tx_hash"] for tx in wallet_data["transaction_history"]] == [SENT_TOKEN_HASH, LATEST_HASH,
+                                                                            RECEIVED_TOKEN_HASH]
+
+
+def test_extract_new_token_transfer_since_watermark():
+    # Nothing is new in /txs; the token transfer sent since the watermark only shows up in /tokentxns.
+    wallet_data = extract(EtherscanFixtureServer(), watermark={"timestamp": 1708060800, "tx_hash": LATEST_HASH})
+    assert [tx["tx_hash"] for tx in wallet_data["transaction_history"]] == [SENT_TOKEN_HASH]
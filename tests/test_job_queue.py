@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from src.modules.ingestion.job_queue import IngestionJobQueue, JobLease, PENDING, LEASED, DONE, FAILED
+
+
+@pytest.fixture
+def queue():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.jobs
+    collection.insert_many([{"_id": f"0x{index:040x}", "status": PENDING, "attempts": 0, "enqueued_at": index}
+                            for index in range(2)])
+    return IngestionJobQueue(collection, lease_seconds=60, max_attempts=2)
+
+
+def expire_leases(queue):
+    queue.collection.update_many({"status": LEASED}, {"$set": {"lease_expires_at": time.time() - 1}})
+
+
+def test_expired_lease_is_claimed_again(queue):
+    claimed = queue.claim("worker-a", 1)
+    expire_leases(queue)
+
+    assert queue.claim("worker-b", 2) == [claimed[0], "0x" + "0" * 39 + "1"]
+    assert queue.collection.find_one({"_id": claimed[0]})["attempts"] == 2
+
+
+def test_expired_last_attempt_fails(queue):
+    for worker_id in ("worker-a", "worker-b"):
+        queue.claim(worker_id, 2)
+        expire_leases(queue)
+
+    # Both jobs used their last attempt on a worker that died: nothing can claim them, yet they are still open.
+    assert queue.claim("worker-c", 2) == []
+    assert queue.has_open_jobs()
+
+    assert queue.requeue_expired() == 0
+    assert queue.stats() == {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 2}
+    assert not queue.has_open_jobs()
+
+
+def test_lease_records_outcomes(queue):
+    wallet_addresses = queue.claim("worker-a", 2)
+    lease = JobLease(queue, "worker-a", wallet_addresses)
+
+    lease.record(wallet_addresses[:1], "completed")
+    lease.record(wallet_addresses, "failed")
+
+    assert lease.open_addresses() == []
+    assert queue.stats() == {PENDING: 1, LEASED: 0, DONE: 1, FAILED: 0}
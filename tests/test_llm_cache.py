@@ -0,0 +1,89 @@
+import itertools
+
+import pytest
+
+import src.utils.llm_cache as llm_cache
+from src.config.app_config import CryptoConfig as cc
+from src.service.stubs import StubChatClient
+from src.utils.llm_cache import LLMCache
+from src.utils.response import get_chat_response
+
+
+MESSAGES = [{"role": "user", "content": "How old is this wallet?"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1000)
+    now = {"time": 1000.0}
+
+    def advance(seconds=1.0):
+        now["time"] += seconds
+
+    # Every read moves the clock on a little, so access order is never a tie.
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now["time"] + next(ticks) * 1e-6)
+    return advance
+
+
+def make_cache(tmp_path, max_entries=100, ttl_seconds=3600):
+    return LLMCache(str(tmp_path / "llm_cache.sqlite"), max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
+def test_key_depends_on_model_params_and_messages():
+    key = LLMCache.make_key("model", {"temperature": 0.1}, MESSAGES)
+    assert key == LLMCache.make_key("model", {"temperature": 0.1}, [dict(MESSAGES[0])])
+    assert key != LLMCache.make_key("other-model", {"temperature": 0.1}, MESSAGES)
+    assert key != LLMCache.make_key("model", {"temperature": 0.2}, MESSAGES)
+    assert key != LLMCache.make_key("model", {"temperature": 0.1}, [{"role": "user", "content": "Other"}])
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.set("key", "answer")
+    assert cache.get("key") == "answer"
+
+    clock(61)
+    assert cache.get("key") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 0}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_chat_response_is_served_from_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cc, "llm_cache_enabled", True)
+    monkeypatch.setattr(llm_cache, "_llm_cache", make_cache(tmp_path))
+    client = StubChatClient()
+    calls = []
+    create = client.chat.completions.create
+    client.chat.completions.create = lambda **kwargs: calls.append(kwargs) or create(**kwargs)
+
+    first = get_chat_response(client, "model", MESSAGES)
+    assert get_chat_response(client, "model", MESSAGES) == first
+    assert len(calls) == 1
+
+    get_chat_response(client, "other-model", MESSAGES)
+    assert len(calls) == 2
+    assert llm_cache._llm_cache.stats()["hits"] == 1
+
+
+def test_langchain_adapter_round_trips_chat_generations(tmp_path):
+    pytest.importorskip("langchain_core")
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration
+    from src.utils.langchain_cache import LangChainLLMCache
+
+    cache = LangChainLLMCache(make_cache(tmp_path))
+    assert cache.lookup("prompt", "llm") is None
+    cache.update("prompt", "llm", [ChatGeneration(message=AIMessage(content="answer"))])
+    assert [generation.message.content for generation in cache.lookup("prompt", "llm")] == ["answer"]
+    assert cache.lookup("prompt", "other-llm") is None
@@ -0,0 +1,55 @@
+import math
+from datetime import datetime
+
+from src.modules.agent.trend_agent import HistoricalTrendAnalysisAgent
+from src.modules.analysis.price_index import PriceIndex
+from src.modules.analysis.transaction_columns import TransactionColumns
+
+
+NOW = datetime(2024, 6, 1, 12, 0)
+DAY = 86400
+NOW_TIMESTAMP = int(NOW.timestamp())
+
+
+def make_index():
+    return PriceIndex({"ETH": ([1000, 2000, 3000], [10.0, 20.0, 30.0]),
+                       "WBTC": ([1500], [500.0])},
+                      fixed_prices={"usdt": 1.0})
+
+
+def test_lookup_returns_the_last_price_at_or_before_each_time():
+    index = make_index()
+    prices = index.lookup(["ETH", "eth", "ETH", "ETH", "WBTC", "WBTC", "DAI", "USDT"],
+                          [999, 1000, 2500, 9999, 1400, 1500, 2000, 0])
+    assert [None if math.isnan(price) else price for price in prices] == [None, 10.0, 20.0, 30.0, None, 500.0,
+                                                                         None, 1.0]
+    # Memoized pairs answer the same.
+    assert index.lookup(["ETH"], [2500])[0] == 20.0
+    assert index.price_grid(["ETH", "WBTC"], [1000, 2000]).tolist()[1] == [20.0, 500.0]
+
+
+def test_from_directory_loads_one_series_per_csv(tmp_path):
+    (tmp_path / "ETH.csv").write_text("timestamp,price_usd\n1000,10\n2000,20\n")
+    index = PriceIndex.from_directory(str(tmp_path))
+    assert len(index) == 1
+    assert index.lookup(["ETH"], [1999])[0] == 10.0
+
+
+def test_trend_windows_are_valued_over_tokens_priced_at_both_ends():
+    start = NOW_TIMESTAMP - 30 * DAY
+    index = PriceIndex({"ETH": ([start - DAY, NOW_TIMESTAMP - DAY], [100.0, 200.0]),
+                        # Only priced since after the window start.
+                        "NEW": ([NOW_TIMESTAMP - DAY], [1000.0])})
+    transactions = TransactionColumns.from_cursor([])
+    token_balances = [{"symbol": "ETH", "balance": 3.0}, {"symbol": "NEW", "balance": 5.0}]
+
+    results = HistoricalTrendAnalysisAgent.compute_trends(transactions, token_balances, {}, [30], NOW, index)
+
+    # ETH doubled from 100 to 200 USD; NEW has no price at the window start, so its 5000 USD does not count.
+    assert results["30_day_trend"]["value_change_usd"] == 300.0
+    assert results["30_day_trend"]["overall_change"] == "increase"
+
+    # Without any price series the window keeps the raw balance comparison and reports no USD value.
+    results = HistoricalTrendAnalysisAgent.compute_trends(transactions, token_balances, {}, [30], NOW,
+                                                          PriceIndex({}))
+    assert "value_change_usd" not in results["30_day_trend"]
@@ -0,0 +1,85 @@
+import time
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from src.utils.rate_control import (AdaptiveLimiter, CircuitBreaker, CircuitOpenError, ResilientEndpoint)
+
+
+def make_endpoint():
+    return ResilientEndpoint("test",
+                             limiter=AdaptiveLimiter("test", initial=2, minimum=1, maximum=4),
+                             breaker=CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05),
+                             max_retries=0, base_delay=0.01, max_delay=0.01)
+
+
+def status_error(status_code):
+    request = httpx.Request("GET", "http://upstream.test/")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def fail_with(error):
+    def func():
+        raise error
+    return func
+
+
+def open_circuit(endpoint):
+    with pytest.raises(httpx.ConnectError):
+        endpoint.call(fail_with(httpx.ConnectError("down")))
+    with pytest.raises(CircuitOpenError):
+        endpoint.call(lambda: "ok")
+    time.sleep(0.06)
+
+
+def test_fatal_trial_lets_the_next_trial_through():
+    endpoint = make_endpoint()
+    open_circuit(endpoint)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        endpoint.call(fail_with(status_error(404)))
+
+    assert not endpoint.breaker.trial_in_flight
+    assert endpoint.call(lambda: "ok") == "ok"
+    assert endpoint.breaker.opened_at is None
+
+
+def test_cancelled_trial_lets_the_next_trial_through():
+    endpoint = make_endpoint()
+    open_circuit(endpoint)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def main():
+        trial = asyncio.create_task(endpoint.call_async(hang))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        async def ok():
+            return "ok"
+        return await endpoint.call_async(ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert endpoint.breaker.opened_at is None
+
+
+def test_acquire_async_wakes_on_release_from_another_thread():
+    limiter = AdaptiveLimiter("test", initial=1, minimum=1, maximum=1)
+    limiter.acquire()
+
+    async def main():
+        waiter = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        threading.Thread(target=limiter.release).start()
+        await asyncio.wait_for(waiter, timeout=1)
+
+    asyncio.run(main())
+    assert limiter.in_flight == 1
+    assert limiter.async_waiters == []
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pytest
+
+import src.utils.report_sink as report_sink
+from src.utils.report_sink import ReportSink, trend_record
+
+
+TRENDS = {"30_day_trend": {"overall_change": "increase", "notable_changes": {"ETH": 1.5}, "value_change_usd": None,
+                           "transaction_patterns": {"send_count": 1, "receive_count": 3, "net_activity": 2}}}
+
+
+def test_parquet_rows_are_written_per_trend_window(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    sink = ReportSink(str(tmp_path), batch_size=100, flush_interval=60, formats=["jsonl", "parquet"])
+    sink.add(trend_record("0x" + "1" * 40, TRENDS, "Accumulating.", datetime(2024, 6, 1, 12, 0)))
+    sink.flush()
+
+    (path,) = (tmp_path / "trend" / "run_date=2024-06-01").glob("*.parquet")
+    rows = pq.read_table(path).to_pylist()
+    assert [(row["days"], row["overall_change"], row["net_activity"]) for row in rows] == [(30, "increase", 2)]
+
+
+def test_configured_parquet_without_pyarrow_fails_loudly(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_sink, "pq", None)
+    with pytest.raises(ImportError, match="pyarrow"):
+        ReportSink(str(tmp_path), batch_size=100, flush_interval=60, formats=["jsonl", "parquet"])
+    assert ReportSink(str(tmp_path), batch_size=100, flush_interval=60, formats=["jsonl"]).formats == {"jsonl"}
@@ -0,0 +1,87 @@
+import os
+
+from etherscan_fixture_server import read_fixture
+
+from src.utils.snapshot_store import SnapshotStore
+from src.modules.ingestion.snapshot_replay import merge_records, replay_wallets
+
+
+WALLET_ADDRESS = "0x1111111111111111111111111111111111111111"
+OTHER_ADDRESS = "0x4444444444444444444444444444444444444444"
+
+
+def make_store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots"), max_bytes=2**30, compression_level=1)
+
+
+def save(store, wallet_address, fetched_at, full_history, size=4096):
+    # Random pages, so every fetch stores objects of its own.
+    store.save_fetch(wallet_address, "http", fetched_at, [("address", "/address", os.urandom(size).hex())],
+                     full_history)
+
+
+def chains(store):
+    return {wallet["wallet_address"]: ([fetch["fetched_at"] for fetch in wallet["fetches"]], wallet["complete"])
+            for wallet in store.wallet_fetches()}
+
+
+def test_wallet_fetches_start_at_the_latest_full_history_fetch(tmp_path):
+    store = make_store(tmp_path)
+    for fetched_at, full_history in ((1, True), (2, False), (3, True), (4, False), (5, False)):
+        save(store, WALLET_ADDRESS, fetched_at, full_history)
+    for fetched_at in (1, 2):
+        save(store, OTHER_ADDRESS, fetched_at, False)
+
+    assert chains(store) == {WALLET_ADDRESS: ([3, 4, 5], True), OTHER_ADDRESS: ([1, 2], False)}
+
+
+def test_eviction_drops_superseded_fetches_then_whole_chains(tmp_path):
+    store = make_store(tmp_path)
+    for fetched_at, full_history in ((1, True), (2, False), (3, True), (4, False)):
+        save(store, WALLET_ADDRESS, fetched_at, full_history)
+    for fetched_at, full_history in ((5, True), (6, False)):
+        save(store, OTHER_ADDRESS, fetched_at, full_history)
+
+    def evict_one_more_byte():
+        store.max_bytes = store.stored_bytes() - 1
+        store.evict()
+        return store.stats()["fetches"]
+
+    assert evict_one_more_byte() == 5
+    assert evict_one_more_byte() == 4
+    assert chains(store) == {WALLET_ADDRESS: ([3, 4], True), OTHER_ADDRESS: ([5, 6], True)}
+
+    # Dropping one more fetch would break a chain, so the least recently fetched wallet goes whole.
+    assert evict_one_more_byte() == 2
+    assert chains(store) == {OTHER_ADDRESS: ([5, 6], True)}
+
+
+def test_merge_records_keeps_latest_fields_and_every_transaction():
+    merged = merge_records([
+        {"wallet_address": WALLET_ADDRESS, "eth_balance": 1.0,
+         "transaction_history": [{"tx_hash": "0x1", "amount": 1.0}, {"tx_hash": "0x2", "amount": 2.0}]},
+        {"wallet_address": WALLET_ADDRESS, "transaction_history": [{"tx_hash": "0x2", "amount": 2.5}]},
+        {"wallet_address": WALLET_ADDRESS, "eth_balance": 3.0,
+         "transaction_history": [{"tx_hash": "0x3", "amount": 3.0}]},
+    ])
+
+    assert merged["eth_balance"] == 3.0
+    assert {tx["tx_hash"]: tx["amount"] for tx in merged["transaction_history"]} == {"0x1": 1.0, "0x2": 2.5,
+                                                                                    "0x3": 3.0}
+
+
+def test_replay_of_a_chain_with_an_unreadable_fetch_is_not_complete(tmp_path):
+    store = make_store(tmp_path)
+    store.save_fetch(WALLET_ADDRESS, "http", 1, [("address", f"/address/{WALLET_ADDRESS}", read_fixture("address.html")),
+                                                 ("transactions", "1", read_fixture("transactions.html"))], True)
+    (wallet,) = store.wallet_fetches()
+    ((wallet_address, fetched_at, wallet_data, complete, error),) = replay_wallets([wallet])
+    assert complete and error is None
+    assert len(wallet_data["transaction_history"]) == 2
+
+    store.save_fetch(WALLET_ADDRESS, "browser", 2, [("browser_task", None, '[null]')])
+    (wallet,) = store.wallet_fetches()
+    ((wallet_address, fetched_at, wallet_data, complete, error),) = replay_wallets([wallet])
+    assert not complete and "no valid JSON" in error
+    assert fetched_at == 2
+    assert len(wallet_data["transaction_history"]) == 2
@@ -0,0 +1,52 @@
+import pickle
+
+import numpy as np
+
+from src.modules.analysis.transaction_columns import TransactionColumns
+
+
+SENDER = "0x" + "1" * 40
+RECEIVER = "0x" + "2" * 40
+TRANSACTIONS = [
+    {"timestamp": 300, "token": "USDT", "amount": 5.0, "type": "send", "from": SENDER, "to": RECEIVER},
+    {"timestamp": 100, "token": "ETH", "amount": 1.5, "type": "receive", "from": RECEIVER, "to": SENDER},
+    {"timestamp": 200, "token": "ETH", "amount": None, "type": "contract", "from": SENDER},
+]
+
+
+def test_columns_are_sorted_and_dictionary_encoded():
+    columns = TransactionColumns.from_cursor(TRANSACTIONS)
+
+    assert columns.timestamps.tolist() == [100, 200, 300]
+    assert columns.amounts.tolist() == [1.5, 0.0, 5.0]
+    assert [columns.tokens.values[code] for code in columns.token_codes] == ["ETH", "ETH", "USDT"]
+    assert columns.type_mask("send").tolist() == [False, False, True]
+    assert columns.type_mask("receive").tolist() == [True, False, False]
+    assert {symbol: mask.tolist() for symbol, mask in columns.token_masks()} == {
+        "USDT": [False, False, True], "ETH": [True, True, False]}
+
+    # `from` and `to` share one address dictionary; a missing address is code -1.
+    assert len(columns.addresses) == 2
+    assert columns.from_codes.tolist() == [columns.addresses.code(RECEIVER), columns.addresses.code(SENDER),
+                                           columns.addresses.code(SENDER)]
+    assert columns.to_codes.tolist() == [columns.addresses.code(SENDER), -1, columns.addresses.code(RECEIVER)]
+    assert columns.first_timestamp() == 100
+
+
+def test_since_slices_without_copying_the_dictionaries():
+    columns = TransactionColumns.from_cursor(TRANSACTIONS)
+    recent = columns.since(200)
+
+    assert recent.timestamps.tolist() == [200, 300]
+    assert recent.tokens is columns.tokens and recent.addresses is columns.addresses
+    assert len(columns.since(301)) == 0
+    assert TransactionColumns.from_cursor([]).first_timestamp() is None
+
+
+def test_columns_survive_pickling_for_batch_workers():
+    columns = TransactionColumns.from_cursor(TRANSACTIONS)
+    restored = pickle.loads(pickle.dumps(columns))
+
+    assert np.array_equal(restored.timestamps, columns.timestamps)
+    assert restored.type_mask("send").tolist() == columns.type_mask("send").tolist()
+    assert restored.tokens.values == columns.tokens.values
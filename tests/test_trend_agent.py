@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from src.modules.analysis.transaction_columns import load_transaction_columns
+from src.utils.synthetic_wallets import generate_wallet
+
+
+def test_wallet_chunks_hold_normalized_addresses(trend_agent, monkeypatch, tmp_path):
+    wallet_file = tmp_path / "wallets.txt"
+    wallet_file.write_text("0xAbCdEf0123456789aBcDeF0123456789AbCdEf01\n\nnot-an-address\n"
+                           f"  0x{'2' * 40}  \n0x{'3' * 40}\n")
+    monkeypatch.setattr(trend_agent, "batch_chunk_size", 2)
+
+    assert list(trend_agent.iter_wallet_chunks(str(wallet_file))) == [
+        ["0xabcdef0123456789abcdef0123456789abcdef01", f"0x{'2' * 40}"],
+        [f"0x{'3' * 40}"],
+    ]
+
+
+def test_wallet_without_a_stored_document_has_stable_trends(trend_agent):
+    wallet_address = f"0x{'4' * 40}"
+    assert trend_agent.get_token_balances(wallet_address) == []
+
+    response = trend_agent.get_response(wallet_address)
+    assert all(trend["overall_change"] == "stable" and not trend["notable_changes"]
+               for trend in response["trends"].values())
+
+
+def test_shared_columns_give_the_trends_of_the_agents_own_load(trend_agent, monkeypatch):
+    now = datetime(2024, 6, 1, 12, 0)
+    wallet = generate_wallet(300, num_tokens=5, history_days=400, seed=7, now=now.timestamp())
+    trend_agent.collection.insert_one({"wallet_address": wallet["wallet_address"],
+                                       "token_balances": wallet["token_balances"]})
+    trend_agent.transaction_collection.insert_many([dict(tx, wallet_address=wallet["wallet_address"])
+                                                    for tx in wallet["transaction_history"]])
+    monkeypatch.setattr(trend_agent, "source", "transactions")
+
+    # The controller hands over the full history; called on its own, the agent loads the widest window
+    # plus net amounts from before it.
+    shared = load_transaction_columns(trend_agent.transaction_collection, wallet["wallet_address"])
+    expected = trend_agent.analyze_trends(wallet["wallet_address"], now=now)
+    results = trend_agent.analyze_trends(wallet["wallet_address"], transactions=shared, now=now)
+
+    assert results.keys() == expected.keys()
+    for timeframe, trend in expected.items():
+        assert results[timeframe]["overall_change"] == trend["overall_change"]
+        assert results[timeframe]["transaction_patterns"] == trend["transaction_patterns"]
+        assert results[timeframe]["notable_changes"] == pytest.approx(trend["notable_changes"])
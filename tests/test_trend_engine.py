@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.modules.agent.trend_agent import HistoricalTrendAnalysisAgent
+from src.modules.analysis.transaction_columns import TransactionColumns
+from src.utils.synthetic_wallets import generate_wallet
+
+
+NOW = 1_717_200_000
+TIMEFRAMES = [7, 30, 90, 180, 365]
+
+
+def previous_compute_trends(transaction_history, token_balances, balance_offsets, timeframes, current_time):
+    """The per-window loop TrendEngine replaced, kept as the reference it must match."""
+    results = {}
+    for days in timeframes:
+        timeframe_start = current_time - timedelta(days=days)
+        transactions = [tx for tx in transaction_history
+                        if datetime.fromtimestamp(tx["timestamp"]) >= timeframe_start]
+
+        initial_balances = {token["symbol"]: token["balance"] for token in token_balances}
+        for token, net_amount in balance_offsets.items():
+            if token in initial_balances:
+                initial_balances[token] += net_amount
+        for tx in transaction_history:
+            if datetime.fromtimestamp(tx["timestamp"]) < timeframe_start:
+                if tx["type"] == "send":
+                    initial_balances[tx["token"]] -= tx["amount"]
+                elif tx["type"] == "receive":
+                    initial_balances[tx["token"]] += tx["amount"]
+        current_balances = {token["symbol"]: token["balance"] for token in token_balances}
+
+        change = sum(current_balances.values()) - sum(initial_balances.values())
+        notable_changes = {token: current_balances.get(token, 0) - balance
+                           for token, balance in initial_balances.items()
+                           if abs(current_balances.get(token, 0) - balance) > 0}
+        send_count = sum(1 for tx in transactions if tx["type"] == "send")
+        receive_count = sum(1 for tx in transactions if tx["type"] == "receive")
+
+        results[f"{days}_day_trend"] = {
+            "overall_change": "increase" if change > 0 else "decrease" if change < 0 else "stable",
+            "notable_changes": notable_changes,
+            "transaction_patterns": {"send_count": send_count,
+                                     "receive_count": receive_count,
+                                     "net_activity": receive_count - send_count}
+        }
+    return results
+
+
+def assert_same_trends(results, expected):
+    assert results.keys() == expected.keys()
+    for timeframe, trend in expected.items():
+        assert results[timeframe]["overall_change"] == trend["overall_change"]
+        assert results[timeframe]["transaction_patterns"] == trend["transaction_patterns"]
+        assert results[timeframe]["notable_changes"] == pytest.approx(trend["notable_changes"], rel=1e-9, abs=1e-6)
+
+
+def windowed(transactions, current_time, timeframes):
+    """What get_features loads: the transactions of the widest window, and net amounts from before it."""
+    window_start = (current_time - timedelta(days=max(timeframes))).timestamp()
+    offsets = {}
+    for tx in transactions:
+        if tx["timestamp"] < window_start:
+            sign = {"send": -1, "receive": 1}.get(tx["type"], 0)
+            offsets[tx["token"]] = offsets.get(tx["token"], 0) + sign * tx["amount"]
+    return [tx for tx in transactions if tx["timestamp"] >= window_start], offsets
+
+
+@pytest.mark.parametrize("num_tokens", [1, 5, 20])
+@pytest.mark.parametrize("seed", range(10))
+def test_engine_matches_the_previous_per_window_loop(seed, num_tokens):
+    wallet = generate_wallet(400, num_tokens=num_tokens, history_days=500, seed=seed, now=NOW)
+    current_time = datetime.fromtimestamp(NOW)
+    transactions = sorted(wallet["transaction_history"], key=lambda tx: tx["timestamp"])
+    expected = previous_compute_trends(transactions, wallet["token_balances"], {}, TIMEFRAMES, current_time)
+
+    results = HistoricalTrendAnalysisAgent.compute_trends(TransactionColumns.from_cursor(transactions),
+                                                          wallet["token_balances"], {}, TIMEFRAMES, current_time)
+    assert_same_trends(results, expected)
+
+    window_transactions, offsets = windowed(transactions, current_time, TIMEFRAMES)
+    results = HistoricalTrendAnalysisAgent.compute_trends(TransactionColumns.from_cursor(window_transactions),
+                                                          wallet["token_balances"], offsets, TIMEFRAMES,
+                                                          current_time)
+    assert_same_trends(results, expected)
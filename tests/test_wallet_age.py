@@ -0,0 +1,44 @@
+from datetime import date, datetime, timedelta
+
+from src.modules.analysis.wallet_age import (categorize_wallet_age,
+                                             compute_wallet_age,
+                                             first_transaction_date,
+                                             parse_relative_age)
+
+
+OBSERVED_AT = datetime(2024, 6, 1, 12, 0)
+
+
+def test_parse_relative_age():
+    assert parse_relative_age("2 yrs 3 mths ago") == timedelta(days=2 * 365 + 3 * 30)
+    assert parse_relative_age("1 day 4 hrs ago") == timedelta(days=1, hours=4)
+    assert parse_relative_age("45 secs ago") == timedelta(seconds=45)
+    assert parse_relative_age("unknown") is None
+    assert parse_relative_age(None) is None
+
+
+def test_first_transaction_date_is_the_earlier_of_both_sources():
+    # Etherscan's age is resolved against when it was observed, not against today.
+    wallet_ages = {"first": "10 days ago"}
+    assert first_transaction_date(wallet_ages, None, OBSERVED_AT) == date(2024, 5, 22)
+
+    earlier = datetime(2024, 5, 1, 12, 0).timestamp()
+    assert first_transaction_date(wallet_ages, earlier, OBSERVED_AT) == date(2024, 5, 1)
+    later = datetime(2024, 5, 30, 12, 0).timestamp()
+    assert first_transaction_date(wallet_ages, later, OBSERVED_AT) == date(2024, 5, 22)
+    assert first_transaction_date({}, None, OBSERVED_AT) is None
+
+
+def test_compute_wallet_age():
+    first_timestamp = datetime(2021, 1, 1, 12, 0).timestamp()
+    assert compute_wallet_age(None, first_timestamp, OBSERVED_AT, today=date(2023, 3, 7)) == {
+        "First Transaction": "2021-01-01",
+        "Wallet Age": "2 years, 2 months, 5 days",
+        "Category": "Established",
+    }
+    assert compute_wallet_age({"first": "n/a"}, None, OBSERVED_AT, today=date(2024, 6, 1)) is None
+
+
+def test_categorize_wallet_age():
+    assert [categorize_wallet_age(years) for years in (0, 1, 2, 4, 5, 9)] == [
+        "Newcomer", "Intermediate", "Established", "Established", "Veteran", "Veteran"]
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from mock_openai_server import MockOpenAIServer
+from src.config.app_config import (CryptoConfig as cc,
+                                   Config as cfg)
+from src.utils.common import summarize_latencies
+
+
+MAX_IN_FLIGHT = 3
+DELAY = 0.05
+
+
+@pytest.fixture
+def wallet_age_agent(monkeypatch, tmp_path):
+    pytest.importorskip("mongomock")
+    import src.utils.report_sink as report_sink
+    from src.service.stubs import use_in_memory_mongo
+
+    use_in_memory_mongo()
+    monkeypatch.setattr(report_sink, "_report_sink", None)
+    monkeypatch.setattr(cc, "reports_directory", str(tmp_path / "reports"))
+    monkeypatch.setattr(cc, "reports_render_text", False)
+    monkeypatch.setattr(cc, "llm_cache_enabled", False)
+    monkeypatch.setattr(cc, "wallet_age_use_llm", True)
+    monkeypatch.setattr(cc, "wallet_age_max_in_flight", MAX_IN_FLIGHT)
+    monkeypatch.setattr(cfg, "RUNPOD_TOKEN", "test")
+
+    from src.modules.agent.wallet_age_agent import WalletAgeAgent
+    agent = WalletAgeAgent()
+    agent.collection.delete_many({})
+    yield agent
+    # Flush now rather than at exit, when the captured log stream is already closed.
+    agent.report_sink.flush()
+
+
+def test_summarize_latencies():
+    assert summarize_latencies([]) == {"count": 0}
+    assert summarize_latencies([float(value) for value in range(100, 0, -1)]) == {
+        "count": 100, "p50": 50.0, "p90": 90.0, "p99": 99.0, "max": 100.0}
+
+
+def test_analyze_many_bounds_concurrency(wallet_age_agent, monkeypatch):
+    wallet_addresses = [f"0x{index:040x}" for index in range(20)]
+    wallet_age_agent.collection.insert_many([
+        {"wallet_address": wallet_address, "wallet_ages": {"latest": "2 days ago", "first": "400 days ago"}}
+        for wallet_address in wallet_addresses
+    ])
+
+    async def run():
+        async with MockOpenAIServer(delay=DELAY) as server:
+            monkeypatch.setattr(cfg, "RUNPOD_URL", server.base_url)
+            results, latency_stats = await wallet_age_agent.analyze_many_async(wallet_addresses)
+            return server, results, latency_stats
+
+    server, results, latency_stats = asyncio.run(run())
+
+    assert server.requests == len(wallet_addresses)
+    assert server.max_in_flight == MAX_IN_FLIGHT
+    assert set(results) == set(wallet_addresses)
+    assert all(output["Analysis"] == server.content for output in results.values())
+
+    assert latency_stats["count"] == len(wallet_addresses)
+    assert DELAY <= latency_stats["p50"] <= latency_stats["p90"] <= latency_stats["p99"] <= latency_stats["max"]
+
+
+def test_templated_analysis_uses_the_earliest_stored_transaction(wallet_age_agent, monkeypatch):
+    monkeypatch.setattr(wallet_age_agent, "use_llm", False)
+    wallet_address = f"0x{1:040x}"
+    observed_at = datetime(2024, 6, 1, 12, 0)
+    wallet_age_agent.collection.insert_one({"wallet_address": wallet_address,
+                                            "wallet_ages": {"latest": "2 days ago", "first": "10 days ago"},
+                                            "wallet_ages_observed_at": observed_at.timestamp()})
+    wallet_age_agent.transaction_collection.delete_many({})
+    wallet_age_agent.transaction_collection.insert_one({"wallet_address": wallet_address,
+                                                        "timestamp": datetime(2024, 5, 1, 12, 0).timestamp()})
+
+    output = wallet_age_agent.get_response(wallet_address)
+
+    assert output["First Transaction"] == "2024-05-01"
+    assert output["Analysis"].startswith(f"The wallet has been active for {output['Wallet Age']} since 2024-05-01")
@@ -0,0 +1,52 @@
+from src.modules.ingestion.wallet_schema import merge_sections, validate_wallet_record
+
+
+WALLET_ADDRESS = "0x" + "1" * 40
+TRANSACTION = {"timestamp": 1708060800, "tx_hash": "0x" + "a" * 64, "token": "ETH", "amount": "1,250.5 ETH",
+               "type": "IN", "from": "0x" + "2" * 40, "to": WALLET_ADDRESS}
+
+
+def test_valid_sections_are_normalized():
+    record, invalid_sections = validate_wallet_record({
+        "tokens_held": [{"symbol": "ETH", "contract_address": "native", "decimals": 18}],
+        "token_balances": [{"symbol": "USDT", "balance": "1,250.50 USDT"}],
+        "wallet_ages": {"latest": "2 days ago", "first": "1 yr ago"},
+        "transaction_history": [TRANSACTION],
+    }, WALLET_ADDRESS)
+
+    assert invalid_sections == []
+    assert record["token_balances"] == [{"symbol": "USDT", "balance": 1250.5}]
+    (transaction,) = record["transaction_history"]
+    assert (transaction["amount"], transaction["type"], transaction["asset_type"]) == (1250.5, "receive", "native")
+    assert (transaction["from"], transaction["to"]) == ("0x" + "2" * 40, WALLET_ADDRESS)
+
+
+def test_invalid_sections_are_reported_and_bad_transactions_dropped():
+    record, invalid_sections = validate_wallet_record({
+        "tokens_held": [{"symbol": "ETH"}],
+        "token_balances": [{"symbol": "ETH", "balance": 3.4}],
+        "transaction_history": [TRANSACTION, dict(TRANSACTION, type="swap")],
+    }, WALLET_ADDRESS)
+
+    assert invalid_sections == ["tokens_held", "wallet_ages"]
+    assert len(record["transaction_history"]) == 1
+    assert "tokens_held" not in record
+
+    # A history with nothing valid left in it is re-scraped rather than stored empty.
+    _, invalid_sections = validate_wallet_record({"transaction_history": [dict(TRANSACTION, amount=None)]},
+                                                 WALLET_ADDRESS)
+    assert "transaction_history" in invalid_sections
+    assert "tokens_held" in validate_wallet_record(None, WALLET_ADDRESS)[1]
+
+
+def test_merge_sections_only_patches_the_requested_sections():
+    record, _ = validate_wallet_record({"token_balances": [{"symbol": "ETH", "balance": 1.0}]}, WALLET_ADDRESS)
+    record, still_invalid = merge_sections(record, {
+        "tokens_held": [{"symbol": "ETH", "contract_address": "native"}],
+        "token_balances": [{"symbol": "ETH", "balance": 9.0}],
+        "wallet_ages": "unknown",
+    }, ["tokens_held", "wallet_ages"])
+
+    assert record["tokens_held"] == [{"symbol": "ETH", "contract_address": "native", "decimals": None}]
+    assert record["token_balances"] == [{"symbol": "ETH", "balance": 1.0}]
+    assert still_invalid == ["wallet_ages"]